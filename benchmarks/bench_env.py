@@ -0,0 +1,73 @@
+"""Step rate of TradingEnv on synthetic day files
+
+Reports steps per second of a single environment with random
+actions, for a range of step lengths, and of SubprocVecEnv
+with a number of worker environments.
+
+    python benchmarks/bench_env.py [events per day] [workers]
+"""
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from envs.trading import TradingEnv
+from envs.vec_env import SubprocVecEnv
+from tests.synthetic import write_day
+
+
+def options(data_dir, step_ms):
+    return {
+        "exchange": "GEMINI",
+        "symbol": "ETHUSD",
+        "data_dir": data_dir,
+        "data_format": "raw",
+        "dates": [20171201],
+        "delta": 0,
+        "grid_step_length": step_ms,
+        "validate": False,
+        "cache": True}
+
+
+def single_rate(data_dir, step_ms, steps):
+    env = TradingEnv(options(data_dir, step_ms), episode_length=steps)
+    actions = np.random.RandomState(0).randint(3, size=steps)
+    env.reset()
+    start = time.perf_counter()
+    for action in actions:
+        _, _, terminated, truncated, _ = env.step(action)
+        if terminated or truncated:
+            break
+    rate = env._iteration / (time.perf_counter() - start)
+    env.close()
+    return rate
+
+
+def vec_rate(data_dir, step_ms, workers, steps):
+    settings = options(data_dir, step_ms)
+    env = SubprocVecEnv([lambda: TradingEnv(settings, episode_length=steps)
+                         for _ in range(workers)])
+    actions = np.random.RandomState(0).randint(3, size=(steps, workers))
+    env.reset()
+    start = time.perf_counter()
+    for action in actions:
+        env.step(action)
+    rate = steps * workers / (time.perf_counter() - start)
+    env.close()
+    return rate
+
+
+if __name__ == '__main__':
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    data_dir = tempfile.mkdtemp()
+    write_day(os.path.join(data_dir, "ETHUSD_order_book_20171201.csv"),
+              events)
+
+    for step_ms in (10, 100, 1000):
+        steps = min(events * 10 // step_ms, 20000)
+        print("TradingEnv     step {:>5} ms  {:>10.0f} steps/s".format(
+            step_ms, single_rate(data_dir, step_ms, steps)))
+    print("SubprocVecEnv  {:>3} workers   {:>10.0f} steps/s".format(
+        workers, vec_rate(data_dir, 100, workers, 2000)))
@@ -0,0 +1,67 @@
+"""Event-time cost of the incremental feature engine
+
+Replays a synthetic stream of limit orders, cancels and market
+orders around a fixed mid, once on a bare book and once with a
+FeatureEngine subscribed, and reports the time per event.
+
+    python benchmarks/bench_features.py [events]
+"""
+import os
+import random
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from datetime import datetime as dt
+from ob.features import FeatureEngine
+from ob.orderbook import OrderBook
+
+
+def synthetic_events(count, seed=7):
+    rng = random.Random(seed)
+    resting = []
+    events = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.55 or len(resting) < 100:
+            side = "BID" if rng.random() < 0.5 else "ASK"
+            offset = rng.randint(1, 50) * 0.01
+            price = round(100.0 - offset if side == "BID" else 100.0 + offset, 2)
+            events.append(("limit", side, price, rng.randint(1, 10), i))
+            resting.append((side, i))
+        elif kind < 0.95:
+            side, order_id = resting.pop(rng.randrange(len(resting)))
+            events.append(("cancel", side, 0, 0, order_id))
+        else:
+            side = "BID" if rng.random() < 0.5 else "ASK"
+            events.append(("market", side, 0, rng.randint(1, 5), i))
+    return events
+
+
+def replay(events, features):
+    ob = OrderBook("ETHUSD", tick_size=0.01, validate=False)
+    if features:
+        FeatureEngine(ob)
+    ts = dt.now()
+
+    start = time.perf_counter()
+    for kind, side, price, volume, order_id in events:
+        if kind == "limit":
+            ob.limit(side, price, volume, ts, order_id=order_id)
+        elif kind == "cancel":
+            if order_id in (ob._bid_limits if side == "BID"
+                            else ob._ask_limits).order_map:
+                ob.cancel(side, order_id)
+        else:
+            ob.market(side, volume, ts, order_id=order_id)
+    return (time.perf_counter() - start) / len(events) * 1e9
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    events = synthetic_events(count)
+
+    bare = replay(events, False)
+    engine = replay(events, True)
+    print("bare book        {:>8.0f} ns/event".format(bare))
+    print("with features    {:>8.0f} ns/event".format(engine))
+    print("feature overhead {:>8.0f} ns/event".format(engine - bare))
@@ -0,0 +1,56 @@
+"""Time to sample a synthetic day on a fixed 100 ms grid
+
+Compares stepping the simulator with next(0.1) and taking a
+depth snapshot per bucket against GridSampler.sample.
+
+    python benchmarks/bench_grid.py [events]
+"""
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from envs.grid import GridSampler
+from envs.simulator import Simulator
+from tests.synthetic import write_day
+
+
+def options(data_dir):
+    return {
+        "exchange": "GEMINI",
+        "symbol": "ETHUSD",
+        "data_dir": data_dir,
+        "data_format": "raw",
+        "dates": [20171201],
+        "delta": 0,
+        "grid_step_length": 100,
+        "validate": False,
+        "cache": True}
+
+
+def buckets(data_dir):
+    sim = Simulator(options(data_dir))
+    count = 0
+    while sim.next(0.1) is not None:
+        sim.orderbook.depth(10)
+        count += 1
+    return count
+
+
+def grid(data_dir):
+    times, _ = GridSampler(Simulator(options(data_dir))).sample()
+    return len(times)
+
+
+if __name__ == '__main__':
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    data_dir = tempfile.mkdtemp()
+    write_day(os.path.join(data_dir, "ETHUSD_order_book_20171201.csv"),
+              events)
+    Simulator(options(data_dir))  # build the cache
+
+    for name, fn in (("next(0.1) buckets", buckets), ("GridSampler", grid)):
+        start = time.perf_counter()
+        count = fn(data_dir)
+        print("{:<18} {:>8} samples  {:>6.2f} s".format(
+            name, count, time.perf_counter() - start))
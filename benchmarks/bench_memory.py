@@ -0,0 +1,65 @@
+"""Memory used per resting order
+
+Fills one side of a Tree with resting orders spread over a
+number of price levels and reports the traced allocation per
+order, next to the size of a single Order instance.
+
+    python benchmarks/bench_memory.py [orders] [levels]
+"""
+import os
+import sys
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from datetime import datetime as dt
+from ob.order_utils import Order
+from ob.ordertree import Tree
+
+
+class DictOrder(object):
+    """
+    Stand-in for the previous Order layout, which kept
+    the same attributes in a per-instance __dict__
+    """
+
+    def __init__(self):
+        self._id = 0
+        self._price = 0.0
+        self._volume = 0.0
+        self._filled_volume = 0
+        self._timestamp = None
+        self._price_level = None
+        self._prev = None
+        self._next = None
+        self._queue = None
+
+
+def instance_size(obj):
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def traced_per_order(orders, levels, tick_size=None):
+    ts = dt.now()
+    tracemalloc.start()
+    tree = Tree(tick_size)
+    for i in range(orders):
+        tree.insert_order(i, 100.0 + (i % levels) * 0.01, 1.0, ts)
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return used / float(orders)
+
+
+if __name__ == '__main__':
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    levels = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    print("Order instance (dict, before) {:>6} bytes".format(
+        instance_size(DictOrder())))
+    print("Order instance (slots)        {:>6} bytes".format(
+        instance_size(Order(0, 100.0, 1.0, dt.now()))))
+    print("per resting order, rbtree     {:>6.0f} bytes".format(
+        traced_per_order(orders, levels)))
+    print("per resting order, ladder     {:>6.0f} bytes".format(
+        traced_per_order(orders, levels, tick_size=0.01)))
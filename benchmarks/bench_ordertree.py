@@ -0,0 +1,63 @@
+"""Replay throughput of Tree when the touch is repeatedly emptied
+
+Builds a deep synthetic ask side and then replays a stream of
+aggressive buys that each consume the best level, followed by
+a new order placed at the back of the book. Every event empties
+the touch, which is the worst case for best-price maintenance.
+
+    python benchmarks/bench_ordertree.py [levels] [events]
+"""
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from datetime import datetime as dt
+from ob.ordertree import Tree
+
+
+class ScanTree(Tree):
+    """
+    Tree with the previous remove_price, which rescanned
+    the whole price tree whenever the touch emptied
+    """
+
+    def remove_price(self, price):
+        try:
+            self.price_tree.remove(price)
+            del self.price_map[price]
+        except Exception:
+            pass
+
+        if self.max_price == price:
+            try:
+                self.max_price = max(self.price_tree)
+            except ValueError:
+                self.max_price = None
+        if self.min_price == price:
+            try:
+                self.min_price = min(self.price_tree)
+            except ValueError:
+                self.min_price = None
+
+
+def replay(tree, levels, events):
+    ts = dt.now()
+    for i in range(levels):
+        tree.insert_order(i, 100.0 + i * 0.01, 1.0, ts)
+
+    start = time.perf_counter()
+    for i in range(levels, levels + events):
+        tree.fill(0, 1.0, "BUY")
+        tree.insert_order(i, 100.0 + i * 0.01, 1.0, ts)
+    return events / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    levels = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    events = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    for name, tree in [("scan (before)", ScanTree()),
+                       ("rbtree (after)", Tree()),
+                       ("tick ladder", Tree(tick_size=0.01))]:
+        print("{:<16} {:>10.0f} events/s".format(
+            name, replay(tree, levels, events)))
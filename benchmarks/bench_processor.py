@@ -0,0 +1,107 @@
+"""Parse throughput of DataProcessor on a synthetic day file
+
+Compares reading rows with a fresh csv.reader per line, as the
+processor used to, against the chunked reader, decoding rows or
+encoding whole buffers into columns, and reports the
+event rate of DataProcessor.get_next_order on top of it, and of
+one second buckets read as OrderEntry lists and as structured
+arrays, from the csv and from the columnar cache.
+
+    python benchmarks/bench_processor.py [events]
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ob.cache import EventEncoder
+from ob.processor import DataProcessor
+from ob.reader import ChunkedCSVReader
+from tests.synthetic import write_day
+
+
+def per_line_rows(path):
+    count = 0
+    with open(path) as file_handler:
+        while True:
+            try:
+                next(csv.reader(file_handler, delimiter=","))
+            except StopIteration:
+                return count
+            count += 1
+
+
+def chunked_rows(path):
+    count = 0
+    reader = ChunkedCSVReader(path)
+    try:
+        while True:
+            count += len(reader.read_batch())
+    except StopIteration:
+        return count
+
+
+def chunked_columns(path):
+    count = 0
+    reader = ChunkedCSVReader(path)
+    encoder = EventEncoder()
+    lines = reader.next_lines()[1:]
+    try:
+        while True:
+            count += len(encoder.lines(lines, 18)[0])
+            lines = reader.next_lines()
+    except StopIteration:
+        return count
+
+
+def processor_events(path):
+    count = 0
+    dp = DataProcessor(path, "GEMINI")
+    try:
+        while True:
+            dp.get_next_order()
+            count += 1
+    except StopIteration:
+        return count
+
+
+def bucket_events(path, batch, cache=False):
+    count = 0
+    dp = DataProcessor(path, "GEMINI", cache=cache)
+    read = dp.next_batch if batch else dp.next
+    try:
+        while True:
+            count += len(read(1.0))
+    except StopIteration:
+        return count
+
+
+def rate(fn, path):
+    start = time.perf_counter()
+    count = fn(path)
+    return count / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    path = os.path.join(tempfile.mkdtemp(), "ETHUSD_order_book_20171201.csv")
+    write_day(path, events)
+    print("file size {:.1f} MB".format(os.path.getsize(path) / 1e6))
+
+    print("csv.reader per line  {:>10.0f} rows/s".format(
+        rate(per_line_rows, path)))
+    print("chunked reader       {:>10.0f} rows/s".format(
+        rate(chunked_rows, path)))
+    print("chunked columns      {:>10.0f} rows/s".format(
+        rate(chunked_columns, path)))
+    print("get_next_order       {:>10.0f} events/s".format(
+        rate(processor_events, path)))
+
+    for cache in (False, True):
+        source = "cache" if cache else "csv  "
+        DataProcessor(path, "GEMINI", cache=cache)
+        print("next(1.0)       {}  {:>10.0f} events/s".format(
+            source, rate(lambda p: bucket_events(p, False, cache), path)))
+        print("next_batch(1.0) {}  {:>10.0f} events/s".format(
+            source, rate(lambda p: bucket_events(p, True, cache), path)))
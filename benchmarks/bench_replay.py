@@ -0,0 +1,54 @@
+"""Wall-clock scaling of the sharded multi-day replay
+
+Writes a number of synthetic day files and replays them with
+replay_range for an increasing number of worker processes.
+
+    python benchmarks/bench_replay.py [days] [events per day] [workers]
+
+Workers default to the CPU count. Going past it measures the
+overhead of the process pool rather than any speedup.
+"""
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from envs.replay import replay_range
+from envs.simulator import date_range
+from tests.synthetic import write_day
+
+
+if __name__ == '__main__':
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    events = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    most = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+    data_dir = tempfile.mkdtemp()
+    dates = date_range(20171201, 20171200 + days)
+    for inx, date in enumerate(dates):
+        write_day(os.path.join(
+            data_dir, "ETHUSD_order_book_{}.csv".format(date)), events,
+            date="2017-12-{:02d}".format(date % 100), seed=inx,
+            first_id=(inx + 1) * 10000000)
+
+    options = {
+        "exchange": "GEMINI",
+        "symbol": "ETHUSD",
+        "data_dir": data_dir,
+        "data_format": "raw",
+        "dates": [dates[0], dates[-1]],
+        "delta": 0,
+        "grid_step_length": 100}
+
+    print("{} days of {} events, {} cpus".format(
+        days, events, os.cpu_count()))
+    workers = 1
+    baseline = None
+    while workers <= min(days, most):
+        out_dir = tempfile.mkdtemp()
+        start = time.perf_counter()
+        replay_range(options, out_dir, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print("{:>3} workers  {:>8.2f} s  speedup {:>5.2f}x".format(
+            workers, elapsed, baseline / elapsed))
+        workers *= 2
@@ -0,0 +1,191 @@
+import os
+import shutil
+import numpy as np
+from numpy.lib import format as np_format
+from ob.timeutils import NS_PER_MS
+
+
+class GridSampler(object):
+    """
+    Samples the book of a Simulator on a fixed clock,
+    every grid_step_length milliseconds
+    """
+
+    def __init__(self, sim, levels=10, step_length=None, start=None):
+        """Initializes a grid clock over a simulator
+
+        Every grid time applies the events up to and including it
+        through Simulator.next_until and snapshots the top of book.
+        Grid times without events keep the previous snapshot; the
+        time of the next event is remembered, so neither the data
+        nor the book is read again until the clock reaches it.
+
+        Arguments:
+            sim {Simulator} -- simulator to replay
+
+        Keyword Arguments:
+            levels {int} -- depth levels per side (default: {10})
+            step_length {float} -- milliseconds between grid times,
+                                   defaults to the simulator's
+                                   grid_step_length (default: {None})
+            start {int} -- first grid time in epoch nanoseconds,
+                           defaults to the first multiple of the
+                           step after the replay position
+                           (default: {None})
+        """
+        super(GridSampler, self).__init__()
+        if step_length is None:
+            step_length = sim.grid_step_length
+        self.sim = sim
+        self.levels = levels
+        self.step = int(round(step_length * NS_PER_MS))
+        if self.step <= 0:
+            raise ValueError("Invalid step length {}".format(step_length))
+        if start is None:
+            start = (sim.last_ts // self.step + 1) * self.step
+        self.clock = start
+        self.depth = sim.orderbook.depth(levels)
+        self._next_ts = None  # time of the next event, once known
+
+    def advance(self):
+        """Moves the book to the next grid time
+
+        Returns:
+            tuple<int, ndarray, bool> -- the grid time, the depth
+                snapshot, overwritten by the next call, and whether
+                any event was applied since the last grid time
+        """
+        ts = self.clock
+        self.clock = ts + self.step
+        if self._next_ts is not None and ts < self._next_ts:
+            return ts, self.depth, False
+
+        changed = self.sim.next_until(ts) > 0
+        if changed:
+            self.sim.orderbook.depth(self.levels, out=self.depth)
+        self._next_ts = self.sim.peek_time()
+        return ts, self.depth, changed
+
+    def __iter__(self):
+        while not self.sim.is_finished():
+            yield self.advance()
+
+    def chunks(self, size=65536, end=None):
+        """Samples grid times in blocks of bounded size
+
+        Runs of empty grid times, such as overnight gaps, are
+        filled in bulk without touching the simulator.
+
+        Keyword Arguments:
+            size {int} -- grid times per block (default: {65536})
+            end {int} -- last grid time, epoch nanoseconds, sampling
+                         runs to the end of the data if None
+                         (default: {None})
+
+        Yields:
+            tuple<ndarray, ndarray> -- int64 grid times and
+                float64[k, levels, 4] depth of at most size grid
+                times, owned by the caller
+        """
+        if size <= 0:
+            raise ValueError("Invalid chunk size {}".format(size))
+        shape = (size, self.levels, 4)
+        times = np.empty(size, dtype=np.int64)
+        depth = np.empty(shape)
+        n = 0
+        while not self.sim.is_finished():
+            if end is not None and self.clock > end:
+                break
+            ts, snapshot, _ = self.advance()
+            times[n] = ts
+            depth[n] = snapshot
+            n += 1
+
+            # grid times before the next event are all empty
+            skipped = 0
+            if self._next_ts is not None and self.clock < self._next_ts:
+                stop = self._next_ts if end is None \
+                    else min(self._next_ts, end + 1)
+                skipped = len(range(self.clock, stop, self.step))
+
+            while True:
+                if n == size:
+                    yield times, depth
+                    times = np.empty(size, dtype=np.int64)
+                    depth = np.empty(shape)
+                    n = 0
+                if skipped == 0:
+                    break
+                count = min(skipped, size - n)
+                times[n:n + count] = self.clock + \
+                    self.step * np.arange(count, dtype=np.int64)
+                depth[n:n + count] = self.depth
+                self.clock += count * self.step
+                n += count
+                skipped -= count
+
+        if n > 0:
+            yield times[:n], depth[:n]
+
+    def sample(self, end=None, path=None, size=65536):
+        """Samples every grid time in one streaming pass
+
+        Without a path the blocks of chunks are joined in memory,
+        which for long ranges is large: a day of a 100 ms grid at
+        10 levels takes about 280 MB. With a path, blocks are
+        appended to disk as they are produced and only one block
+        is held at a time.
+
+        Keyword Arguments:
+            end {int} -- last grid time, epoch nanoseconds, sampling
+                         runs to the end of the data if None
+                         (default: {None})
+            path {str} -- directory to write ts.npy and depth.npy
+                          to (default: {None})
+            size {int} -- grid times per block (default: {65536})
+
+        Returns:
+            tuple<ndarray, ndarray> -- int64 grid times and
+                float64[n, levels, 4] depth, memory mapped read-only
+                from the written files when a path is given
+        """
+        if path is None:
+            blocks = list(self.chunks(size, end))
+            if not blocks:
+                return (np.empty(0, dtype=np.int64),
+                        np.empty((0, self.levels, 4)))
+            return (np.concatenate([times for times, _ in blocks]),
+                    np.concatenate([depth for _, depth in blocks]))
+
+        os.makedirs(path, exist_ok=True)
+        ts_path = os.path.join(path, "ts.npy")
+        depth_path = os.path.join(path, "depth.npy")
+        count = 0
+        with open(ts_path + ".part", "wb") as ts_file, \
+                open(depth_path + ".part", "wb") as depth_file:
+            for times, depth in self.chunks(size, end):
+                times.tofile(ts_file)
+                depth.tofile(depth_file)
+                count += len(times)
+
+        _finish_npy(ts_path, np.dtype(np.int64), (count,))
+        _finish_npy(depth_path, np.dtype(np.float64),
+                    (count, self.levels, 4))
+        return (np.load(ts_path, mmap_mode="r"),
+                np.load(depth_path, mmap_mode="r"))
+
+
+def _finish_npy(path, dtype, shape):
+    """Turns the raw data streamed to path.part into a .npy file
+
+    Arguments:
+        path {str} -- .npy file to write
+        dtype {dtype} -- type of the raw values
+        shape {tuple} -- shape of the whole array
+    """
+    header = {"descr": np_format.dtype_to_descr(dtype),
+              "fortran_order": False, "shape": shape}
+    with open(path, "wb") as out, open(path + ".part", "rb") as raw:
+        np_format.write_array_header_1_0(out, header)
+        shutil.copyfileobj(raw, out)
+    os.remove(path + ".part")
@@ -1,8 +1,8 @@
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from datetime import datetime
 from envs import simulator
+from ob.timeutils import from_ns
 
 if __name__ == '__main__':
     options = {
@@ -18,4 +18,4 @@ if __name__ == '__main__':
     sim = simulator.Simulator(options)
     while not sim.is_finished():
         ob = sim.next()
-    print(sim.orderbook.last_datetime, sim.orderbook.state())
\ No newline at end of file
+    print(from_ns(sim.orderbook.last_datetime), sim.orderbook.state())
\ No newline at end of file
@@ -0,0 +1,112 @@
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from ob.features import FeatureEngine
+from ob.trades import TradeLog
+from .simulator import Simulator, date_range
+
+
+def day_outputs(out_dir, symbol, date):
+    """Paths of the features and trades written for a day
+
+    Returns:
+        tuple<str, str> -- feature array and trade spill file
+    """
+    base = os.path.join(out_dir, "{}_{}".format(symbol, date))
+    return base + "_features.npy", base + "_trades.bin"
+
+
+def replay_day(options, date, out_dir, time_length=1.0, levels=5):
+    """Replays a single day and writes its outputs
+
+    The day's book is rebuilt from its own Initial events, so
+    days are independent and can run in separate processes.
+    After every bucket of time_length seconds the feature vector
+    is recorded with the time of the last event applied. Every
+    execution is spilled to a trade file. Checkpoints are written
+    to out_dir when the options ask for them.
+
+    Arguments:
+        options {dict} -- Simulator options, dates are replaced
+        date {int} -- day to replay, YYYYMMDD
+        out_dir {str} -- directory of the outputs
+
+    Keyword Arguments:
+        time_length {float} -- seconds per bucket (default: {1.0})
+        levels {int} -- depth imbalance levels (default: {5})
+
+    Returns:
+        tuple<str, str> -- paths of the day's outputs
+    """
+    options = dict(options, dates=[date], prefetch=False)
+    if options.get("checkpoint_interval"):
+        options.setdefault("checkpoint_dir", out_dir)
+
+    features_path, trades_path = day_outputs(
+        out_dir, options["symbol"], date)
+    if os.path.exists(trades_path):
+        os.remove(trades_path)
+
+    sim = Simulator(options)
+    engine = FeatureEngine(sim.orderbook, levels=levels)
+    trades = TradeLog(spill_path=trades_path)
+    sim.orderbook.subscribe(trades)
+
+    stamps = []
+    rows = []
+    while True:
+        if sim.next(time_length) is None:
+            break
+        stamps.append(sim.last_ts)
+        rows.append(engine.values.copy())
+        engine.reset_flow()
+    trades.close()
+
+    dtype = np.dtype([("ts", "i8")] + [(name, "f8") for name in engine.names])
+    features = np.zeros(len(rows), dtype=dtype)
+    features["ts"] = stamps
+    for inx, name in enumerate(engine.names):
+        features[name] = [row[inx] for row in rows]
+    np.save(features_path, features)
+    return features_path, trades_path
+
+
+def replay_range(options, out_dir, workers=None, time_length=1.0, levels=5):
+    """Replays a date range with one day per worker process
+
+    Days are sharded across a process pool, each written by
+    replay_day, and merged in date order once all are done.
+
+    Arguments:
+        options {dict} -- Simulator options, replays every day from
+                          the first to the last of options["dates"]
+        out_dir {str} -- directory of the outputs
+
+    Keyword Arguments:
+        workers {int} -- worker processes, defaults to the number
+                         of cpus (default: {None})
+        time_length {float} -- seconds per bucket (default: {1.0})
+        levels {int} -- depth imbalance levels (default: {5})
+
+    Returns:
+        tuple<str, str> -- paths of the merged features and trades,
+                           read back with np.load and read_spill
+    """
+    dates = date_range(options["dates"][0], options["dates"][-1])
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(replay_day, options, date, out_dir,
+                                   time_length, levels)
+                   for date in dates]
+        outputs = [future.result() for future in futures]
+
+    features_path, trades_path = day_outputs(
+        out_dir, options["symbol"], "{}_{}".format(dates[0], dates[-1]))
+    np.save(features_path,
+            np.concatenate([np.load(path) for path, _ in outputs]))
+
+    with open(trades_path, "wb") as merged:
+        for _, path in outputs:
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, merged)
+    return features_path, trades_path
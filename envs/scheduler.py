@@ -0,0 +1,265 @@
+import heapq
+from collections import namedtuple
+import numpy as np
+from ob.listener import BookListener
+from ob.queue_tracker import QueueTracker
+from ob.timeutils import to_ns
+
+# a timed response to an agent order: ack, fill, cancel or reject
+Report = namedtuple("Report", ["ts", "kind", "order_id", "price", "volume"])
+
+
+class ConstantLatency(object):
+    """
+    The same delay for every message
+    """
+
+    def __init__(self, ns):
+        super(ConstantLatency, self).__init__()
+        self.ns = int(ns)
+
+    def sample(self, kind):
+        return self.ns
+
+
+class EmpiricalLatency(object):
+    """
+    Delays drawn from observed samples
+    """
+
+    def __init__(self, samples, seed=None):
+        """
+        Arguments:
+            samples {array} -- observed delays in nanoseconds
+
+        Keyword Arguments:
+            seed {int} -- seed of the draws (default: {None})
+        """
+        super(EmpiricalLatency, self).__init__()
+        self.samples = np.asarray(samples, dtype=np.int64)
+        if len(self.samples) == 0:
+            raise ValueError("No latency samples")
+        self.rng = np.random.RandomState(seed)
+
+    def sample(self, kind):
+        return int(self.samples[self.rng.randint(len(self.samples))])
+
+
+class TypeLatency(object):
+    """
+    A latency model per message kind (limit, market,
+    cancel), falling back to a default one
+    """
+
+    def __init__(self, models, default=None):
+        super(TypeLatency, self).__init__()
+        self.models = dict(models)
+        self.default = ConstantLatency(0) if default is None else default
+
+    def sample(self, kind):
+        return self.models.get(kind, self.default).sample(kind)
+
+
+class Scheduler(BookListener):
+    """
+    A discrete-event scheduler that merges historical
+    events with delayed agent orders on one clock
+    """
+
+    def __init__(self, sim, latency=None, response_latency=None,
+                 fill_model=None):
+        """Initializes a scheduler over a simulator
+
+        Agent orders reach the book after a latency drawn from the
+        latency model and are kept in a heap keyed by arrival time.
+        Historical events are replayed up to each arrival, so at
+        equal times the historical event goes first. Acks, fills
+        and cancels of agent orders are sent back as Reports after
+        the response latency.
+
+        With no agent order in flight or resting, run_until hands
+        the whole interval to Simulator.next_until and the book has
+        no listener attached, so there is no per-event overhead.
+        Resting limit orders are tracked by a QueueTracker, which
+        answers queue_ahead and fill_probability for them.
+
+        Arguments:
+            sim {Simulator} -- simulator to drive
+
+        Keyword Arguments:
+            latency {object} -- model of order to exchange delays,
+                                sample(kind) returns nanoseconds,
+                                zero if None (default: {None})
+            response_latency {object} -- model of exchange to agent
+                                         delays, zero if None
+                                         (default: {None})
+            fill_model {callable} -- fill probability model of the
+                                     queue tracker (default: {None})
+        """
+        super(Scheduler, self).__init__()
+        self.sim = sim
+        self.latency = ConstantLatency(0) if latency is None else latency
+        self.response_latency = ConstantLatency(0) \
+            if response_latency is None else response_latency
+
+        self.now = sim.last_ts
+        self._actions = []  # (arrival, seq, action) heap
+        self._reports = []  # (delivery, seq, Report) heap
+        self._seq = 0
+        self._count = 0
+        self.resting = {}  # agent order id -> side
+        self._executing = set()  # agent orders that can take liquidity
+        self.fill_model = fill_model
+        self.queues = QueueTracker(sim.orderbook, fill_model)
+        self._subscribed = None
+
+    def submit(self, kind, side=None, price=0, volume=0, order_id=None):
+        """Sends an agent order towards the exchange
+
+        Arguments:
+            kind {str} -- limit, market or cancel
+
+        Keyword Arguments:
+            side {str} -- BID or ASK (default: {None})
+            price {float} -- limit price (default: {0})
+            volume {float} -- order volume (default: {0})
+            order_id {str} -- order to cancel (default: {None})
+
+        Returns:
+            str -- id of the order, or of the order to cancel
+        """
+        if kind not in ("limit", "market", "cancel"):
+            raise ValueError("Invalid order kind {}".format(kind))
+        if order_id is None:
+            order_id = "agent-{}".format(self._count)
+            self._count += 1
+
+        arrival = self.now + self.latency.sample(kind)
+        self._push(self._actions, arrival,
+                   (kind, side, price, volume, order_id))
+        return order_id
+
+    def run_until(self, end):
+        """Advances the clock, executing arrivals on the way
+
+        Arguments:
+            end {int} -- time to advance to, epoch nanoseconds
+
+        Returns:
+            array -- Reports delivered at or before end, in time order
+        """
+        actions = self._actions
+        while actions and actions[0][0] <= end:
+            arrival, _, action = heapq.heappop(actions)
+            self.sim.next_until(arrival)
+            self.now = arrival
+            self._execute(arrival, action)
+
+        self.sim.next_until(end)
+        self.now = end
+        self._attach()
+
+        delivered = []
+        reports = self._reports
+        while reports and reports[0][0] <= end:
+            delivered.append(heapq.heappop(reports)[2])
+        return delivered
+
+    def pending(self):
+        return len(self._actions) + len(self._reports)
+
+    def queue_ahead(self, order_id):
+        """Volume queued in front of a resting agent order
+
+        Arguments:
+            order_id {str} -- id of a resting limit order
+
+        Returns:
+            float -- volume that executes before the order does
+        """
+        return self.queues.queue_ahead(order_id)
+
+    def fill_probability(self, order_id, horizon, rate=None):
+        """Probability that a resting agent order fills within a horizon
+
+        Arguments:
+            order_id {str} -- id of a resting limit order
+            horizon {float} -- seconds ahead
+
+        Keyword Arguments:
+            rate {float} -- volume expected to execute per second at
+                            the order's level, measured over its side
+                            if None (default: {None})
+
+        Returns:
+            float -- probability given by the fill model
+        """
+        return self.queues.fill_probability(order_id, horizon, rate)
+
+    def _push(self, heap, ts, item):
+        heapq.heappush(heap, (ts, self._seq, item))
+        self._seq += 1
+
+    def _report(self, ts, kind, order_id, price, volume):
+        delivery = ts + self.response_latency.sample(kind)
+        self._push(self._reports, delivery,
+                   Report(delivery, kind, order_id, price, volume))
+
+    def _execute(self, ts, action):
+        kind, side, price, volume, order_id = action
+        book = self.sim.orderbook
+        self._attach(True)
+
+        if kind == "cancel":
+            side = self.resting.pop(order_id, None)
+            if side is None:
+                # filled or cancelled before the cancel arrived
+                self._report(ts, "reject", order_id, price, volume)
+                return
+            tree = book._bid_limits if side == "BID" else book._ask_limits
+            order = tree.get_order(order_id)
+            tree.remove_order_by_id(order_id)
+            self._report(ts, "cancel", order_id, order.price, order.volume)
+        elif kind == "limit":
+            self._report(ts, "ack", order_id, price, volume)
+            self._executing.add(order_id)
+            try:
+                book.limit(side, price, volume, ts, order_id=order_id)
+            finally:
+                self._executing.discard(order_id)
+            tree = book._bid_limits if side == "BID" else book._ask_limits
+            if order_id in tree.order_map:
+                self.resting[order_id] = side
+                if self.queues.book is not book:
+                    self.queues = QueueTracker(book, self.fill_model)
+                self.queues.track(order_id, side)
+        else:
+            self._report(ts, "ack", order_id, price, volume)
+            self._executing.add(order_id)
+            try:
+                book.market(side, volume, ts, order_id)
+            finally:
+                self._executing.discard(order_id)
+        book.refresh()
+
+    def _attach(self, force=False):
+        # listen to the book only while agent orders can fill
+        book = self.sim.orderbook
+        listening = force or bool(self.resting)
+        if self._subscribed is not None and \
+                (not listening or self._subscribed is not book):
+            if self in self._subscribed.listeners:
+                self._subscribed.unsubscribe(self)
+            self._subscribed = None
+        if listening and self._subscribed is None:
+            book.subscribe(self)
+            self._subscribed = book
+
+    def on_trade(self, timestamp, side, maker, volume, taker_id):
+        ts = to_ns(timestamp)
+        if maker.id in self.resting:
+            self._report(ts, "fill", maker.id, maker.price, volume)
+            if maker.volume == 0:
+                del self.resting[maker.id]
+        if taker_id in self._executing:
+            self._report(ts, "fill", taker_id, maker.price, volume)
@@ -1,10 +1,32 @@
+import bisect
+import os
 import pprint
-import copy
-from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+import numpy as np
+from ob import checkpoint
 from ob.orderbook import OrderBook
 from ob.processor import DataProcessor, OrderEntry
+from ob.timeutils import parse_ns, to_ns, NS_PER_SEC
 pp = pprint.PrettyPrinter(indent=4)
 
+# day file suffixes after .csv, in order of preference
+DATA_EXTENSIONS = ("", ".gz", ".bz2", ".xz")
+
+
+def next_date(date):
+    """Calendar day after a YYYYMMDD date, across month ends"""
+    day = datetime.strptime(str(date), "%Y%m%d") + timedelta(days=1)
+    return int(day.strftime("%Y%m%d"))
+
+
+def date_range(first, final):
+    """Every YYYYMMDD date from first to final, inclusive"""
+    dates = [first]
+    while dates[-1] < final:
+        dates.append(next_date(dates[-1]))
+    return dates
+
 
 class Simulator(object):
     """
@@ -29,24 +51,217 @@ class Simulator(object):
 
         self.symbol = options["symbol"]
         self.delta = options["delta"]
+        self.tick_size = options.get("tick_size")
+        self.validate = options.get("validate", True)
+        self.check_interval = options.get("check_interval")
+        self.event_count = 0
         self.data_format = options["data_format"]
         self.exchange = options["exchange"]
+        self.cache = options.get("cache", False)
+
+        # prepare the next day on a background thread, parsing
+        # this many of its events ahead of the replay
+        self.prefetch = options.get("prefetch", True)
+        self.lookahead = options.get("lookahead", 10000)
+        self.executor = None
         self.date_range = options["dates"]
 
+        # book checkpoints every so many seconds of market time
+        self.checkpoint_interval = options.get("checkpoint_interval")
+        self.checkpoint_dir = options.get("checkpoint_dir")
+        self.checkpoints = self.find_checkpoints()
+        self._checkpointed = None  # (date, time) of the latest one
+
+        # replay position: time of the last applied event and
+        # how many applied events share that time
+        self.last_ts = 0
+        self.last_count = 0
+
         self.first_date = self.date_range[0]
         self.curr_date = self.date_range[0]
-        self.final_date = self.date_range[1]
+        self.final_date = self.date_range[-1]
         self.last_time = 0
         self.finished = False
 
         # initialize data processors and books for each day
-        self.data_path = lambda date: "{}/{}_order_book_{}.csv".format(
-            options["data_dir"], options["symbol"], date)
+        self.data_dir = options["data_dir"]
         self.set_data_processors()
+        # time of the replay once the initial snapshot is applied
+        self.first_ts = self.last_ts
+
+    def data_path(self, date):
+        """Path of a day file, preferring plain over compressed csv
+
+        Arguments:
+            date {int} -- date of the file, YYYYMMDD
+
+        Returns:
+            str -- first existing of .csv, .csv.gz, .csv.bz2 and
+                   .csv.xz, or the plain .csv path if none exist
+        """
+        path = "{}/{}_order_book_{}.csv".format(
+            self.data_dir, self.symbol, date)
+        for ext in DATA_EXTENSIONS:
+            if os.path.exists(path + ext):
+                return path + ext
+        return path
 
     def is_finished(self):
         return self.finished
 
+    def find_checkpoints(self):
+        """Lists the checkpoints of this symbol in the checkpoint dir
+
+        Returns:
+            array -- (time, date, path) tuples sorted by time
+        """
+        if not self.checkpoint_dir or not os.path.isdir(self.checkpoint_dir):
+            return []
+
+        found = []
+        prefix = self.symbol + "_"
+        for name in os.listdir(self.checkpoint_dir):
+            if not name.startswith(prefix) or not name.endswith(".npz"):
+                continue
+            date, ts = name[len(prefix):-4].split("_")
+            found.append((int(ts), int(date),
+                          os.path.join(self.checkpoint_dir, name)))
+        return sorted(found)
+
+    def advance(self, events):
+        """Moves the replay position past applied events
+
+        Arguments:
+            events {array} -- OrderEntry events just applied
+        """
+        last = events[-1].timestamp
+        count = 0
+        for order in reversed(events):
+            if order.timestamp != last:
+                break
+            count += 1
+        else:
+            if last == self.last_ts:
+                count += self.last_count
+        self.last_ts = last
+        self.last_count = count
+
+    def save_checkpoint(self):
+        """Checkpoints the book at the current replay position
+
+        Returns:
+            str -- path of the checkpoint written
+        """
+        path = os.path.join(self.checkpoint_dir, "{}_{}_{}.npz".format(
+            self.symbol, self.day, self.last_ts))
+        checkpoint.save(self.orderbook, path,
+                        ts=self.last_ts,
+                        count=self.last_count,
+                        events=self.event_count)
+        bisect.insort(self.checkpoints, (self.last_ts, self.day, path))
+        self._checkpointed = (self.day, self.last_ts)
+        return path
+
+    def latest_checkpoint(self):
+        """Time of the latest checkpoint of the current day
+        at or before the replay position
+
+        Checkpoints of other days are ignored, so replaying days
+        out of order into one checkpoint dir still checkpoints
+        every day.
+
+        Returns:
+            int -- time in epoch nanoseconds, 0 without one
+        """
+        cached = self._checkpointed
+        if cached is None or cached[0] != self.day or \
+                cached[1] > self.last_ts:
+            latest = 0
+            for ts, day, _ in self.checkpoints:
+                if ts > self.last_ts:
+                    break
+                if day == self.day:
+                    latest = ts
+            cached = self._checkpointed = (self.day, latest)
+        return cached[1]
+
+    def maybe_checkpoint(self):
+        if not self.checkpoint_interval or not self.checkpoint_dir:
+            return
+        latest = self.latest_checkpoint()
+        if self.last_ts - latest >= self.checkpoint_interval * NS_PER_SEC:
+            self.save_checkpoint()
+
+    def reset(self, at):
+        """Rebuilds the book as of a point in market time
+
+        Loads the latest checkpoint at or before the given time
+        and replays only the events after it. Without one, the
+        first day is replayed from its initial snapshot. Listeners
+        subscribed to the book stay subscribed.
+
+        Arguments:
+            at {int} -- time in epoch nanoseconds, every event at or
+                        before it is applied
+
+        Returns:
+            OrderBook -- the rebuilt book
+        """
+        listeners = list(self.orderbook.listeners)
+        self.finished = False
+        self._checkpointed = None
+
+        candidates = [c for c in self.checkpoints if c[0] <= at]
+        if candidates:
+            _, day, path = candidates[-1]
+            position = checkpoint.restore(self.orderbook, path)
+            self.last_ts = position["ts"]
+            self.last_count = position["count"]
+            self.event_count = position["events"]
+
+            self.curr_date = day
+            self.current_processor = DataProcessor(
+                file_str=self.data_path(day),
+                exchange=self.exchange,
+                data_format=self.data_format,
+                cache=self.cache)
+            try:
+                self.current_processor.seek(self.last_ts, self.last_count)
+            except StopIteration:
+                # checkpointed after the last event of the day
+                pass
+            self.next_processor = None if day == self.final_date \
+                else self.prefetch_processor(next_date(day))
+            self.day = day
+            self.curr_date = next_date(day)
+        else:
+            self.last_ts = self.last_count = self.event_count = 0
+            self.curr_date = self.first_date
+            self.set_data_processors()
+            for listener in listeners:
+                self.orderbook.subscribe(listener)
+
+        # replay the delta between checkpoint and target time
+        while True:
+            try:
+                order = self.current_processor.next()[0]
+            except StopIteration:
+                if self.next_processor is None:
+                    self.finished = True
+                    break
+                self.set_data_processors()
+                continue
+
+            if order.timestamp > at:
+                self.current_processor.leftover_order = order
+                break
+            self.orderbook.process(order)
+            self.event_count += 1
+            self.advance([order])
+
+        self.orderbook.refresh()
+        return self.orderbook
+
     def set_data_processors(self):
 
         # if we are on first date, initialize processor and orderbook
@@ -54,24 +269,43 @@ class Simulator(object):
             self.current_processor = DataProcessor(
                 file_str=self.data_path(self.curr_date),
                 exchange=self.exchange,
-                data_format=self.data_format)
+                data_format=self.data_format,
+                cache=self.cache)
 
-            self.next_processor = self.fast_forward_processor()
+            self.next_processor = None \
+                if self.curr_date == self.final_date \
+                else self.prefetch_processor(next_date(self.curr_date))
             self.orderbook = self.setup_orderbook()
         elif self.final_date == self.curr_date:
-            self.current_processor = self.next_processor
+            self.current_processor = self.take_next_processor()
             self.next_processor = None
         else:
-            self.current_processor = self.next_processor
-            self.next_processor = self.fast_forward_processor()
+            self.current_processor = self.take_next_processor()
+            self.next_processor = self.prefetch_processor(
+                next_date(self.curr_date))
+
+        self.day = self.curr_date
+        self.curr_date = next_date(self.curr_date)
 
-        self.curr_date += 1
+    def fast_forward_processor(self, date=None, lookahead=0):
+        """Opens a day file positioned past its Initial snapshot
 
-    def fast_forward_processor(self):
+        Arguments:
+            date {int} -- date of the file, YYYYMMDD, defaults to
+                          the day after the current one
+                          (default: {None})
+            lookahead {int} -- events to parse ahead once positioned
+                               (default: {0})
+
+        Returns:
+            DataProcessor -- processor of the day
+        """
         processor = DataProcessor(
             data_format=self.data_format,
-            file_str=self.data_path(self.curr_date + 1),
-            exchange=self.exchange)
+            file_str=self.data_path(
+                next_date(self.curr_date) if date is None else date),
+            exchange=self.exchange,
+            cache=self.cache)
 
         order = processor.next()[0]
         while order.event_type == "Initial":
@@ -79,20 +313,58 @@ class Simulator(object):
             order = processor.next()[0]
 
         processor.leftover_order = order
+        if lookahead:
+            processor.read_ahead(lookahead)
+        return processor
+
+    def prefetch_processor(self, date):
+        """Starts preparing the processor of a day
+
+        With prefetching enabled the day file is opened, fast
+        forwarded and read ahead on a background thread, so the
+        replay does not stall at midnight
+
+        Arguments:
+            date {int} -- date of the file, YYYYMMDD
+
+        Returns:
+            Future|DataProcessor -- the pending or ready processor
+        """
+        if not self.prefetch:
+            return self.fast_forward_processor(date)
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        return self.executor.submit(
+            self.fast_forward_processor, date, self.lookahead)
+
+    def take_next_processor(self):
+        processor = self.next_processor
+        if isinstance(processor, Future):
+            # waits only if the day is not ready yet
+            processor = processor.result()
         return processor
 
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
     def setup_orderbook(self):
         self.orderbook = OrderBook(
             symbol=self.symbol,
-            delta=self.delta)
+            delta=self.delta,
+            tick_size=self.tick_size,
+            validate=self.validate)
 
         order = self.current_processor.next()[0]
 
         self.process_order(order)
+        self.advance([order])
         while order.event_type == "Initial":
             # pull next order
             order = self.current_processor.next()[0]
             self.process_order(order)
+            self.advance([order])
 
         return self.orderbook
 
@@ -108,15 +380,18 @@ class Simulator(object):
             return self.next(time_length)
 
         if self.data_format == "raw":
-            for inx, order in enumerate(data):
-                self.process_order(order)
+            # apply the whole bucket, refreshing the touch once
+            self.orderbook.apply_batch(data)
+            self.count_events(len(data))
+            self.advance(data)
+            self.maybe_checkpoint()
 
         elif self.data_format == "snapshot":
             self.orderbook.clear()
 
             ask_prices, ask_volumes, bid_prices, bid_volumes, timestamp = data
-            ts = self.curr_datetime.strptime("{}".format(
-                timestamp), "%Y-%m-%d %H:%M:%S")
+            ts = to_ns(datetime.strptime("{}".format(
+                timestamp), "%Y-%m-%d %H:%M:%S"))
 
             for inx, bid in enumerate(bid_prices):
                 self.orderbook.limit(
@@ -130,71 +405,121 @@ class Simulator(object):
 
         return self.orderbook
 
+    def next_batch(self, time_length=None):
+        """Applies the next event or bucket from columnar records
+
+        Like next, but the bucket is read with
+        DataProcessor.next_batch and applied with
+        OrderBook.apply_events, so no event objects are built
+
+        Keyword Arguments:
+            time_length {float} -- bucket length in seconds
+                                   (default: {None})
+
+        Returns:
+            ndarray -- the EVENT_DTYPE records applied, None once
+                       every day has been replayed
+        """
+        try:
+            records = self.current_processor.next_batch(time_length)
+        except StopIteration:
+            if self.next_processor is None:
+                self.finished = True
+                return
+
+            self.set_data_processors()
+            return self.next_batch(time_length)
+
+        self.apply_records(records)
+        return records
+
+    def next_until(self, end):
+        """Applies every event up to an absolute time
+
+        Day files are switched as they run out, so the book is
+        brought up to the end time even across midnight
+
+        Arguments:
+            end {int} -- last time included, epoch nanoseconds
+
+        Returns:
+            int -- number of events applied, 0 when the book did
+                   not change
+        """
+        applied = 0
+        while not self.finished:
+            try:
+                records = self.current_processor.next_until(end)
+            except StopIteration:
+                if self.next_processor is None:
+                    self.finished = True
+                    break
+                self.set_data_processors()
+                continue
+
+            if len(records) == 0:
+                break
+            # a day may run out before the end time
+            self.apply_records(records)
+            applied += len(records)
+        return applied
+
+    def peek_time(self):
+        """Time of the next event to replay, across day files
+
+        Returns:
+            int -- epoch nanoseconds, None once every day has been
+                   replayed, which finishes the simulator
+        """
+        while True:
+            ts = self.current_processor.peek_time()
+            if ts is not None:
+                return ts
+            if self.next_processor is None:
+                self.finished = True
+                return None
+            self.set_data_processors()
+
+    def apply_records(self, records):
+        self.orderbook.apply_events(records,
+                                    self.current_processor.categories)
+        self.count_events(len(records))
+
+        stamps = records["ts"]
+        last = int(stamps[-1])
+        count = len(stamps) - int(np.searchsorted(stamps, last))
+        if count == len(stamps) and last == self.last_ts:
+            count += self.last_count
+        self.last_ts = last
+        self.last_count = count
+        self.maybe_checkpoint()
+
+    def count_events(self, count):
+        # periodic debug check in place of per-assignment validation
+        count += self.event_count
+        if self.check_interval and \
+                count // self.check_interval > \
+                self.event_count // self.check_interval:
+            self.orderbook.check_consistency()
+        self.event_count = count
+
     def value(self, side, volume):
-        cloned_book = copy.deepcopy(self.orderbook)
-        filled_orders = cloned_book.market(side, volume, self.curr_time)
-        return sum(list(map(
-            lambda order: order.filled_volume * order.price, filled_orders)))
+        return self.orderbook.simulate_market(side, volume).cost
 
     def process_order(self, order):
-        if order.date and order.time and order.millis:
-            ts = datetime.strptime("{},{},{}".format(
-                order.date, order.time, order.millis),
-                "%Y-%m-%d,%H:%M:%S,%f")
+        if order.timestamp is not None:
+            ts = order.timestamp
+        elif order.date and order.time and order.millis:
+            ts = parse_ns(order.date, order.time, order.millis)
         else:
-            ts = self.time
-
-        # pp.pprint({
-        #     "event_id": order.event_id,
-        #     "date": order.date,
-        #     "time": order.time,
-        #     "millis": order.millis,
-        #     "order_id": order.order_id,
-        #     "exec_opt": order.exec_opt,
-        #     "event_type": order.event_type,
-        #     "symbol": order.symbol,
-        #     "order_type": order.order_type,
-        #     "side": order.side,
-        #     "timestamp": ts,
-        # })
-
-        side = "BID" if order.side == "buy" else "ASK"
-        if order.event_type == "Place" or order.event_type:
-            if order.exec_opt == "immediate-or-cancel":
-                self.orderbook.immediate_or_cancel(
-                    side=side,
-                    price=order.price,
-                    volume=order.volume,
-                    timestamp=ts,
-                    order_id=order.order_id)
-            elif order.exec_opt == "maker-or-cancel":
-                self.orderbook.maker_or_cancel(
-                    side=side,
-                    price=order.price,
-                    volume=order.volume,
-                    timestamp=ts,
-                    order_id=order.order_id)
-            else:
-                if order.order_type == "limit":
-                    self.orderbook.limit(
-                        side=side,
-                        price=order.price,
-                        volume=order.volume,
-                        timestamp=ts,
-                        order_id=order.order_id)
-                elif order.order_type == "market":
-                    self.orderbook.market(
-                        side=side,
-                        volume=order.volume,
-                        timestamp=ts,
-                        order_id=order.order_id)
-        elif order.event_type == "Cancel":
-            self.orderbook.cancel(
-                side=side,
-                order_id=order.order_id)
-
-        elif order.event_type == "FILL":
-            pass
+            ts = self.orderbook.last_datetime
+
+        self.orderbook.process(order, ts)
+
+        # periodic debug check in place of per-assignment validation
+        self.event_count += 1
+        if self.check_interval and self.event_count % self.check_interval == 0:
+            self.orderbook.check_consistency()
 
     def place(self, order_type, side, price, volume):
         order = OrderEntry({
@@ -1,8 +1,8 @@
-import csv
 import numpy as np
 import gym
-from gym import error, spaces, utils
-from gym.utils import seeding
+from gym import spaces
+from ob.timeutils import NS_PER_MS
+from .simulator import Simulator
 
 
 class TradingEnv(gym.Env):
@@ -14,93 +14,150 @@ class TradingEnv(gym.Env):
         "WAIT": 2
     }
 
-    def __init__(self, filename, episode_length, trading_fee=0, time_fee=0):
+    def __init__(self, options, episode_length, order_size=1.0, levels=5,
+                 trading_fee=0, time_fee=0, start_times=None):
         """
         TradingEnv manages orderbook state, action
         execution, and reward calculation
 
-        security_pairs <Tuple<String,String>> consisting of pair
-        identifier and accompanying data file for training and testing
+        Every step executes the action as a market order of
+        order_size against the simulated book, then moves the env
+        clock ahead by grid_step_length milliseconds and replays
+        the historical events up to it, so steps stay on a fixed
+        grid through quiet periods and gaps in the data. The
+        observation is the top `levels` depth of the book followed
+        by the position and its mark-to-market value. The reward
+        is the change in that value net of fees.
+
+        The observation array is preallocated and overwritten in
+        place by every step and reset; copy it to keep it.
+
+        Arguments:
+            options {dict} -- Simulator options
+            episode_length {int} -- steps before an episode is
+                                    truncated
+
+        Keyword Arguments:
+            order_size {float} -- volume of every BUY/SELL (default: {1.0})
+            levels {int} -- depth levels per side observed (default: {5})
+            trading_fee {float} -- fee per unit of traded notional
+                                   (default: {0})
+            time_fee {float} -- cost charged every step (default: {0})
+            start_times {array} -- epoch nanosecond times episodes
+                                   start at, sampled on reset;
+                                   episodes continue from where the
+                                   last one ended when None
+                                   (default: {None})
         """
-
-        # Filename for historical data
-        self.ob_filename = filename
-
-        # Actions spaces
-        self._action_space = spaces.Tuple(spaces.Discrete(3),
-                                          spaces.Box(low=0,
-                                                     high=10,
-                                                     shape=(1,)))
-        self._observation_space = spaces.Box(-float(9999999999),
-                                             float(9999999999),
-                                             shape=(1,))
-
-        self._first_render = True
-        self._time = 0
-        self._position = 0
+        super(TradingEnv, self).__init__()
+        self.sim = Simulator(options)
+        self.step_length = int(round(self.sim.grid_step_length * NS_PER_MS))
+        if self.step_length <= 0:
+            raise ValueError("Invalid step length {}".format(
+                self.sim.grid_step_length))
+        self.clock = self.sim.last_ts  # epoch nanoseconds
+
+        self.action_space = spaces.Discrete(3)
+        self.observation_space = spaces.Box(-np.inf, np.inf,
+                                            shape=(levels * 4 + 2,),
+                                            dtype=np.float64)
+
+        self.levels = levels
+        self.order_size = order_size
+        self.start_times = start_times
         self._episode_length = episode_length
         self._trading_fee = trading_fee
         self._time_fee = time_fee
 
-        self._reset()
-
-    def _step(self, action):
-        assert self.action_space.contains(action)
-        reward = -1
-        position_action = action['position']
-        horizon_length = action['time']
-
-        # Ensure we aren't mid-action (i.e FREEZE POLICY)
-        if self.time_horizon == 0:
-
-            self.stepper = 0
-
-            if action['position'] == 0:  # BUY
-                self.time_horizon = horizon_length
-                continue
-            elif action['position'] == 1:  # SELL
-                self.time_horizon = horizon_length
-                continue
-            elif action['position'] == 2:  # WAIT
-                self.time_horizon = 0
-                continue
-
-            self.state = self.orderbook.process_order()
-
-            # Game over logic
-        try:
-            self._prices_history.append(self._data_generator.next())
-        except StopIteration:
-            done = True
-            info['status'] = 'No more data.'
-        if self._iteration >= self._episode_length:
-            done = True
-            info['status'] = 'Time out.'
-        if self._closed_plot:
-            info['status'] = 'Closed plot'
-
-        return self.state, reward, done, {}
-
-    def _reset(self):
-        self.position_action = None
-        self.time_horizon = 10
-        self.OrderBookIterator(self.ob_filename)
-        return self._get_obs()
-
-    def _get_obs(self):
-        if self.position_action is None:
-            return self.np_random.choice()
+        # the depth block is a view into the observation
+        self._obs = np.zeros(self.observation_space.shape)
+        self._depth = self._obs[:levels * 4].reshape(levels, 4)
+
+        self._iteration = 0
+        self._position = 0.0
+        self._cash = 0.0
+        self._value = 0.0
+
+    def step(self, action):
+        book = self.sim.orderbook
+        cash = self._cash
+
+        if action == 0 or action == 1:
+            side = "BID" if action == 0 else "ASK"
+            impact = book.cost_to_fill(side, self.order_size)
+            if impact.filled > 0:
+                # the full size sweeps exactly what was priced, a
+                # summed fill volume could leave float dust behind
+                book.market(side, self.order_size, book.last_datetime)
+                fee = impact.cost * self._trading_fee
+                if action == 0:
+                    self._position += impact.filled
+                    cash -= impact.cost + fee
+                else:
+                    self._position -= impact.filled
+                    cash += impact.cost - fee
+        self._cash = cash - self._time_fee
+
+        self.clock += self.step_length
+        self.sim.next_until(self.clock)
+        self.sim.peek_time()  # finishes the simulator past the last event
+        self._iteration += 1
+
+        value = self._observe()
+        reward = value - self._value
+        self._value = value
+
+        terminated = self.sim.is_finished()
+        truncated = self._iteration >= self._episode_length
+        return self._obs, reward, terminated, truncated, {}
+
+    def reset(self, seed=None, options=None):
+        """Starts an episode with a flat position
+
+        Keyword Arguments:
+            seed {int} -- seeds the start time sampling
+                          (default: {None})
+            options {dict} -- "at" restarts the replay at a time in
+                              epoch nanoseconds (default: {None})
+
+        Returns:
+            tuple<ndarray, dict> -- first observation and info
+        """
+        super(TradingEnv, self).reset(seed=seed)
+        at = None if options is None else options.get("at")
+        if at is None and self.start_times is not None:
+            at = self.start_times[self.np_random.integers(
+                len(self.start_times))]
+        if at is not None or self.sim.is_finished():
+            self.sim.reset(self.sim.first_ts if at is None else at)
+            self.clock = self.sim.last_ts
+
+        self._iteration = 0
+        self._position = 0.0
+        self._cash = 0.0
+        self._value = self._observe()
+        return self._obs, {}
+
+    def _observe(self):
+        """Writes the observation and returns the position value"""
+        book = self.sim.orderbook
+        book.depth(self.levels, out=self._depth)
+
+        bid, ask = book.bid, book.ask
+        if bid > 0 and ask != book.error_ask:
+            mid = (bid + ask) / 2.0
         else:
-            return self.position_action
+            mid = bid if bid > 0 else 0.0
+        value = self._cash + self._position * mid
 
-    def _render(self, mode='human', close=False):
-        return
+        obs = self._obs
+        obs[-2] = self._position
+        obs[-1] = value
+        return value
 
-    def _seed(self, seed=None):
-        self.np_random, seed = seeding.np_random(seed)
-        return [seed]
+    def render(self, mode='human'):
+        print("t = {}, position = {}, value = {}".format(
+            self.sim.last_ts, self._position, self._value))
 
-# if __name__ == '__main__':
-#     filename = "./data/GDAX.ETHUSD.2017-12-22.csv"
-#     t = TradingEnv(filename)
-#     print(t.orderbook.bid)
+    def close(self):
+        self.sim.close()
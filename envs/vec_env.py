@@ -0,0 +1,174 @@
+import multiprocessing as mp
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+
+def _attach(spec):
+    """Maps a shared memory block created by SubprocVecEnv
+
+    Arguments:
+        spec {tuple} -- block name, array shape and dtype
+
+    Returns:
+        tuple<SharedMemory, ndarray> -- the block and an array on it
+    """
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _worker(conn, env_fn, index):
+    env = env_fn()
+    conn.send((env.observation_space, env.action_space))
+
+    blocks, arrays = zip(*[_attach(spec) for spec in conn.recv()])
+    observations, rewards, dones, actions = arrays
+    try:
+        while True:
+            cmd = conn.recv()
+            if cmd == "step":
+                action = actions[index]
+                obs, reward, terminated, truncated, info = env.step(
+                    action.item() if action.ndim == 0 else action)
+                done = terminated or truncated
+                if done:
+                    # envs may reuse their observation buffer
+                    info = dict(info, terminal_observation=np.array(obs))
+                    obs, _ = env.reset()
+                observations[index] = obs
+                rewards[index] = reward
+                dones[index] = done
+                conn.send(info or None)
+            elif cmd == "reset":
+                obs, _ = env.reset()
+                observations[index] = obs
+                conn.send(None)
+            elif cmd == "close":
+                break
+    finally:
+        env.close()
+        del observations, rewards, dones, actions, arrays
+        for shm in blocks:
+            shm.close()
+        conn.close()
+
+
+class SubprocVecEnv(object):
+    """
+    Steps a number of environments in worker processes, with
+    observations, rewards, done flags and actions exchanged
+    through shared memory instead of pickled messages
+    """
+
+    def __init__(self, env_fns, context=None):
+        """Starts one worker process per environment
+
+        Every worker builds its environment, reports its spaces
+        and maps the shared arrays. A step then costs one short
+        command and one acknowledgement per worker; observations
+        are written in place. Environments follow the gym 0.26
+        API and are reset automatically when an episode ends, the
+        final observation being passed in the step's info.
+
+        Arguments:
+            env_fns {array} -- callables building the environments,
+                               picklable unless forked
+
+        Keyword Arguments:
+            context {str} -- multiprocessing start method, the
+                             platform default if None
+                             (default: {None})
+        """
+        super(SubprocVecEnv, self).__init__()
+        ctx = mp.get_context(context)
+        # workers must share the parent's tracker, or each would
+        # unlink the shared arrays when it exits
+        resource_tracker.ensure_running()
+        self.num_envs = len(env_fns)
+        self.closed = False
+
+        self.conns = []
+        self.processes = []
+        for index, env_fn in enumerate(env_fns):
+            parent, child = ctx.Pipe()
+            process = ctx.Process(target=_worker,
+                                  args=(child, env_fn, index))
+            process.daemon = True
+            process.start()
+            child.close()
+            self.conns.append(parent)
+            self.processes.append(process)
+
+        spaces = [conn.recv() for conn in self.conns]
+        self.observation_space, self.action_space = spaces[0]
+
+        n = self.num_envs
+        layout = [
+            ((n,) + self.observation_space.shape, self.observation_space.dtype),
+            ((n,), np.float64),
+            ((n,), np.bool_),
+            ((n,) + self.action_space.shape, self.action_space.dtype),
+        ]
+        self.blocks = []
+        specs = []
+        arrays = []
+        for shape, dtype in layout:
+            dtype = np.dtype(dtype)
+            size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            self.blocks.append(shm)
+            specs.append((shm.name, shape, dtype))
+            arrays.append(np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+        self.observations, self.rewards, self.dones, self.actions = arrays
+
+        for conn in self.conns:
+            conn.send(specs)
+
+    def reset(self):
+        """Resets every environment
+
+        Returns:
+            ndarray -- the shared observation array, overwritten
+                       by the next call
+        """
+        for conn in self.conns:
+            conn.send("reset")
+        for conn in self.conns:
+            conn.recv()
+        return self.observations
+
+    def step(self, actions):
+        """Steps every environment with its action
+
+        Arguments:
+            actions {array} -- one action per environment
+
+        Returns:
+            tuple<ndarray, ndarray, ndarray, array> -- observations,
+                rewards, done flags and infos; the arrays are the
+                shared buffers, overwritten by the next call
+        """
+        self.actions[:] = actions
+        for conn in self.conns:
+            conn.send("step")
+        infos = [conn.recv() or {} for conn in self.conns]
+        return self.observations, self.rewards, self.dones, infos
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for conn in self.conns:
+            conn.send("close")
+        for process in self.processes:
+            process.join()
+        for conn in self.conns:
+            conn.close()
+
+        del self.observations, self.rewards, self.dones, self.actions
+        for shm in self.blocks:
+            shm.close()
+            shm.unlink()
+
+    def __len__(self):
+        return self.num_envs
@@ -0,0 +1,433 @@
+import csv
+import json
+import os
+import numpy as np
+from .reader import COMPRESSED, ChunkedCSVReader, split_columns
+from .timeutils import parse_ns, NS_PER_MS, NS_PER_SEC
+
+# one exchange event per record, categorical fields hold codes
+# into the per-file category lists stored next to the array
+EVENT_DTYPE = np.dtype([
+    ("event_id", "i8"),
+    ("ts", "i8"),
+    ("order_id", "i8"),
+    ("exec_opt", "i1"),
+    ("event_type", "i1"),
+    ("order_type", "i1"),
+    ("side", "i1"),
+    ("price", "f8"),
+    ("volume", "f8"),
+    ("avg_price", "f8"),
+])
+
+CATEGORICAL = ("exec_opt", "event_type", "order_type", "side")
+
+# codes of well known values are fixed, unseen values are appended
+DEFAULT_CATEGORIES = {
+    "exec_opt": ["", "immediate-or-cancel", "maker-or-cancel"],
+    "event_type": ["", "Initial", "Place", "Cancel", "Fill"],
+    "order_type": ["", "limit", "market"],
+    "side": ["", "buy", "sell"],
+}
+
+
+class EventEncoder(object):
+    """
+    Encodes raw Gemini rows into EVENT_DTYPE tuples,
+    growing the category lists as new values are seen
+    """
+
+    def __init__(self, categories=None):
+        super(EventEncoder, self).__init__()
+        if categories is None:
+            categories = DEFAULT_CATEGORIES
+        self.categories = dict((k, list(v)) for k, v in categories.items())
+        self.codes = dict((k, dict((name, inx) for inx, name in enumerate(v)))
+                          for k, v in self.categories.items())
+
+    def code(self, field, value):
+        try:
+            return self.codes[field][value]
+        except KeyError:
+            self.codes[field][value] = len(self.categories[field])
+            self.categories[field].append(value)
+            return self.codes[field][value]
+
+    def row(self, data, ts):
+        """Encodes a csv row of an event
+
+        Arguments:
+            data {array} -- string fields of the row
+            ts {int} -- event time in epoch nanoseconds
+
+        Returns:
+            tuple -- fields in EVENT_DTYPE order
+
+        Raises:
+            ValueError -- an id does not round-trip through an integer
+        """
+        code = self.code
+        return (_id(data[0]), ts, _id(data[4]),
+                code("exec_opt", data[5]), code("event_type", data[6]),
+                code("order_type", data[8]), code("side", data[9]),
+                _float(data[10]), _float(data[11]), _float(data[15]))
+
+    def entry(self, order):
+        """Encodes a parsed OrderEntry
+
+        Arguments:
+            order {OrderEntry} -- event with an integer timestamp
+
+        Returns:
+            tuple -- fields in EVENT_DTYPE order
+
+        Raises:
+            ValueError -- an id does not round-trip through an integer
+        """
+        code = self.code
+        return (_id(order.event_id), order.timestamp, _id(order.order_id),
+                code("exec_opt", order.exec_opt or ""),
+                code("event_type", order.event_type or ""),
+                code("order_type", order.order_type or ""),
+                code("side", order.side or ""),
+                order.price, order.volume, order.avg_price)
+
+
+    def lines(self, lines, width):
+        """Encodes the csv lines of a buffer column by column
+
+        The lines are split into columns with split_columns and
+        every column is converted by numpy in one call. Rows with
+        neither price nor volume are skipped, as when parsing row
+        by row. Quoted or ragged buffers fall back to csv.reader
+        and row.
+
+        Arguments:
+            lines {array} -- raw Gemini csv lines, without the header
+            width {int} -- fields per line
+
+        Returns:
+            tuple<ndarray, ndarray> -- EVENT_DTYPE records, and the
+                                       position of each record's line
+
+        Raises:
+            ValueError -- an id does not round-trip through an integer
+        """
+        if not lines:
+            return (np.zeros(0, dtype=EVENT_DTYPE),
+                    np.zeros(0, dtype=np.int64))
+        columns = split_columns(lines, width)
+        if columns is None:
+            rows = list(csv.reader(lines))
+            kept = [inx for inx, data in enumerate(rows)
+                    if len(data[10]) or len(data[11])]
+            records = np.array(
+                [self.row(rows[inx], parse_ns(*rows[inx][1:4]))
+                 for inx in kept], dtype=EVENT_DTYPE)
+            return records, np.array(kept, dtype=np.int64)
+
+        price, volume = columns[10], columns[11]
+        if "" not in price or "" not in volume:
+            kept = None
+        else:
+            kept = [inx for inx, (p, v) in enumerate(zip(price, volume))
+                    if p or v]
+            columns = [[column[inx] for inx in kept] for column in columns]
+
+        records = np.empty(len(columns[0]), dtype=EVENT_DTYPE)
+        records["event_id"] = _ids(columns[0])
+        records["ts"] = _stamps(columns[1], columns[2], columns[3])
+        records["order_id"] = _ids(columns[4])
+        for field, inx in (("exec_opt", 5), ("event_type", 6),
+                           ("order_type", 8), ("side", 9)):
+            records[field] = self.column_codes(field, columns[inx])
+        records["price"] = _floats(columns[10])
+        records["volume"] = _floats(columns[11])
+        records["avg_price"] = _floats(columns[15])
+
+        kept = np.arange(len(lines)) if kept is None \
+            else np.array(kept, dtype=np.int64)
+        return records, kept
+
+    def column_codes(self, field, values):
+        """Codes of a column of categorical values
+
+        Arguments:
+            field {str} -- one of CATEGORICAL
+            values {array} -- string values
+
+        Returns:
+            ndarray -- int8 codes
+        """
+        codes = self.codes[field]
+        try:
+            return np.fromiter(map(codes.__getitem__, values), np.int8,
+                               len(values))
+        except KeyError:
+            # add new values in order of appearance, as row would
+            for value in values:
+                self.code(field, value)
+            return np.fromiter(map(codes.__getitem__, values), np.int8,
+                               len(values))
+
+
+def base_path(csv_path):
+    """Path of a day file without its .csv and compression suffixes
+
+    Sidecar files are named after it, so compressed day files
+    share them with the plain file
+
+    Arguments:
+        csv_path {str} -- path of the raw csv day file
+
+    Returns:
+        str -- the stripped path
+    """
+    base = csv_path
+    for ext in COMPRESSED:
+        if base.endswith(ext):
+            base = base[:-len(ext)]
+    return base[:-4] if base.endswith(".csv") else base
+
+
+def cache_paths(csv_path):
+    """Locations of the binary cache of a day file
+
+    Arguments:
+        csv_path {str} -- path of the raw csv day file
+
+    Returns:
+        tuple<str, str> -- paths of the event array and its metadata
+    """
+    base = base_path(csv_path)
+    return base + ".npy", base + ".json"
+
+
+def source_stamp(csv_path):
+    """Identifies the version of a day file a derived file was built from
+
+    Arguments:
+        csv_path {str} -- path of the raw csv day file
+
+    Returns:
+        dict -- file name, size and modification time in
+                nanoseconds, None if the file does not exist
+    """
+    try:
+        stat = os.stat(csv_path)
+    except OSError:
+        return None
+    return {"name": os.path.basename(csv_path), "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns}
+
+
+def is_fresh(stamp, csv_path):
+    """Whether a derived file still matches its day file
+
+    A file whose day file is gone is kept, as there is nothing
+    left to rebuild it from.
+
+    Arguments:
+        stamp {dict} -- source_stamp recorded at build time
+        csv_path {str} -- path of the raw csv day file
+
+    Returns:
+        bool -- True unless the day file was replaced or changed
+    """
+    current = source_stamp(csv_path)
+    return current is None or stamp == current
+
+
+def is_cached(csv_path):
+    """Whether an up to date cache of a day file exists
+
+    The cache records the name, size and modification time of
+    the file it was converted from, so it is stale once the day
+    file is re-downloaded or edited, or when a compressed copy
+    maps to the same cache paths.
+
+    Arguments:
+        csv_path {str} -- path of the raw csv day file
+
+    Returns:
+        bool -- True if load can be used without converting
+    """
+    array_path, meta_path = cache_paths(csv_path)
+    if not (os.path.exists(array_path) and os.path.exists(meta_path)):
+        return False
+    with open(meta_path) as meta:
+        return is_fresh(json.load(meta).get("source"), csv_path)
+
+
+def convert(csv_path, chunk_size=1 << 20):
+    """Converts a raw Gemini csv day file into a columnar cache
+
+    Every event is parsed once and written into a structured
+    array of EVENT_DTYPE records, with string fields replaced by
+    categorical codes. The category lists, the symbol and the
+    source_stamp of the day file are written next to it as json.
+
+    Arguments:
+        csv_path {str} -- path of the raw csv day file
+
+    Keyword Arguments:
+        chunk_size {int} -- characters read and encoded at a time
+                            (default: {1 << 20})
+
+    Returns:
+        tuple<str, str> -- paths of the event array and its metadata
+    """
+    encoder = EventEncoder()
+    symbol = None
+    chunks = [np.zeros(0, dtype=EVENT_DTYPE)]
+
+    reader = ChunkedCSVReader(csv_path, chunk_size=chunk_size)
+    try:
+        lines = reader.next_lines()
+        width = len(next(csv.reader(lines[:1])))  # header
+        lines = lines[1:]
+        while True:
+            records, kept = encoder.lines(lines, width)
+            if len(kept):
+                symbol = next(csv.reader([lines[kept[-1]]]))[7]
+            chunks.append(records)
+            lines = reader.next_lines()
+    except StopIteration:
+        pass
+    finally:
+        reader.close()
+    events = np.concatenate(chunks)
+
+    array_path, meta_path = cache_paths(csv_path)
+    np.save(array_path, events)
+    with open(meta_path, "w") as meta:
+        json.dump({"symbol": symbol, "categories": encoder.categories,
+                   "source": source_stamp(csv_path)}, meta)
+
+    return array_path, meta_path
+
+
+def load(csv_path):
+    """Memory maps the columnar cache of a day file
+
+    Arguments:
+        csv_path {str} -- path of the raw csv day file
+
+    Returns:
+        tuple<ndarray, dict> -- read-only EVENT_DTYPE records and
+                                the metadata (symbol, categories,
+                                source)
+    """
+    array_path, meta_path = cache_paths(csv_path)
+    with open(meta_path) as meta:
+        metadata = json.load(meta)
+    return np.load(array_path, mmap_mode="r"), metadata
+
+
+def _id(value):
+    """Encodes an event or order id into the int64 columns
+
+    Ids are read back with str, so only ids that come back as
+    the same string are accepted. Encoding "abc" or "007" would
+    let the structured path disagree with the csv path on ids.
+
+    Arguments:
+        value {str} -- id as parsed from the csv
+
+    Returns:
+        int -- the id as an integer
+
+    Raises:
+        ValueError -- the id does not round-trip through an integer
+    """
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        number = None
+    if number is None or str(number) != str(value):
+        raise ValueError("Id {!r} cannot be stored as an integer".format(
+            value))
+    return number
+
+
+def _ids(values):
+    """Encodes a column of ids, see _id
+
+    Arguments:
+        values {array} -- ids as parsed from the csv
+
+    Returns:
+        ndarray -- int64 ids
+
+    Raises:
+        ValueError -- an id does not round-trip through an integer
+    """
+    text = ",".join(values)
+    try:
+        ids = np.fromstring(text, dtype=np.int64, sep=",")
+    except ValueError:
+        ids = None
+    if ids is None or len(ids) != len(values) or \
+            ",".join(map(str, ids.tolist())) != text:
+        # raises for the first id that does not round-trip
+        ids = np.array([_id(value) for value in values], dtype=np.int64)
+    return ids
+
+
+def _stamps(dates, times, millis):
+    """Decodes columns of date, time and millis fields, see parse_ns
+
+    Returns:
+        ndarray -- int64 nanoseconds since the epoch
+    """
+    count = len(times)
+    midnights = dict((date, parse_ns(date, "00:00:00", "0"))
+                     for date in set(dates))
+    stamps = np.fromiter(map(midnights.__getitem__, dates), np.int64, count)
+    stamps += np.array(list(map(int, millis)), dtype=np.int64) * NS_PER_MS
+
+    # HH:MM:SS fields as a matrix of digits
+    digits = None
+    if count and set(map(len, times)) == {8}:
+        try:
+            raw = "".join(times).encode("ascii")
+        except UnicodeEncodeError:
+            raw = None
+        if raw is not None:
+            digits = np.frombuffer(raw, dtype=np.uint8).reshape(count, 8) \
+                [:, [0, 1, 3, 4, 6, 7]].astype(np.int64) - ord("0")
+            if ((digits < 0) | (digits > 9)).any():
+                digits = None
+    if digits is None:
+        return stamps + np.array([parse_ns("1970-01-01", time, 0)
+                                  for time in times], dtype=np.int64)
+
+    seconds = (digits[:, 0] * 10 + digits[:, 1]) * 3600 + \
+        (digits[:, 2] * 10 + digits[:, 3]) * 60 + \
+        digits[:, 4] * 10 + digits[:, 5]
+    return stamps + seconds * NS_PER_SEC
+
+
+def _floats(values):
+    """Decodes a column of numbers, see _float
+
+    Returns:
+        ndarray -- float64 values, 0 for empty or invalid fields
+    """
+    if not any(values):
+        return np.zeros(len(values))
+    try:
+        if "" in values:
+            numbers = [float(value) if value else 0 for value in values]
+        else:
+            numbers = list(map(float, values))
+    except ValueError:
+        numbers = [_float(value) for value in values]
+    return np.array(numbers, dtype=np.float64)
+
+
+def _float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return 0
@@ -0,0 +1,148 @@
+import numpy as np
+
+
+class DepthRing(object):
+    """
+    A ring of preallocated depth snapshots for
+    building multi-step observations
+    """
+
+    def __init__(self, levels, capacity):
+        """Initializes an empty ring of depth snapshots
+
+        Every slot is a float64[levels, 4] view into one
+        contiguous buffer, so recording a step writes into
+        existing memory instead of allocating new arrays.
+
+        Arguments:
+            levels {int} -- book levels per side in each snapshot
+            capacity {int} -- number of snapshots kept in the ring
+        """
+        super(DepthRing, self).__init__()
+        if capacity <= 0:
+            raise ValueError("Invalid capacity {}".format(capacity))
+
+        self.levels = levels
+        self.capacity = capacity
+        self.buffer = np.zeros((capacity, levels, 4))
+        self.count = 0
+        self.index = 0
+        self._slots = [self.buffer[i] for i in range(capacity)]
+
+    def record(self, book):
+        """Writes the current depth of a book into the next slot
+
+        Arguments:
+            book {OrderBookInterface} -- book to snapshot
+
+        Returns:
+            ndarray -- the slot that was written
+        """
+        slot = self._slots[self.index]
+        book.depth(self.levels, out=slot)
+        self.index = (self.index + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        return slot
+
+    def latest(self):
+        return self._slots[(self.index - 1) % self.capacity]
+
+    def window(self, out=None):
+        """Copies the ring into a buffer in chronological order
+
+        The oldest snapshot comes first. While the ring is not
+        yet full, the missing leading snapshots are zeros.
+
+        Keyword Arguments:
+            out {ndarray} -- float64[capacity, levels, 4] buffer,
+                             a new one is allocated when omitted
+                             (default: {None})
+
+        Returns:
+            ndarray -- the chronological snapshots
+        """
+        if out is None:
+            out = np.empty_like(self.buffer)
+
+        head = self.capacity - self.index
+        out[:head] = self.buffer[self.index:]
+        out[head:] = self.buffer[:self.index]
+        return out
+
+    def clear(self):
+        self.buffer.fill(0)
+        self.count = 0
+        self.index = 0
+
+    def __len__(self):
+        return self.count
+
+
+class DepthPrefix(object):
+    """
+    Cumulative depth of one side of the book, walked
+    lazily from the touch and cached until the side
+    is next mutated
+    """
+
+    def __init__(self, tree, reverse):
+        """Initializes an empty prefix over an order tree
+
+        Arguments:
+            tree {Tree} -- side of the book to accumulate
+            reverse {bool} -- walk from the highest price (bids)
+        """
+        super(DepthPrefix, self).__init__()
+        self.tree = tree
+        self.reverse = reverse
+        self.version = None
+        self.prices = []
+        self.keys = []  # prices in walk order, negated for bids
+        self.cum_vol = []
+        self.cum_notional = []
+        self._items = None
+        self._exhausted = False
+
+    def sync(self):
+        if self.version == self.tree.version:
+            return
+
+        self.version = self.tree.version
+        del self.prices[:], self.keys[:]
+        del self.cum_vol[:], self.cum_notional[:]
+        self._exhausted = len(self.tree.price_tree) == 0
+        self._items = None if self._exhausted else \
+            self.tree.price_tree.iter_items(reverse=self.reverse)
+
+    def extend(self, volume, limit_key=None):
+        """Walks further levels until a volume is covered
+
+        Arguments:
+            volume {float} -- cumulative volume to cover
+
+        Keyword Arguments:
+            limit_key {float} -- stop after the first level whose key
+                                 is beyond this one (default: {None})
+        """
+        vol = self.cum_vol[-1] if self.cum_vol else 0
+        notional = self.cum_notional[-1] if self.cum_notional else 0
+        sign = -1 if self.reverse else 1
+
+        while vol < volume and not self._exhausted:
+            if self.keys and limit_key is not None and \
+                    self.keys[-1] > limit_key:
+                return
+
+            try:
+                price, level = next(self._items)
+            except StopIteration:
+                self._exhausted = True
+                return
+
+            vol += level._total_vol
+            notional += level._total_vol * price
+            self.prices.append(price)
+            self.keys.append(sign * price)
+            self.cum_vol.append(vol)
+            self.cum_notional.append(notional)
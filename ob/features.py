@@ -0,0 +1,181 @@
+import math
+import numpy as np
+from .listener import BookListener
+
+
+class FeatureEngine(BookListener):
+    """
+    Microstructure features of an OrderBook, updated
+    incrementally from the book's mutation events
+    """
+
+    def __init__(self, book, levels=5, horizons=(10, 100)):
+        """Initializes features from a book and subscribes to it
+
+        Touch features, order flow imbalance, trade and cancel
+        flow and mid returns are updated in O(1) per event. The
+        multi-level depth imbalance is kept over the best `levels`
+        levels of each side and costs O(1) for volume changes
+        inside that band; only when a level enters or leaves the
+        band are its `levels` levels walked again.
+
+        Arguments:
+            book {OrderBook} -- book to attach to
+
+        Keyword Arguments:
+            levels {int} -- levels per side in the depth imbalance
+                            (default: {5})
+            horizons {tuple} -- touch updates over which mid log
+                                returns are computed
+                                (default: {(10, 100)})
+        """
+        super(FeatureEngine, self).__init__()
+        self.book = book
+        self.levels = levels
+        self.horizons = tuple(horizons)
+
+        self.names = ["bid", "ask", "bid_vol", "ask_vol", "spread", "mid",
+                      "microprice", "imbalance", "depth_imbalance", "ofi",
+                      "trade_flow", "cancel_flow"]
+        self.names += ["ret_{}".format(h) for h in self.horizons]
+        self.values = np.zeros(len(self.names))
+        self.index = dict((name, inx) for inx, name in enumerate(self.names))
+
+        # ring of past mids for the return horizons
+        self._mids = [0.0] * (max(self.horizons) + 1 if self.horizons else 1)
+        self._mid_count = 0
+
+        # per side: price -> volume of the best levels, their total
+        # and the price of the worst level when the band is full
+        self._bands = {"BID": {}, "ASK": {}}
+        self._depth = {"BID": 0.0, "ASK": 0.0}
+        self._edges = {"BID": None, "ASK": None}
+        self._touch = (None, 0.0, None, 0.0)
+
+        self._rebuild_band("BID")
+        self._rebuild_band("ASK")
+        self._sync_touch()
+        self.reset_flow()
+        book.subscribe(self)
+
+    def __getitem__(self, name):
+        return self.values[self.index[name]]
+
+    def reset_flow(self):
+        """Zeroes the flow features accumulated since the last call"""
+        values = self.values
+        values[self.index["ofi"]] = 0
+        values[self.index["trade_flow"]] = 0
+        values[self.index["cancel_flow"]] = 0
+
+    def on_level(self, side, price, volume):
+        band = self._bands[side]
+        edge = self._edges[side]
+
+        if edge is None or \
+                (price >= edge if side == "BID" else price <= edge):
+            if volume > 0 and price in band:
+                self._depth[side] += volume - band[price]
+                band[price] = volume
+                self._update_depth()
+            else:
+                # a level entered or left the band
+                self._rebuild_band(side)
+
+        self._sync_touch()
+
+    def on_trade(self, timestamp, side, maker, volume, taker_id):
+        inx = self.index["trade_flow"]
+        self.values[inx] += volume if side == "BID" else -volume
+
+    def on_cancel(self, side, order):
+        best = self._touch[0] if side == "BID" else self._touch[2]
+        if order.price_level.price == best:
+            self.values[self.index["cancel_flow"]] += order.volume
+
+    def _rebuild_band(self, side):
+        if side == "BID":
+            tree, reverse = self.book._bid_limits, True
+        else:
+            tree, reverse = self.book._ask_limits, False
+
+        band = {}
+        depth = 0.0
+        edge = None
+        if len(tree.price_tree) > 0 and self.levels > 0:
+            for price, level in tree.price_tree.iter_items(reverse=reverse):
+                band[price] = level._total_vol
+                depth += level._total_vol
+                if len(band) == self.levels:
+                    edge = price
+                    break
+
+        self._bands[side] = band
+        self._depth[side] = depth
+        self._edges[side] = edge
+        self._update_depth()
+
+    def _update_depth(self):
+        bid_depth, ask_depth = self._depth["BID"], self._depth["ASK"]
+        total = bid_depth + ask_depth
+        self.values[self.index["depth_imbalance"]] = \
+            (bid_depth - ask_depth) / total if total > 0 else 0
+
+    def _sync_touch(self):
+        bid_tree = self.book._bid_limits
+        ask_tree = self.book._ask_limits
+        bid, ask = bid_tree.max_price, ask_tree.min_price
+        bid_vol = 0.0 if bid is None else bid_tree.get_price(bid)._total_vol
+        ask_vol = 0.0 if ask is None else ask_tree.get_price(ask)._total_vol
+
+        touch = (bid, bid_vol, ask, ask_vol)
+        if touch == self._touch:
+            return
+
+        prev_bid, prev_bid_vol, prev_ask, prev_ask_vol = self._touch
+        self._touch = touch
+        values = self.values
+        index = self.index
+
+        # order flow imbalance of the touch change (Cont et al.)
+        ofi = 0.0
+        if bid is not None and prev_bid is not None:
+            if bid >= prev_bid:
+                ofi += bid_vol
+            if bid <= prev_bid:
+                ofi -= prev_bid_vol
+        if ask is not None and prev_ask is not None:
+            if ask <= prev_ask:
+                ofi -= ask_vol
+            if ask >= prev_ask:
+                ofi += prev_ask_vol
+        values[index["ofi"]] += ofi
+
+        values[index["bid"]] = 0 if bid is None else bid
+        values[index["ask"]] = 0 if ask is None else ask
+        values[index["bid_vol"]] = bid_vol
+        values[index["ask_vol"]] = ask_vol
+
+        size = bid_vol + ask_vol
+        values[index["imbalance"]] = \
+            (bid_vol - ask_vol) / size if size > 0 else 0
+
+        if bid is None or ask is None:
+            values[index["spread"]] = 0
+            values[index["mid"]] = 0
+            values[index["microprice"]] = 0
+            return
+
+        mid = (bid + ask) / 2.0
+        values[index["spread"]] = ask - bid
+        values[index["mid"]] = mid
+        values[index["microprice"]] = \
+            (bid * ask_vol + ask * bid_vol) / size if size > 0 else mid
+
+        mids = self._mids
+        mids[self._mid_count % len(mids)] = mid
+        self._mid_count += 1
+        for horizon in self.horizons:
+            if self._mid_count > horizon:
+                past = mids[(self._mid_count - 1 - horizon) % len(mids)]
+                values[index["ret_{}".format(horizon)]] = math.log(mid / past)
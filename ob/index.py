@@ -0,0 +1,100 @@
+import os
+import numpy as np
+from .cache import base_path, source_stamp, is_fresh
+from .reader import open_binary
+from .timeutils import parse_ns
+
+# a sparse entry: time, byte offset and number of a data row
+INDEX_DTYPE = np.dtype([
+    ("ts", "i8"),
+    ("offset", "i8"),
+    ("row", "i8"),
+])
+
+
+def index_path(csv_path):
+    return base_path(csv_path) + ".idx.npz"
+
+
+def build_index(csv_path, every=10000):
+    """Builds the sparse timestamp index of a day file
+
+    Records the time, byte offset and row number of every
+    `every`-th data row and saves them next to the day file.
+    Offsets of compressed files are positions in the inflated
+    stream. The source_stamp of the day file is saved with the
+    entries, so a changed file gets a new index.
+
+    Arguments:
+        csv_path {str} -- path of the raw csv day file
+
+    Keyword Arguments:
+        every {int} -- data rows between index entries
+                       (default: {10000})
+
+    Returns:
+        ndarray -- array of INDEX_DTYPE entries
+    """
+    entries = []
+    with open_binary(csv_path) as f:
+        offset = len(f.readline())  # header
+        row = 0
+        for line in f:
+            if row % every == 0:
+                fields = line.split(b",", 4)
+                entries.append((parse_ns(fields[1].decode(),
+                                         fields[2].decode(),
+                                         fields[3].decode()),
+                                offset, row))
+            offset += len(line)
+            row += 1
+
+    index = np.array(entries, dtype=INDEX_DTYPE)
+    stamp = source_stamp(csv_path)
+    with open(index_path(csv_path), "wb") as f:
+        np.savez(f, entries=index, name=stamp["name"], size=stamp["size"],
+                 mtime_ns=stamp["mtime_ns"])
+    return index
+
+
+def load_index(csv_path, every=10000):
+    """Loads the index of a day file, building it on first use
+
+    The index is built again when the day file has changed since.
+
+    Arguments:
+        csv_path {str} -- path of the raw csv day file
+
+    Keyword Arguments:
+        every {int} -- data rows between entries of a new index
+                       (default: {10000})
+
+    Returns:
+        ndarray -- array of INDEX_DTYPE entries
+    """
+    path = index_path(csv_path)
+    if os.path.exists(path):
+        with np.load(path) as saved:
+            stamp = {"name": str(saved["name"]), "size": int(saved["size"]),
+                     "mtime_ns": int(saved["mtime_ns"])}
+            if is_fresh(stamp, csv_path):
+                return saved["entries"]
+    return build_index(csv_path, every)
+
+
+def find(index, ts):
+    """Finds the index entry to start reading from for a time
+
+    Arguments:
+        index {ndarray} -- entries of a day file
+        ts {int} -- target time in epoch nanoseconds
+
+    Returns:
+        tuple<int, int> -- byte offset and row number of the last
+                           entry strictly before the target time,
+                           or None when the target precedes them all
+    """
+    inx = int(np.searchsorted(index["ts"], ts, side="left")) - 1
+    if inx < 0:
+        return None
+    return int(index["offset"][inx]), int(index["row"][inx])
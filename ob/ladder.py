@@ -0,0 +1,223 @@
+from bintrees import FastRBTree
+
+
+class TickLadder(object):
+    """
+    An array backed price ladder that stores price levels
+    at integer ticks, in a fixed window of slots around
+    the active prices and a tree for those outside of it
+    """
+
+    def __init__(self, tick_size, width=1024, patience=64):
+        """Initializes an empty tick ladder
+
+        The ladder maps prices onto integer ticks. Levels inside a
+        window of `width` slots live in a list, so lookups, inserts
+        and removals there are constant time, and an occupancy
+        bitmap of the window finds its lowest and highest level
+        without walking empty slots. Levels outside of the window,
+        such as far away stink orders, are kept in a red-black tree
+        keyed by tick.
+
+        The window never grows. It is re-centred on the tick being
+        accessed when the window is empty, or once accesses outside
+        of it outnumber those inside by `patience`, so it follows
+        the touch as the market moves.
+
+        Arguments:
+            tick_size {float} -- minimum price increment of the symbol
+
+        Keyword Arguments:
+            width {int} -- slots in the window (default: {1024})
+            patience {int} -- excess of accesses outside the window
+                              before it is re-centred (default: {64})
+        """
+        super(TickLadder, self).__init__()
+        if tick_size <= 0:
+            raise ValueError("Invalid tick size {}".format(tick_size))
+        if width <= 0:
+            raise ValueError("Invalid width {}".format(width))
+
+        self.tick_size = float(tick_size)
+        self.width = width
+        self.patience = patience
+        self._levels = [None] * width
+        self._base = 0  # tick of the first slot
+        self._bits = 0  # bit i is set when slot i holds a level
+        self._overflow = FastRBTree()  # tick -> level outside the window
+        self._count = 0
+        self._misses = 0
+
+    def to_tick(self, price):
+        return int(round(price / self.tick_size))
+
+    def _recentre(self, tick):
+        """Moves the window so that it is centred on a tick
+
+        Levels leaving the window go to the overflow tree and
+        levels of the tree that fall into it are moved in
+
+        Arguments:
+            tick {int} -- tick to centre the window on
+        """
+        width = self.width
+        base = tick - width // 2
+        overflow = self._overflow
+
+        moved = [(self._base + idx, level)
+                 for idx, level in enumerate(self._levels)
+                 if level is not None]
+        moved += list(overflow.iter_items(base, base + width))
+
+        levels = [None] * width
+        bits = 0
+        for key, level in moved:
+            idx = key - base
+            if 0 <= idx < width:
+                if key in overflow:
+                    overflow.remove(key)
+                levels[idx] = level
+                bits |= 1 << idx
+            else:
+                overflow.insert(key, level)
+
+        self._levels = levels
+        self._base = base
+        self._bits = bits
+        self._misses = 0
+
+    def _miss(self, tick):
+        self._misses += 1
+        if self._misses > self.patience:
+            self._recentre(tick)
+
+    def insert(self, price, level):
+        tick = int(round(price / self.tick_size))
+        idx = tick - self._base
+        if not 0 <= idx < self.width and self._bits == 0:
+            self._recentre(tick)
+            idx = tick - self._base
+
+        if 0 <= idx < self.width:
+            if self._levels[idx] is None:
+                self._count += 1
+                self._bits |= 1 << idx
+            self._levels[idx] = level
+            if self._misses:
+                self._misses -= 1
+        else:
+            if tick not in self._overflow:
+                self._count += 1
+            self._overflow.insert(tick, level)
+            self._miss(tick)
+
+    def remove(self, price):
+        tick = int(round(price / self.tick_size))
+        idx = tick - self._base
+        if 0 <= idx < self.width:
+            if self._levels[idx] is None:
+                raise KeyError(price)
+            self._levels[idx] = None
+            self._bits &= ~(1 << idx)
+            self._count -= 1
+            if self._misses:
+                self._misses -= 1
+        else:
+            self._overflow.remove(tick)
+            self._count -= 1
+            self._miss(tick)
+
+        # the touch has moved past the window, follow it
+        if self._bits == 0 and len(self._overflow) > 0:
+            try:
+                nearest = self._overflow.floor_key(tick)
+            except KeyError:
+                nearest = self._overflow.ceiling_key(tick)
+            self._recentre(nearest)
+
+    def get(self, price, default=None):
+        tick = int(round(price / self.tick_size))
+        idx = tick - self._base
+        if 0 <= idx < self.width:
+            level = self._levels[idx]
+        else:
+            level = self._overflow.get(tick)
+        return default if level is None else level
+
+    def _low(self):
+        bits = self._bits
+        return (bits & -bits).bit_length() - 1
+
+    def min_key(self):
+        if self._count == 0:
+            raise ValueError("Empty ladder")
+        overflow = self._overflow
+        if self._bits == 0 or \
+                (len(overflow) > 0 and overflow.min_key() < self._base):
+            return overflow.min_item()[1].price
+        return self._levels[self._low()].price
+
+    def max_key(self):
+        if self._count == 0:
+            raise ValueError("Empty ladder")
+        overflow = self._overflow
+        if self._bits == 0 or (len(overflow) > 0 and
+                               overflow.max_key() >= self._base + self.width):
+            return overflow.max_item()[1].price
+        return self._levels[self._bits.bit_length() - 1].price
+
+    def iter_items(self, reverse=False):
+        if self._count == 0:
+            return
+
+        base = self._base
+        above = self._overflow.iter_items(base + self.width, None, reverse)
+        below = self._overflow.iter_items(None, base, reverse)
+        levels = self._levels
+        if self._bits:
+            lo, hi = self._low(), self._bits.bit_length() - 1
+        else:
+            lo, hi = 0, -1
+
+        if reverse:
+            for _, level in above:
+                yield level.price, level
+            for idx in range(hi, lo - 1, -1):
+                level = levels[idx]
+                if level is not None:
+                    yield level.price, level
+            for _, level in below:
+                yield level.price, level
+        else:
+            for _, level in below:
+                yield level.price, level
+            for idx in range(lo, hi + 1):
+                level = levels[idx]
+                if level is not None:
+                    yield level.price, level
+            for _, level in above:
+                yield level.price, level
+
+    def items(self, reverse=False):
+        return list(self.iter_items(reverse))
+
+    def keys(self, reverse=False):
+        return [price for price, _ in self.iter_items(reverse)]
+
+    def values(self, reverse=False):
+        return [level for _, level in self.iter_items(reverse)]
+
+    def __getitem__(self, price):
+        level = self.get(price)
+        if level is None:
+            raise KeyError(price)
+        return level
+
+    def __contains__(self, price):
+        return self.get(price) is not None
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return self._count
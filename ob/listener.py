@@ -0,0 +1,48 @@
+class BookListener(object):
+    """
+    Base class for objects subscribed to book mutations
+    through OrderBook.subscribe. Every hook is a no-op,
+    so subscribers only override the events they need.
+    """
+
+    def on_trade(self, timestamp, side, maker, volume, taker_id):
+        """Called for every execution against a resting order
+
+        Arguments:
+            timestamp {datetime} -- time of the aggressing order
+            side {str} -- aggressor side (BID/ASK)
+            maker {Order} -- resting order that was (partially) filled
+            volume {float} -- volume executed against the maker
+            taker_id {object} -- id of the aggressing order
+        """
+        pass
+
+    def on_level(self, side, price, volume):
+        """Called after the total volume of a price level changes
+
+        Arguments:
+            side {str} -- side of the level (BID/ASK)
+            price {float} -- price of the level
+            volume {float} -- new total volume, 0 once removed
+        """
+        pass
+
+    def on_cancel(self, side, order):
+        """Called before a resting order is cancelled
+
+        Arguments:
+            side {str} -- side of the order (BID/ASK)
+            order {Order} -- order about to leave the book
+        """
+        pass
+
+    def on_amend(self, side, order, price, volume):
+        """Called before a resting order changes price or volume
+
+        Arguments:
+            side {str} -- side of the order (BID/ASK)
+            order {Order} -- order about to change
+            price {float} -- new price of the order
+            volume {float} -- new volume of the order
+        """
+        pass
@@ -1,55 +1,80 @@
 from functools import total_ordering
 from datetime import datetime as dt
-import heapq
+from itertools import count
 
+# arrival sequence stamped on every queued order, so the relative
+# queue position of two orders at a level is a single comparison
+_sequence = count()
 
-class PriorityQueue(object):
 
-    def __init__(self, initial=None, key=lambda x: x):
-        self.key = key
-        if initial:
-            self._data = [(key(item), item) for item in initial]
-            heapq.heapify(self._data)
-        else:
-            self._data = []
+class OrderQueue(object):
+    """
+    An intrusive doubly linked FIFO queue. Every order
+    carries its own prev/next handles, so orders can be
+    unlinked from anywhere in the queue in O(1)
+    """
 
-    def push(self, item):
-        heapq.heappush(self._data, (self.key(item), item))
+    __slots__ = ("head", "tail", "_len")
+
+    def __init__(self):
+        self.head = None
+        self.tail = None
+        self._len = 0
+
+    def push(self, order):
+        order._seq = next(_sequence)
+        order._prev = self.tail
+        order._next = None
+        order._queue = self
+        if self.tail is None:
+            self.head = order
+        else:
+            self.tail._next = order
+        self.tail = order
+        self._len += 1
 
     def pop(self):
-        return heapq.heappop(self._data)[1]
+        order = self.head
+        if order is None:
+            raise IndexError("pop from empty queue")
+        self.remove(order)
+        return order
 
     def peek(self):
-        return self._data[0][1]
-
-    def remove(self, item):
-        try:
-            for i in range(len(self._data)):
-                if self.key(self._data[i][1]) == self.key(item):
-                    self._data[i] = self._data[0]
-                    self.pop()
-                    heapq.heapify(self._data)
-                    return
-        except Exception:
+        if self.head is None:
+            raise IndexError("peek at empty queue")
+        return self.head
+
+    def remove(self, order):
+        if order._queue is not self:
             return
 
-    def contains(self, item, secondary_key=lambda x: x):
-        try:
-            if self._data[0][0] <= self.key(item):
-                for i in range(len(self._data)):
-                    if (secondary_key(self._data[i][1]) == secondary_key(item)
-                            and self._data[i][0] == self.key(item)):
-                        return True
+        if order._prev is None:
+            self.head = order._next
+        else:
+            order._prev._next = order._next
+        if order._next is None:
+            self.tail = order._prev
+        else:
+            order._next._prev = order._prev
+
+        order._prev = order._next = order._queue = None
+        self._len -= 1
 
-            return False
-        except Exception:
-            return False
+    def contains(self, order):
+        return order._queue is self
 
     def get_items(self):
-        return list(map(lambda o: o[1].volume, self._data))
+        return [order.volume for order in self]
+
+    def __iter__(self):
+        order = self.head
+        while order is not None:
+            yield order
+            order = order._next
 
     def __len__(self):
-        return len(self._data)
+        return self._len
 
     def __str__(self):
         return "{}".format(self.get_items())
@@ -61,11 +86,13 @@ class PriceLevel(object):
     levels of an orderbook
     """
 
+    __slots__ = ("price", "_total_vol", "store")
+
     def __init__(self, price):
         super(PriceLevel, self).__init__()
         self.price = price
         self._total_vol = 0
-        self.store = PriorityQueue(key=lambda order: order.timestamp)
+        self.store = OrderQueue()
 
     def push(self, order):
         """
@@ -78,26 +105,33 @@ class PriceLevel(object):
         self.store.push(order)
         self.total_vol += order.volume
 
-    def get(self, volume):
+    def get(self, volume, quantities=None):
         """
         Gets a specified volume from this
         price level to symbolize execution
 
         Arguments:
             volume {float} -- volume to be executed/removed
+
+        Keyword Arguments:
+            quantities {list} -- when given, the volume executed
+                                 against each filled order is
+                                 appended to it (default: {None})
         """
         filled_orders = []
 
         # grab target volume at this price level
         while volume > 0 and not self.is_empty():
-            order = self.store.peek()
+            order = self.store.head
 
             if order.volume > volume:
+                qty = volume
                 self.total_vol -= volume
                 order.filled_volume += volume
                 order.volume -= volume
                 volume = 0
             else:
+                qty = order.volume
                 self.store.pop()
                 self.total_vol -= order.volume
                 order.filled_volume += order.volume
@@ -105,16 +139,35 @@ class PriceLevel(object):
                 order.volume = 0
 
             filled_orders.append(order)
+            if quantities is not None:
+                quantities.append(qty)
 
         # return excess volume and all (partially) filled orders
         return volume, filled_orders, round(self.total_vol, 6)
 
     def remove(self, order):
-        self.store.remove(order)
-        self.total_vol -= order.volume
+        if self.store.contains(order):
+            self.store.remove(order)
+            self.total_vol -= order.volume
+
+    def update(self, order, volume):
+        """
+        Changes the resting volume of an order at this
+        level. Reducing an order keeps its queue position,
+        increasing it sends the order to the back
+
+        Arguments:
+            order {Order} -- an order resting at this level
+            volume {float} -- new resting volume of the order
+        """
+        self.total_vol += volume - order.volume
+        if volume > order.volume:
+            self.store.remove(order)
+            self.store.push(order)
+        order.volume = volume
 
     def contains(self, order):
-        return self.store.contains(order, secondary_key=lambda x: x.id)
+        return self.store.contains(order)
 
     def is_empty(self):
         return len(self.store) == 0
@@ -137,6 +190,59 @@ class PriceLevel(object):
             self.price, self.total_vol)
 
 
+class UncheckedPriceLevel(PriceLevel):
+    """
+    A price level for trusted replays that writes
+    volumes straight to the underlying attributes,
+    skipping the validating property setters
+    """
+
+    __slots__ = ()
+
+    def push(self, order):
+        self.store.push(order)
+        self._total_vol += order._volume
+
+    def get(self, volume, quantities=None):
+        filled_orders = []
+        store = self.store
+
+        while volume > 0 and store.head is not None:
+            order = store.head
+
+            if order._volume > volume:
+                qty = volume
+                self._total_vol -= volume
+                order._filled_volume += volume
+                order._volume -= volume
+                volume = 0
+            else:
+                qty = order._volume
+                store.pop()
+                self._total_vol -= order._volume
+                order._filled_volume += order._volume
+                volume -= order._volume
+                order._volume = 0
+
+            filled_orders.append(order)
+            if quantities is not None:
+                quantities.append(qty)
+
+        return volume, filled_orders, self._total_vol
+
+    def remove(self, order):
+        if order._queue is self.store:
+            self.store.remove(order)
+            self._total_vol -= order._volume
+
+    def update(self, order, volume):
+        self._total_vol += volume - order._volume
+        if volume > order._volume:
+            self.store.remove(order)
+            self.store.push(order)
+        order._volume = volume
+
+
 @total_ordering
 class Order(object):
     """
@@ -144,6 +250,10 @@ class Order(object):
     timestamp for comparison behavior
     """
 
+    # slotted to keep books with many resting orders compact
+    __slots__ = ("_id", "_price", "_volume", "_filled_volume", "_timestamp",
+                 "_price_level", "_prev", "_next", "_queue", "_seq")
+
     def __init__(self, id_num, price, volume, timestamp, price_level=None):
         super(Order, self).__init__()
         self._id = id_num
@@ -151,16 +261,23 @@ class Order(object):
         self._volume = volume
         self._filled_volume = 0
         self._timestamp = timestamp
+        self._price_level = price_level
+
+        # intrusive queue handles, managed by OrderQueue
+        self._prev = None
+        self._next = None
+        self._queue = None
+        self._seq = -1
 
-        if price_level:
+        # an empty PriceLevel is falsy, so compare against None
+        if price_level is not None:
             price_level.push(self)
-            self._price_level = price_level
 
-    def update_volume(self, volume):
-        self.price_level.remove(self)
-        self.volume = volume
-        self.timestamp = dt.now()
-        self.price_level.push(self)
+    def update_volume(self, volume, timestamp=None):
+        # only a size increase loses time priority
+        if volume > self.volume:
+            self.timestamp = dt.now() if timestamp is None else timestamp
+        self.price_level.update(self, volume)
 
     @property
     def id(self):
@@ -176,7 +293,8 @@ class Order(object):
 
     @timestamp.setter
     def timestamp(self, val):
-        if not isinstance(val, dt):
+        # datetimes or integer epoch nanoseconds from replays
+        if not isinstance(val, (dt, int)):
             raise ValueError("Invalid timestamp")
         self._timestamp = val
 
@@ -1,7 +1,15 @@
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
 from datetime import datetime as dt
+from .depth import DepthPrefix
 from .orderbook_interface import OrderBookInterface
 
 
+# result of walking the book for a hypothetical order
+MarketImpact = namedtuple(
+    "MarketImpact", ["vwap", "worst_price", "filled", "unfilled", "cost"])
+
+
 class OrderBook(OrderBookInterface):
     """
     An orderbook class that inherits an OrderBookInterface.
@@ -12,7 +20,7 @@ class OrderBook(OrderBookInterface):
         OrderBookInterface
     """
 
-    def __init__(self, symbol, delta=0):
+    def __init__(self, symbol, delta=0, tick_size=None, validate=True):
         """Initializes a new OrderBook
 
         The OrderBook has functionality for reconstruction
@@ -24,12 +32,22 @@ class OrderBook(OrderBookInterface):
         Keyword Arguments:
             delta {number} -- for relative/absolute orderbook modes
                                 (NOT IMPLEMENTED)
+            tick_size {float} -- tick size of the symbol, enables the
+                                 array backed price ladder
+                                 (default: {None})
+            validate {bool} -- validate every assignment, pass False
+                               for trusted replays and run
+                               check_consistency periodically instead
+                               (default: {True})
         """
-        super(OrderBook, self).__init__()
+        super(OrderBook, self).__init__(tick_size, validate)
         self.order_count = 0
         self.symbol = symbol
         self.delta = delta
         self.last_datetime = None
+        # aggressing order of the fill in progress, for listeners
+        self._taker_id = None
+        self._taker_ts = None
 
     def market(self, side, volume, timestamp=dt.now(), order_id=None):
         """Submit market orders to orderbook mechanism
@@ -64,25 +82,93 @@ class OrderBook(OrderBookInterface):
         else:
             raise ValueError("Invalid orderbook side {}".format(side))
 
+        # executions are reported to listeners through on_fill
+        self._taker_id = order_id
+        self._taker_ts = timestamp
         volume, filled_orders = search_tree.fill(0, volume, purchase_type)
 
-        # log all filled orders
-        # for o in filled_orders:
-        #     print("ooo : MARKET | sym = {}, side = {}, add_ts = {}"
-        #           "trade_ts = {}, price = {}, filled = {}".format(
-        #               self.symbol,
-        #               side,
-        #               o.timestamp,
-        #               timestamp,
-        #               o.price,
-        #               o.filled_volume))
-
-        # refresh orderbook state
-        self.refresh()
+        # touch state is refreshed lazily on the next read
         self.order_count += 1
         self.last_datetime = timestamp
         return filled_orders
 
+    def cost_to_fill(self, side, volume, limit_price=None):
+        """Prices a hypothetical order without touching the book
+
+        Walks the opposite side from the touch and computes what
+        an order of the given volume would execute at. The book is
+        left untouched; a cumulative depth prefix per side is kept
+        and only rebuilt after that side has changed.
+
+        Arguments:
+            side {str} -- side of the hypothetical order (BID/ASK)
+            volume {float} -- volume of the hypothetical order
+
+        Keyword Arguments:
+            limit_price {float} -- only walk levels at or better than
+                                   this price (default: {None})
+
+        Returns:
+            MarketImpact -- vwap and worst price (None when nothing
+                            fills), filled and unfilled volume and
+                            the total cost of the filled volume
+
+        Raises:
+            ValueError -- Invalid volume errors (only positive volumes)
+            ValueError -- Invalid side errors (only BID/ASK)
+        """
+        if volume <= 0:
+            raise ValueError("Invalid volume {}".format(volume))
+        if side == "BID":
+            tree = self._ask_limits
+            reverse = False
+        elif side == "ASK":
+            tree = self._bid_limits
+            reverse = True
+        else:
+            raise ValueError("Invalid orderbook side {}".format(side))
+
+        prefix = tree.prefix
+        if prefix is None:
+            prefix = tree.prefix = DepthPrefix(tree, reverse)
+        prefix.sync()
+
+        limit_key = None
+        if limit_price is not None:
+            limit_key = -limit_price if reverse else limit_price
+
+        prefix.extend(volume, limit_key)
+        cum_vol = prefix.cum_vol
+
+        # levels within the limit price
+        usable = len(cum_vol) if limit_key is None else \
+            bisect_right(prefix.keys, limit_key)
+        inx = bisect_left(cum_vol, volume, 0, usable)
+
+        if inx == usable:
+            # the whole usable depth fills and some volume is left
+            if usable == 0:
+                return MarketImpact(None, None, 0, volume, 0)
+            filled = cum_vol[usable - 1]
+            if filled == 0:
+                # only float residuals rest within the usable depth
+                return MarketImpact(None, None, 0, volume, 0)
+            cost = prefix.cum_notional[usable - 1]
+            worst = prefix.prices[usable - 1]
+        else:
+            before = cum_vol[inx - 1] if inx > 0 else 0
+            cost = prefix.cum_notional[inx - 1] if inx > 0 else 0
+            worst = prefix.prices[inx]
+            cost += (volume - before) * worst
+            filled = volume
+
+        return MarketImpact(cost / filled, worst, filled,
+                            max(volume - filled, 0), cost)
+
+    def simulate_market(self, side, volume):
+        """Prices a hypothetical market order, see cost_to_fill"""
+        return self.cost_to_fill(side, volume)
+
     def limit(self, side, price, volume, timestamp=dt.now(), cancel=False, order_id=None):
         """Limit order/Marketable limit order function
 
@@ -123,32 +209,15 @@ class OrderBook(OrderBookInterface):
             raise ValueError("Invalid orderbook side {}".format(side))
 
         # attempt to execute marketable limit orders
+        self._taker_id = order_id
+        self._taker_ts = timestamp
         volume, filled_orders = search_tree.fill(price, volume, purchase_type)
 
-        # log all filled orders
-        # for o in filled_orders:
-        #     print("ooo : TRADE | sym = {}, side = {}, add_ts = {}, "
-        #           "trade_ts = {}, price = {}, filled_vol = {}".format(
-        #               self.symbol,
-        #               side,
-        #               o.timestamp,
-        #               dt.now(),
-        #               o.price,
-        #               o.filled_volume))
-
         # log newly placed limit order
         if volume > 0 and not cancel:
             order_tree.insert_order(order_id, price, volume, timestamp)
-            # print("ooo : LIMIT | sym = {}, order_id = {}, side = {}, "
-            #       "ts = {}, price = {}, vol = {}".format(self.symbol,
-            #                                              self.order_count,
-            #                                              side,
-            #                                              timestamp,
-            #                                              price,
-            #                                              volume))
-
-        # refresh orderbook state
-        self.refresh()
+
+        # touch state is refreshed lazily on the next read
         self.order_count += 1
         self.last_datetime = timestamp
         return filled_orders
@@ -160,10 +229,13 @@ class OrderBook(OrderBookInterface):
         if volume == 0:
             raise ValueError("Invalid volume {}".format(volume))
 
+        # post only when the order would not take liquidity
         if side == "BID":
-            bbool = self._bid_limits.max() >= price
+            best = self._ask_limits.min()
+            bbool = best is None or price < best
         elif side == "ASK":
-            bbool = self._ask_limits.min() <= price
+            best = self._bid_limits.max()
+            bbool = best is None or price > best
         else:
             raise ValueError("Invalid orderbook side {}".format(side))
 
@@ -178,9 +250,11 @@ class OrderBook(OrderBookInterface):
             raise ValueError("Invalid volume")
 
         if side == "BID":
-            bbool = self._ask_limits.min() <= price
+            best = self._ask_limits.min()
+            bbool = best is not None and best <= price
         elif side == "ASK":
-            bbool = self._bid_limits.max() >= price
+            best = self._bid_limits.max()
+            bbool = best is not None and best >= price
         else:
             raise ValueError("Invalid orderbook side {}".format(side))
 
@@ -197,50 +271,164 @@ class OrderBook(OrderBookInterface):
 
         order_tree.remove_order_by_id(order_id)
 
-    def refresh(self):
-        """Refreshes state of orderbook included all features
+    def on_fill(self, tree, order, volume):
+        side = "BID" if tree is self._ask_limits else "ASK"
+        for listener in self.listeners:
+            listener.on_trade(self._taker_ts, side, order, volume,
+                              self._taker_id)
+
+    def on_level(self, tree, price, volume):
+        side = "BID" if tree is self._bid_limits else "ASK"
+        for listener in self.listeners:
+            listener.on_level(side, price, volume)
+
+    def on_cancel(self, tree, order):
+        side = "BID" if tree is self._bid_limits else "ASK"
+        for listener in self.listeners:
+            listener.on_cancel(side, order)
+
+    def on_amend(self, tree, order, price, volume):
+        side = "BID" if tree is self._bid_limits else "ASK"
+        for listener in self.listeners:
+            listener.on_amend(side, order, price, volume)
+
+    def process(self, order, timestamp=None):
+        """Applies a single exchange event to the book
+
+        Dispatches a parsed OrderEntry to the matching order
+        function based on its event type, execution options
+        and order type. Fill events are skipped as the book
+        produces its own executions, and cancels of orders no
+        longer in the book are ignored.
+
+        Arguments:
+            order {OrderEntry} -- parsed exchange event
+
+        Keyword Arguments:
+            timestamp {int} -- event time in epoch nanoseconds,
+                               defaults to the event's own timestamp
+                               (default: {None})
+        """
+        if timestamp is None:
+            timestamp = order.timestamp
+            if timestamp is None:
+                timestamp = dt.now()
+
+        self.dispatch("BID" if order.side == "buy" else "ASK",
+                      order.event_type, order.exec_opt, order.order_type,
+                      order.price, order.volume, timestamp, order.order_id)
+
+    def dispatch(self, side, event_type, exec_opt, order_type, price, volume,
+                 timestamp, order_id):
+        """Applies one exchange event given as its fields
+
+        Shared by process and apply_events, so events applied one
+        by one and from structured arrays take the same path.
+
+        Arguments:
+            side {str} -- side of the book (BID/ASK)
+            event_type {str} -- Initial, Place, Cancel or Fill
+            exec_opt {str} -- execution option, may be empty
+            order_type {str} -- limit or market
+            price {float} -- order price
+            volume {float} -- order volume
+            timestamp {int} -- event time in epoch nanoseconds
+            order_id {str} -- exchange order id
+        """
+        if event_type == "Place" or event_type == "Initial":
+            if exec_opt == "immediate-or-cancel":
+                self.immediate_or_cancel(side, price, volume, timestamp,
+                                         order_id)
+            elif exec_opt == "maker-or-cancel":
+                self.maker_or_cancel(side, price, volume, timestamp,
+                                     order_id)
+            elif order_type == "limit":
+                self.limit(side, price, volume, timestamp,
+                           order_id=order_id)
+            elif order_type == "market":
+                self.market(side, volume, timestamp, order_id)
+        elif event_type == "Cancel":
+            order_tree = self._bid_limits if side == "BID" \
+                else self._ask_limits
+            if order_id in order_tree.order_map:
+                order_tree.remove_order_by_id(order_id)
+
+    def apply_batch(self, events):
+        """Applies a batch of exchange events
+
+        Processes a whole time bucket, such as the output of
+        DataProcessor.next(time_length), and recomputes the
+        derived touch state once at the end
+
+        Arguments:
+            events {array} -- OrderEntry events in time order
+
+        Returns:
+            OrderBook -- this book, refreshed
+        """
+        for order in events:
+            self.process(order)
+
+        self.refresh()
+        return self
+
+    def apply_events(self, events, categories):
+        """Applies a structured array of exchange events
+
+        The columnar counterpart of apply_batch for EVENT_DTYPE
+        records, such as the output of DataProcessor.next_batch.
+        Categorical codes are looked up in the categories of the
+        records and dispatched like process does, without building
+        event objects. Order ids are kept as strings, as parsed
+        from the csv.
+
+        Arguments:
+            events {ndarray} -- EVENT_DTYPE records in time order
+            categories {dict} -- field name to the list of values
+                                 its codes index, as in the
+                                 processor's categories
+
+        Returns:
+            OrderBook -- this book, refreshed
+        """
+        exec_opts = categories["exec_opt"]
+        event_types = categories["event_type"]
+        order_types = categories["order_type"]
+        sides = ["BID" if side == "buy" else "ASK"
+                 for side in categories["side"]]
+        dispatch = self.dispatch
+        for (_, ts, order_id, exec_opt, event_type, order_type, side,
+             price, volume, _) in events.tolist():
+            dispatch(sides[side], event_types[event_type],
+                     exec_opts[exec_opt], order_types[order_type],
+                     price, volume, ts, str(order_id))
+
+        self.refresh()
+        return self
+
+    def check_consistency(self):
+        """Checks the whole book for internal consistency
 
-        After each state change to the orderbook, we want to
-        recompute simple stateful properties about the book
+        A debug check for books running with validate=False.
+        Both trees are walked in full, so call it every so
+        often rather than after each event.
 
         Raises:
-            ValueError -- Invalid ask errors
+            ValueError -- on stale state or a crossed book
         """
-        try:
-            self.bid = self._bid_limits.max()
-        except Exception:
-            self.bid = 0
-
-        try:
-            self.ask = self._ask_limits.min()
-        except Exception:
-            self.ask = self.error_ask
-
-        try:
-            self.bid_vol = self._bid_limits.get_price(self.bid).total_vol
-        except Exception:
-            self.bid_vol = 0
-
-        try:
-            self.ask_vol = self._ask_limits.get_price(self.ask).total_vol
-        except Exception:
-            self.ask_vol = 0
-
-        try:
-            if self.ask == self.error_ask:
-                raise ValueError
-
-            self.spread = self.ask - self.bid
-        except Exception:
-            self.spread = None
-
-        try:
-            if self.ask == self.error_ask:
-                raise ValueError
-
-            self.midquote = (self.ask + self.bid) / 2.0
-        except Exception:
-            self.midquote = None
+        self._bid_limits.check()
+        self._ask_limits.check()
+
+        bid = self._bid_limits.max()
+        ask = self._ask_limits.min()
+        if bid is not None and ask is not None and bid >= ask:
+            raise ValueError("Crossed book: bid {} >= ask {}".format(bid, ask))
+
+        expected = (0 if bid is None else bid,
+                    self.error_ask if ask is None else ask)
+        if (self.bid, self.ask) != expected:
+            raise ValueError("Stale touch {} != {}".format(
+                (self.bid, self.ask), expected))
 
     def state(self):
         return {
@@ -1,3 +1,4 @@
+import numpy as np
 from .ordertree import Tree
 
 
@@ -11,20 +12,130 @@ class OrderBookInterface(object):
     # TODO: Change to enum or something other than number
     error_ask = float(9999999999)
 
-    def __init__(self):
+    def __init__(self, tick_size=None, validate=True):
         """Initialize an orderbook with bid/ask order trees
 
         The orderbook interface represents a blank orderbook state
+
+        Keyword Arguments:
+            tick_size {float} -- tick size for array backed price
+                                 ladders, None keeps the red-black
+                                 tree backend (default: {None})
+            validate {bool} -- validate every state assignment, disable
+                               for replays of trusted exchange data
+                               (default: {True})
         """
         super(OrderBookInterface, self).__init__()
+        self.tick_size = tick_size
+        self.validate = validate
+        self.listeners = []
         self._bid = 0
         self._ask = self.error_ask
         self._ask_vol = 0
         self._bid_vol = 0
         self._spread = 0
         self._midquote = 0
-        self._bid_limits = Tree()
-        self._ask_limits = Tree()
+        self._bid_limits = Tree(self.tick_size, self.validate)
+        self._ask_limits = Tree(self.tick_size, self.validate)
+        self._attach()
+
+    def refresh(self):
+        """Refreshes state of orderbook included all features
+
+        Recomputes the touch from the order trees. Mutations
+        only flag a tree as dirty when its best level changes,
+        and the state getters call this on the next read.
+
+        Raises:
+            ValueError -- Invalid ask errors
+        """
+        self._bid_limits.max_dirty = False
+        self._ask_limits.min_dirty = False
+
+        if not self.validate:
+            return self._refresh_unchecked()
+
+        try:
+            self.bid = self._bid_limits.max()
+        except Exception:
+            self.bid = 0
+
+        try:
+            self.ask = self._ask_limits.min()
+        except Exception:
+            self.ask = self.error_ask
+
+        try:
+            self.bid_vol = self._bid_limits.get_price(self.bid).total_vol
+        except Exception:
+            self.bid_vol = 0
+
+        try:
+            self.ask_vol = self._ask_limits.get_price(self.ask).total_vol
+        except Exception:
+            self.ask_vol = 0
+
+        try:
+            if self.ask == self.error_ask:
+                raise ValueError
+
+            self.spread = self.ask - self.bid
+        except Exception:
+            self.spread = None
+
+        try:
+            if self.ask == self.error_ask:
+                raise ValueError
+
+            self.midquote = (self.ask + self.bid) / 2.0
+        except Exception:
+            self.midquote = None
+
+    def _ensure_fresh(self):
+        # the touch is recomputed only when a best level changed
+        if self._bid_limits.max_dirty or self._ask_limits.min_dirty:
+            self.refresh()
+
+    def _refresh_unchecked(self):
+        bid = self._bid_limits.max_price
+        ask = self._ask_limits.min_price
+
+        if bid is None:
+            self._bid = 0
+            self._bid_vol = 0
+        else:
+            self._bid = bid
+            self._bid_vol = self._bid_limits.get_price(bid)._total_vol
+
+        if ask is None:
+            self._ask = self.error_ask
+            self._ask_vol = 0
+            self._spread = None
+            self._midquote = None
+        else:
+            self._ask = ask
+            self._ask_vol = self._ask_limits.get_price(ask)._total_vol
+            self._spread = ask - self._bid
+            self._midquote = (ask + self._bid) / 2.0
+
+    def subscribe(self, listener):
+        """Subscribes a BookListener to mutations of this book
+
+        Arguments:
+            listener {BookListener} -- receives the book's events
+        """
+        self.listeners.append(listener)
+        self._attach()
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+        self._attach()
+
+    def _attach(self):
+        # trees only report to the book while someone listens
+        listener = self if self.listeners else None
+        self._bid_limits.listener = listener
+        self._ask_limits.listener = listener
 
     def clear(self):
         self._bid = 0
@@ -33,11 +144,13 @@ class OrderBookInterface(object):
         self._bid_vol = 0
         self._spread = 0
         self._midquote = 0
-        self._bid_limits = Tree()
-        self._ask_limits = Tree()
+        self._bid_limits = Tree(self.tick_size, self.validate)
+        self._ask_limits = Tree(self.tick_size, self.validate)
+        self._attach()
 
     @property
     def bid(self):
+        self._ensure_fresh()
         return self._bid
 
     @bid.setter
@@ -48,6 +161,7 @@ class OrderBookInterface(object):
 
     @property
     def ask(self):
+        self._ensure_fresh()
         return self._ask
 
     @ask.setter
@@ -58,6 +172,7 @@ class OrderBookInterface(object):
 
     @property
     def bid_vol(self):
+        self._ensure_fresh()
         return self._bid_vol
 
     @bid_vol.setter
@@ -68,6 +183,7 @@ class OrderBookInterface(object):
 
     @property
     def ask_vol(self):
+        self._ensure_fresh()
         return self._ask_vol
 
     @ask_vol.setter
@@ -78,6 +194,7 @@ class OrderBookInterface(object):
 
     @property
     def spread(self):
+        self._ensure_fresh()
         return self._spread
 
     @spread.setter
@@ -86,32 +203,57 @@ class OrderBookInterface(object):
 
     @property
     def midquote(self):
+        self._ensure_fresh()
         return self._midquote
 
     @midquote.setter
     def midquote(self, val):
         self._midquote = val
 
-    def to_vec(self, threshold=10):
-        bid_prices, bid_vols = [], []
-        ask_prices, ask_vols = [], []
+    def depth(self, levels=10, out=None):
+        """Top of book depth snapshot
 
-        for inx, elt in enumerate(self._bid_limits.price_tree.items(reverse=True)):
-            bid_prices.append(elt[0])
-            bid_vols.append(elt[1].total_vol)
+        Writes the best levels of both sides into a float64
+        array with one row per level and the columns ask price,
+        ask volume, bid price and bid volume. Only the requested
+        number of levels is visited on each side and rows past
+        the depth of a side are zero padded.
 
-        for inx, elt in enumerate(self._ask_limits.price_tree.items()):
-            ask_prices.append(elt[0])
-            ask_vols.append(elt[1].total_vol)
+        Keyword Arguments:
+            levels {int} -- number of levels per side (default: {10})
+            out {ndarray} -- float64[levels, 4] buffer to write into,
+                             a new one is allocated when omitted
+                             (default: {None})
 
-        vector = []
-        for i in range(threshold):
-            vector.append(ask_prices[i])
-            vector.append(ask_vols[i])
-            vector.append(bid_prices[i])
-            vector.append(bid_vols[i])
+        Returns:
+            ndarray -- the filled snapshot buffer
+
+        Raises:
+            ValueError -- Invalid buffer shape
+        """
+        if out is None:
+            out = np.zeros((levels, 4))
+        elif out.shape != (levels, 4):
+            raise ValueError("Invalid depth buffer shape {}".format(out.shape))
 
-        return vector
+        self._fill_depth(self._ask_limits, out, 0, False)
+        self._fill_depth(self._bid_limits, out, 2, True)
+        return out
+
+    def _fill_depth(self, tree, out, col, reverse):
+        levels = out.shape[0]
+        inx = 0
+        if levels > 0 and len(tree.price_tree) > 0:
+            for price, level in tree.price_tree.iter_items(reverse=reverse):
+                out[inx, col] = price
+                out[inx, col + 1] = level._total_vol
+                inx += 1
+                if inx == levels:
+                    return
+        out[inx:, col:col + 2] = 0
+
+    def to_vec(self, threshold=10):
+        return self.depth(threshold).ravel().tolist()
 
     def __str__(self):
         value = "\nAsks\t\t\t\t\t\t\tBids"
@@ -1,17 +1,51 @@
 from datetime import datetime as dt
 from bintrees import FastRBTree
-from .order_utils import PriceLevel, Order
+from .ladder import TickLadder
+from .order_utils import PriceLevel, UncheckedPriceLevel, Order
 
 
 class Tree(object):
 
-    def __init__(self):
-        self.price_tree = FastRBTree()
+    def __init__(self, tick_size=None, validate=True):
+        """Initializes an empty side of the book
+
+        Price levels are kept in a red-black tree keyed by price
+        unless a tick size is given, in which case they live in an
+        array backed TickLadder indexed by integer ticks
+
+        Keyword Arguments:
+            tick_size {float} -- minimum price increment of the symbol
+                                 (default: {None})
+            validate {bool} -- validate volumes on every assignment,
+                               disable for trusted replays
+                               (default: {True})
+        """
+        self.tick_size = tick_size
+        self.validate = validate
+        self.level_class = PriceLevel if validate else UncheckedPriceLevel
+        if tick_size is None:
+            self.price_tree = FastRBTree()
+            self.price_map = {}  # Map from price -> PriceLevel object
+        else:
+            # the ladder is keyed by tick, so it serves both roles
+            self.price_tree = TickLadder(tick_size)
+            self.price_map = self.price_tree
         self.volume = 0
-        self.price_map = {}  # Map from price -> PriceLevel object
         self.order_map = {}  # Order ID to Order object
         self.min_price = None
         self.max_price = None
+        # set when the level at either end changes, cleared
+        # by the owning book once it has refreshed its touch
+        self.max_dirty = False
+        self.min_dirty = False
+        # bumped on every mutation to invalidate derived caches
+        self.version = 0
+        self.prefix = None
+        # receives on_fill(tree, order, volume) for every execution,
+        # on_level(tree, price, volume) after a level changes,
+        # on_cancel(tree, order) before an order is cancelled and
+        # on_amend(tree, order, price, volume) before it is updated
+        self.listener = None
 
     def __len__(self):
         return len(self.order_map)
@@ -40,6 +74,7 @@ class Tree(object):
             tuple<float, array> -- remaining volume and all filled orders
         """
         filled_orders = []
+        requested = volume
 
         while volume > 0:
             curr = self.min() if pt == "BUY" else self.max()
@@ -57,23 +92,38 @@ class Tree(object):
 
             if cond:
                 pl = self.get_price(curr)
-                volume, fills, leftover_vol = pl.get(volume)
+                if self.listener is None:
+                    volume, fills, leftover_vol = pl.get(volume)
+                else:
+                    quantities = []
+                    volume, fills, leftover_vol = pl.get(volume, quantities)
+                    for order, qty in zip(fills, quantities):
+                        self.listener.on_fill(self, order, qty)
+                if pt == "BUY":
+                    self.min_dirty = True
+                else:
+                    self.max_dirty = True
                 filled_orders += fills
 
                 if len(fills) == 0:
                     raise ValueError("what the fuck: {}, {}, {}".format(volume, leftover_vol, pl.total_vol))
 
                 # check if we've executed entire price level
-                if leftover_vol == 0:
+                if pl.is_empty():
                     self.remove_price(curr)
+                if self.listener is not None:
+                    self.listener.on_level(self, pl.price, pl._total_vol)
             else:
                 # break when current bid/ask is higher/lower than price
                 break
 
+        # update tree volume
+        if volume != requested:
+            self.volume -= requested - volume
+            self.version += 1
+
         # remove completely filled orders
         for order in filled_orders:
-            # update tree volume
-            self.volume -= order.filled_volume
             if order.volume == 0 and order.id in self.order_map:
                 self.remove_order_by_id(order.id, cleanup=True)
 
@@ -82,39 +132,60 @@ class Tree(object):
     def create_price(self, price):
         """Create a new pricelevel in the order tree
 
-        Every order lives in a PriceLevel object, a heap
-        based list containing all orders at that price. This
+        Every order lives in a PriceLevel object, a FIFO
+        queue containing all orders at that price. This
         function creates those lists when they don't exist.
 
         Arguments:
             price {float} -- price of new price level
         """
-        new_list = PriceLevel(price)
+        new_list = self.level_class(price)
         self.price_tree.insert(price, new_list)
-        self.price_map[price] = new_list
+        if self.tick_size is None:
+            self.price_map[price] = new_list
         if self.max_price is None or price > self.max_price:
             self.max_price = price
+            self.max_dirty = True
         if self.min_price is None or price < self.min_price:
             self.min_price = price
+            self.min_dirty = True
 
     def remove_price(self, price):
         try:
             self.price_tree.remove(price)
-            del self.price_map[price]
+            if self.tick_size is None:
+                del self.price_map[price]
         except Exception:
             pass
 
+        # only the touch needs recomputing, both backends
+        # find the new extreme without a full scan
+        if len(self.price_tree) == 0:
+            self.max_price = self.min_price = None
+            self.max_dirty = self.min_dirty = True
+            return
+
+        if self.max_price == price or self.tick_size is not None:
+            max_price = self.price_tree.max_key()
+            if max_price != self.max_price:
+                self.max_price = max_price
+                self.max_dirty = True
+        if self.min_price == price or self.tick_size is not None:
+            min_price = self.price_tree.min_key()
+            if min_price != self.min_price:
+                self.min_price = min_price
+                self.min_dirty = True
+
+    def touch(self, price):
+        """Flags the ends of the tree that a price level sits at
 
-        if self.max_price == price:
-            try:
-                self.max_price = max(self.price_tree)
-            except ValueError:
-                self.max_price = None
-        if self.min_price == price:
-            try:
-                self.min_price = min(self.price_tree)
-            except ValueError:
-                self.min_price = None
+        Arguments:
+            price {float} -- price of a level that has changed
+        """
+        if price == self.max_price:
+            self.max_dirty = True
+        if price == self.min_price:
+            self.min_dirty = True
 
     def price_exists(self, price):
         return price in self.price_map
@@ -123,39 +194,119 @@ class Tree(object):
         return id_num in self.order_map
 
     def insert_order(self, id_num, price, vol, timestamp=dt.now()):
-        if price not in self.price_map:
+        price_level = self.price_map.get(price)
+        if price_level is None:
             self.create_price(price)
-        order = Order(id_num, price, vol, timestamp, self.price_map[price])
+            price_level = self.price_map[price]
+        order = Order(id_num, price, vol, timestamp, price_level)
         self.order_map[order.id] = order
         self.volume += order.volume
+        self.version += 1
+        self.touch(price_level.price)
+        if self.listener is not None:
+            self.listener.on_level(self, price_level.price,
+                                   price_level._total_vol)
 
     def update_order(self, id_num, price, volume):
         order = self.order_map[id_num]
         original_volume = order.volume
+        if self.listener is not None:
+            self.listener.on_amend(self, order, price, volume)
         if price != order.price:
             # Price changed
             price_level = self.price_map[order.price]
+            self.touch(price_level.price)
             price_level.remove(order)
             if len(price_level) == 0:
                 self.remove_price(order.price)
+            if self.listener is not None:
+                self.listener.on_level(self, price_level.price,
+                                       price_level._total_vol)
             self.insert_order(id_num, price, volume)
             self.volume -= original_volume
         else:
-            # Quantity changed
+            # Quantity changed, the level keeps queue position on reduce
             order.update_volume(volume)
-            price_level = self.price_map[order.price]
-            price_level.total_vol += order.volume - original_volume
-            self.volume += order.volume - original_volume
+            self.volume += volume - original_volume
+            self.version += 1
+            self.touch(order.price_level.price)
+            if self.listener is not None:
+                self.listener.on_level(self, order.price_level.price,
+                                       order.price_level._total_vol)
 
     def remove_order_by_id(self, id_num, cleanup=False):
-        order = self.order_map[id_num]
+        order = self.order_map.pop(id_num)
+        price_level = order.price_level
         self.volume -= order.volume
-        if len(order.price_level) == 0:
-            self.remove_price(order.price)
-        del self.order_map[id_num]
+        self.version += 1
+        self.touch(price_level.price)
 
         if not cleanup:
-            order.price_level.remove(order)
+            if self.listener is not None:
+                self.listener.on_cancel(self, order)
+            price_level.remove(order)
+        if len(price_level) == 0 and \
+                self.price_map.get(order.price) is price_level:
+            self.remove_price(order.price)
+        if not cleanup and self.listener is not None:
+            self.listener.on_level(self, price_level.price,
+                                   price_level._total_vol)
+
+    def check(self):
+        """Checks the internal consistency of the tree
+
+        Walks every price level and resting order and verifies
+        that volumes, the order map, level membership and the
+        cached best prices all agree. Meant to be run every so
+        often in place of per-assignment validation.
+
+        Raises:
+            ValueError -- on the first inconsistency found
+        """
+        volume = 0
+        orders = 0
+
+        for price, level in self.price_tree.items():
+            if level.is_empty():
+                raise ValueError("Empty level at {}".format(price))
+
+            level_vol = 0
+            count = 0
+            for order in level.store:
+                if order.volume <= 0:
+                    raise ValueError("Invalid volume {} for order {}".format(
+                        order.volume, order.id))
+                if self.order_map.get(order.id) is not order:
+                    raise ValueError("Order {} missing from order map".format(
+                        order.id))
+                if order.price_level is not level:
+                    raise ValueError("Order {} linked to wrong level".format(
+                        order.id))
+                level_vol += order.volume
+                count += 1
+
+            if count != len(level):
+                raise ValueError("Queue length mismatch at {}".format(price))
+            if abs(level_vol - level.total_vol) > 1e-6:
+                raise ValueError("Level volume mismatch at {}: {} != {}".format(
+                    price, level_vol, level.total_vol))
+            volume += level_vol
+            orders += count
+
+        if orders != len(self.order_map):
+            raise ValueError("Order count mismatch: {} != {}".format(
+                orders, len(self.order_map)))
+        if abs(volume - self.volume) > 1e-6:
+            raise ValueError("Tree volume mismatch: {} != {}".format(
+                volume, self.volume))
+
+        if len(self.price_tree) == 0:
+            best = (None, None)
+        else:
+            best = (self.price_tree.min_key(), self.price_tree.max_key())
+        if best != (self.min_price, self.max_price):
+            raise ValueError("Stale best prices {} != {}".format(
+                (self.min_price, self.max_price), best))
 
     def max(self):
         return self.max_price
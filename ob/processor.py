@@ -1,11 +1,16 @@
 import csv
 import os
-from datetime import datetime, timedelta
+from collections import deque
+import numpy as np
+from . import cache as event_cache
+from . import index as event_index
+from .reader import ChunkedCSVReader
+from .timeutils import parse_ns, NS_PER_SEC
 
 
 class DataProcessor(object):
 
-    def __init__(self, file_str, exchange, data_format="raw"):
+    def __init__(self, file_str, exchange, data_format="raw", cache=False):
         """Initializes a data processor over different data formats
 
         The data processor is a utility for parsing orderbook
@@ -21,6 +26,9 @@ class DataProcessor(object):
         Keyword Arguments:
             data_format {str} -- data format (raw or snapshot)
                                     (default: {"raw"})
+            cache {bool} -- read raw data from its binary columnar
+                            cache, converting the csv on first use
+                            (default: {False})
         """
         super(DataProcessor, self).__init__()
         self.exchange = exchange
@@ -29,52 +37,415 @@ class DataProcessor(object):
         self.fields = []
         self.leftover_order = None
         self.finished = False
+        self.cache = cache
+        self.events = None  # memory mapped cache records
+        self._ahead = deque()  # events parsed ahead by read_ahead
 
         self.initialize(file_str)
 
     def get_next_order(self):
+        if self._ahead:
+            return self._ahead.popleft()
+        if self.events is not None:
+            return self.get_cached_order()
+
         order = None
         ts = None
         while order is None:
-            order = self.parse_exchange_order(next(self.f))
+            # consume rows from the current buffer
+            if self._pos == len(self._lines):
+                self.next_buffer()
+            row = self.buffer_rows()[self._pos]
+            self._pos += 1
+            self.line += 1
+
+            order = self.parse_exchange_order(row)
             if order is None:
                 continue
-            ts = datetime.strptime("{},{},{}".format(
-                order.date, order.time, order.millis), "%Y-%m-%d,%H:%M:%S,%f")
+            ts = parse_ns(order.date, order.time, order.millis)
+            order.timestamp = ts
+
+        return order, ts
 
+    def get_cached_order(self):
+        """Decodes the next event from the memory mapped cache
+
+        Records are copied out of the memory map a chunk at a
+        time and decoded into OrderEntry objects with the same
+        field values as parsed from the csv
+
+        Raises:
+            StopIteration -- at the end of the day file
+        """
+        if self._pos == len(self._rows):
+            start = self._row
+            stop = min(start + self.chunk_size, len(self.events))
+            if start == stop:
+                raise StopIteration
+            self._rows = self.events[start:stop].tolist()
+            self._pos = 0
+            self._row = stop
+
+        (event_id, ts, order_id, exec_opt, event_type, order_type,
+         side, price, volume, avg_price) = self._rows[self._pos]
+        self._pos += 1
+        self.line += 1
+
+        categories = self.categories
+        order = OrderEntry.from_record(
+            str(event_id), str(order_id),
+            categories["exec_opt"][exec_opt],
+            categories["event_type"][event_type],
+            self.symbol,
+            categories["order_type"][order_type],
+            categories["side"][side],
+            price, volume, avg_price, ts)
         return order, ts
 
     def next(self, time_length=None):
-        entries = []
-        order = None
+        """Retrieves the next event or the next bucket of events
 
-        # set starting time on first line of data
-        if self.time == 0:
-            order, ts = self.get_next_order()
-            self.time = ts
-            entries.append(order)
+        Without a time length a single event is returned. With
+        one, the bucket holds every event up to time_length
+        seconds after its first event. The first event past the
+        bucket is kept back for the next call. Times are compared
+        as integer epoch nanoseconds.
+
+        Keyword Arguments:
+            time_length {float} -- bucket length in seconds
+                                   (default: {None})
+
+        Returns:
+            array -- OrderEntry events in time order
+
+        Raises:
+            StopIteration -- when no events are left
+        """
+        entries = []
 
         if self.leftover_order is not None:
             entries.append(self.leftover_order)
             self.leftover_order = None
-
-        if time_length is None and self.time != 0:
+        else:
             order, ts = self.get_next_order()
             self.time = ts
             entries.append(order)
-        else:
-            # retrieve all orders earlier than time horizon
-            target_time = self.time + timedelta(seconds=time_length)
-            while self.time <= target_time:
+
+        if time_length is None:
+            return entries
+
+        # retrieve all orders up to the time horizon
+        target_time = self.time + int(time_length * NS_PER_SEC)
+        while True:
+            try:
                 order, ts = self.get_next_order()
-                if ts > target_time:
-                    self.leftover_order = order
-                else:
-                    entries.append(order)
+            except StopIteration:
+                # return the final partial bucket first
+                return entries
+
+            self.time = ts
+            if ts > target_time:
+                self.leftover_order = order
+                return entries
+            entries.append(order)
+
+    def next_batch(self, time_length=None):
+        """Retrieves the next event or bucket as a structured array
+
+        The columnar counterpart of next: buckets are formed the
+        same way but returned as EVENT_DTYPE records, with string
+        fields as codes into self.categories. Cached days return
+        a read-only slice of the memory map without decoding any
+        event; csv rows are encoded straight into records. The
+        two methods may be interleaved.
+
+        Keyword Arguments:
+            time_length {float} -- bucket length in seconds
+                                   (default: {None})
+
+        Returns:
+            ndarray -- EVENT_DTYPE records in time order
+
+        Raises:
+            StopIteration -- when no events are left
+        """
+        span = None if time_length is None \
+            else int(time_length * NS_PER_SEC)
+        records = self._take(span, None)
+        if len(records) == 0:
+            raise StopIteration
+        return records
+
+    def next_until(self, end):
+        """Retrieves every event up to an absolute time
+
+        Like next_batch, but the bucket is closed at a fixed
+        time instead of relative to its first event, as needed
+        for sampling on a fixed clock
+
+        Arguments:
+            end {int} -- last time included, epoch nanoseconds
+
+        Returns:
+            ndarray -- EVENT_DTYPE records at or before end, empty
+                       when the next event is later
+
+        Raises:
+            StopIteration -- when no events are left
+        """
+        return self._take(None, end)
+
+    def peek_time(self):
+        """Time of the next event without consuming it
+
+        Returns:
+            int -- epoch nanoseconds, None when no events are left
+        """
+        if self.leftover_order is not None:
+            return self.leftover_order.timestamp
+        if self._ahead:
+            return self._ahead[0][1]
+        if self.events is not None:
+            start = self._row - (len(self._rows) - self._pos)
+            return int(self.stamps[start]) \
+                if start < len(self.stamps) else None
+
+        while True:
+            if self._pos == len(self._lines):
+                try:
+                    self.next_buffer()
+                except StopIteration:
+                    return None
+            if self._rows is None:
+                # decode the buffer the way the next read will
+                records, kept = self.buffer_records()
+                inx = int(np.searchsorted(kept, self._pos))
+                if inx < len(kept):
+                    return int(records["ts"][inx])
+                self.line += len(self._lines) - self._pos
+                self._pos = len(self._lines)
+                continue
+            row = self._rows[self._pos]
+            if len(row[10]) or len(row[11]):
+                return parse_ns(row[1], row[2], row[3])
+            self._pos += 1
+            self.line += 1
+
+    def _take(self, span, target):
+        # a single event without span or target, otherwise every
+        # event up to the target or span after the first event
+        single = span is None and target is None
+
+        if self.events is not None:
+            # events handed out but not consumed are rows of the map
+            start = self._row - (len(self._rows) - self._pos) - \
+                len(self._ahead) - (self.leftover_order is not None)
+            self._rows = []
+            self._pos = 0
+            self._ahead.clear()
+            self.leftover_order = None
+            if start == len(self.events):
+                self._row = start
+                raise StopIteration
+
+            stamps = self.stamps
+            if single:
+                stop = start + 1
+            else:
+                if target is None:
+                    target = stamps[start] + span
+                stop = int(np.searchsorted(stamps, target, side="right"))
+            self._row = stop
+            if stop > start:
+                self.line += stop - start
+                self.time = int(stamps[stop - 1])
+            return self.events[start:stop]
+
+        encoder = self.encoder
+        records = []
+        count = 0
+        exhausted = False
+
+        # events already parsed by next or read_ahead come first
+        pending = self._ahead
+        if self.leftover_order is not None:
+            pending.appendleft((self.leftover_order,
+                                self.leftover_order.timestamp))
+            self.leftover_order = None
+        while pending:
+            order, ts = pending[0]
+            if target is None:
+                target = ts if single else ts + span
+            elif ts > target:
+                break
+            records.append(encoder.entry(order))
+            pending.popleft()
+            if single:
+                break
+        if records:
+            count = len(records)
+            records = [np.array(records, dtype=event_cache.EVENT_DTYPE)]
+
+        # whole buffers are encoded at once, buckets are slices
+        while not pending and not (single and count):
+            if self._pos == len(self._lines):
+                try:
+                    self.next_buffer()
+                except StopIteration:
+                    exhausted = True
+                    break
+            block, kept = self.buffer_records()
+            start = int(np.searchsorted(kept, self._pos))
+            if start == len(kept):
+                # only rows without price or volume are left
+                self.line += len(self._lines) - self._pos
+                self._pos = len(self._lines)
+                continue
+
+            stamps = block["ts"]
+            if target is None:
+                target = stamps[start] if single else stamps[start] + span
+            if single:
+                stop = start + 1
+            else:
+                stop = start + int(np.searchsorted(
+                    stamps[start:], target, side="right"))
+
+            # the first row past the bucket is left unconsumed
+            if single:
+                pos = kept[start] + 1
+            elif stop < len(kept):
+                pos = kept[stop]
+            else:
+                pos = len(self._lines)
+            self.line += pos - self._pos
+            self._pos = int(pos)
+            if stop > start:
+                records.append(block[start:stop])
+                count += stop - start
+            if stop < len(kept):
+                break
+
+        if not count:
+            if exhausted:
+                raise StopIteration
+            return np.zeros(0, dtype=event_cache.EVENT_DTYPE)
+        records = records[0] if len(records) == 1 \
+            else np.concatenate(records)
+        self.time = int(records["ts"][-1])
+        return records
+
+    def next_buffer(self):
+        """Moves on to the next buffer of csv lines
+
+        Raises:
+            StopIteration -- at the end of the day file
+        """
+        self.set_buffer(self.f.next_lines())
+
+    def set_buffer(self, lines, pos=0):
+        # lines are decoded on first use, into rows for OrderEntry
+        # events and into records for structured batches
+        self._lines = lines
+        self._rows = None
+        self._records = None
+        self._pos = pos
+
+    def buffer_rows(self):
+        """Rows of the current buffer, decoded by csv.reader
+
+        Returns:
+            array -- string fields of every line of the buffer
+        """
+        if self._rows is None:
+            self._rows = list(csv.reader(self._lines))
+        return self._rows
+
+    def buffer_records(self):
+        """Events of the current buffer, encoded column by column
+
+        Lines before the current position, such as the header,
+        are not encoded
+
+        Returns:
+            tuple<ndarray, ndarray> -- EVENT_DTYPE records, and the
+                                       position of each record's line
+                                       in the buffer
+        """
+        if self._records is None:
+            start = self._pos
+            records, kept = self.encoder.lines(
+                self._lines[start:], len(self.fields))
+            self._records = records, kept + start
+        return self._records
+
+    def read_ahead(self, count):
+        """Parses up to count events ahead of the reader
+
+        The events are served by get_next_order before any new
+        row is read. Used to prepare a day on a background thread.
 
-                self.time = ts
+        Arguments:
+            count {int} -- events to parse
+        """
+        # detach the buffer so get_next_order reads new rows
+        ahead, self._ahead = self._ahead, deque()
+        try:
+            for _ in range(count - len(ahead)):
+                ahead.append(self.get_next_order())
+        except StopIteration:
+            pass
+        finally:
+            self._ahead = ahead
+
+    def seek(self, ts, skip=0):
+        """Moves the processor to the first event at or after a time
+
+        Cached days are searched directly on their time column,
+        csv days jump to the nearest entry of their sidecar index,
+        which is built on first use, and read forward from there.
+        The event found is returned by the next call to next.
+
+        Arguments:
+            ts {int} -- target time in epoch nanoseconds
+
+        Keyword Arguments:
+            skip {int} -- events at exactly the target time to pass
+                          over, for resuming between events that
+                          share a timestamp (default: {0})
 
-        return entries
+        Raises:
+            StopIteration -- when no event is left at or after ts
+        """
+        self.leftover_order = None
+        self._ahead.clear()
+        if self.events is not None:
+            row = int(np.searchsorted(self.stamps, ts, side="left"))
+            self._rows = []
+            self._pos = 0
+            self._row = row
+            self.line = row + 1
+        else:
+            entry = event_index.find(event_index.load_index(self.path), ts)
+            self.f.close()
+            if entry is None:
+                # the target precedes the first entry, start over
+                self.initialize(self.path)
+            else:
+                offset, row = entry
+                self.f = ChunkedCSVReader(self.path, offset=offset)
+                self.set_buffer([])
+                self.line = row + 1
+
+        while True:
+            order, order_ts = self.get_next_order()
+            if order_ts > ts or (order_ts == ts and skip == 0):
+                break
+            if order_ts == ts:
+                skip -= 1
+
+        self.time = order_ts
+        self.leftover_order = order
 
     def parse_gemini(self, data):
         """Parses gemini raw orderbook data
@@ -122,23 +493,23 @@ class DataProcessor(object):
         return ask_prices, ask_volumes, bid_prices, bid_volumes, timestamp
 
     def process_file(self, path):
-        """Process the file line by line using the file's returned iterator
+        """Opens a chunked reader over a csv file
 
-        A file generator that parses new csv files
-        and returns a generator/iterator over lines
+        The reader decodes thousands of rows per call, which
+        get_next_order consumes a batch at a time
 
         Arguments:
             path {str} -- file path to open
 
-        Yields:
-            {csvreader} -- a generator/iterator over a csv file
+        Returns:
+            {ChunkedCSVReader} -- reader over the csv file
         """
-        with open(path) as file_handler:
-            while True:
-                yield next(csv.reader(file_handler, delimiter=","))
+        return ChunkedCSVReader(path)
 
     def parse_exchange_order(self, order_data):
         if self.exchange == "GEMINI":
+            if self.data_format == "raw":
+                return OrderEntry.from_gemini(order_data)
             order = self.parse_gemini(order_data)
             error_bool = len(order["price"]) == 0 and len(order["volume"]) == 0
             return None if error_bool else OrderEntry(order)
@@ -161,9 +532,31 @@ class DataProcessor(object):
         Raises:
             ValueError -- [description]
         """
+        self.path = file_path
+        if self.data_format == "raw" and self.cache:
+            if not event_cache.is_cached(file_path):
+                event_cache.convert(file_path)
+            self.events, metadata = event_cache.load(file_path)
+            self.categories = metadata["categories"]
+            self.symbol = metadata["symbol"]
+            self.fields = list(self.events.dtype.names)
+            # contiguous copy of the time column, searching the
+            # strided field would copy it on every call
+            self.stamps = np.ascontiguousarray(self.events["ts"])
+            self.chunk_size = 4096
+            self._rows = []
+            self._pos = 0
+            self._row = 0
+            self.line = 1
+            return
+
         self.f = self.process_file(file_path)
         if self.data_format == "raw":
-            self.fields = next(self.f)
+            self.encoder = event_cache.EventEncoder()
+            self.categories = self.encoder.categories
+            lines = self.f.next_lines()
+            self.fields = next(csv.reader(lines[:1]))
+            self.set_buffer(lines, pos=1)
             self.line = 1
         elif self.data_format == "snapshot":
             return
@@ -172,6 +565,15 @@ class DataProcessor(object):
 
 
 class OrderEntry(object):
+    """
+    A parsed exchange event, slotted as one is built per row.
+    Readers use the from_gemini and from_record constructors,
+    the dict constructor remains for orders built by hand
+    """
+
+    __slots__ = ("event_id", "date", "time", "millis", "order_id",
+                 "exec_opt", "event_type", "symbol", "order_type", "side",
+                 "price", "volume", "avg_price", "timestamp")
 
     def __init__(self, order):
         super(OrderEntry, self).__init__()
@@ -185,6 +587,7 @@ class OrderEntry(object):
         self.symbol = order["symbol"] if "symbol" in order else None
         self.order_type = order["type"] if "type" in order else None
         self.side = order["side"] if "side" in order else None
+        self.timestamp = order["timestamp"] if "timestamp" in order else None
 
         try:
             self.price = float(order["price"])
@@ -201,9 +604,64 @@ class OrderEntry(object):
         except Exception:
             self.avg_price = 0
 
+    @classmethod
+    def from_gemini(cls, data):
+        """Builds an event from the fields of a raw Gemini row
+
+        Arguments:
+            data {array} -- string fields of the row, see parse_gemini
+
+        Returns:
+            OrderEntry -- the event, None for rows with neither
+                          price nor volume
+        """
+        price, volume = data[10], data[11]
+        if not price and not volume:
+            return None
+
+        entry = cls.__new__(cls)
+        (entry.event_id, entry.date, entry.time, entry.millis, entry.order_id,
+         entry.exec_opt, entry.event_type, entry.symbol, entry.order_type,
+         entry.side) = data[:10]
+        entry.price = _num(price)
+        entry.volume = _num(volume)
+        entry.avg_price = _num(data[15])
+        entry.timestamp = None
+        return entry
+
+    @classmethod
+    def from_record(cls, event_id, order_id, exec_opt, event_type, symbol,
+                    order_type, side, price, volume, avg_price, timestamp):
+        """Builds an event from already decoded field values"""
+        entry = cls.__new__(cls)
+        entry.event_id = event_id
+        entry.date = entry.time = entry.millis = None
+        entry.order_id = order_id
+        entry.exec_opt = exec_opt
+        entry.event_type = event_type
+        entry.symbol = symbol
+        entry.order_type = order_type
+        entry.side = side
+        entry.price = price
+        entry.volume = volume
+        entry.avg_price = avg_price
+        entry.timestamp = timestamp
+        return entry
+
     def __str__(self):
         from pprint import pformat
-        return pformat(vars(self), indent=4, width=1)
+        return pformat(dict((name, getattr(self, name))
+                            for name in self.__slots__), indent=4, width=1)
+
+
+def _num(value):
+    # empty numeric fields are common, skip the exception for them
+    if not value:
+        return 0
+    try:
+        return float(value)
+    except ValueError:
+        return 0
 
 
 def num(l):
@@ -0,0 +1,227 @@
+import math
+from .listener import BookListener
+from .timeutils import to_ns, NS_PER_SEC
+
+
+def exponential_fill(ahead, volume, expected):
+    """Probability that an order is reached by executions
+
+    Models the volume executed at the level over the horizon as
+    exponentially distributed with mean expected, so the order
+    starts filling once more than ahead has traded.
+
+    Arguments:
+        ahead {float} -- volume queued in front of the order
+        volume {float} -- resting volume of the order
+        expected {float} -- volume expected to trade at the level
+
+    Returns:
+        float -- probability of at least a partial fill
+    """
+    if expected <= 0:
+        return 0.0
+    return math.exp(-ahead / expected)
+
+
+class _Tracked(object):
+
+    __slots__ = ("order", "side", "ahead")
+
+    def __init__(self, order, side, ahead):
+        self.order = order
+        self.side = side
+        self.ahead = ahead
+
+
+class QueueTracker(BookListener):
+    """
+    Tracks the volume queued in front of tagged resting
+    orders, such as simulated agent limit orders
+    """
+
+    def __init__(self, book, fill_model=None):
+        """Initializes a tracker over a book
+
+        The volume ahead of an order is summed once when it is
+        tracked. From then on every execution, cancel or amend at
+        its level adjusts it in O(1): queued orders carry an arrival
+        sequence, so whether the order touched is in front of the
+        tracked one is a single comparison. The tracker is only
+        subscribed to the book while it tracks orders, and forgets
+        an order once it is filled, cancelled or moved to another
+        price.
+
+        Arguments:
+            book {OrderBook} -- book the orders rest in
+
+        Keyword Arguments:
+            fill_model {callable} -- fill_model(ahead, volume, expected)
+                                     returns a fill probability from the
+                                     volume ahead, the order's volume and
+                                     the volume expected to trade
+                                     (default: {exponential_fill})
+        """
+        super(QueueTracker, self).__init__()
+        self.book = book
+        self.fill_model = exponential_fill if fill_model is None \
+            else fill_model
+        self.orders = {}  # order id -> _Tracked
+        # PriceLevel -> [_Tracked], levels rather than prices, as
+        # float prices sharing a tick of a ladder share one level
+        self._levels = {}
+
+        # executions against each side since tracking last resumed,
+        # for the default trade rate
+        self.traded = {"BID": 0.0, "ASK": 0.0}
+        self.first_ts = None
+
+    def track(self, order_id, side):
+        """Starts tracking a resting order
+
+        Arguments:
+            order_id {str} -- id of the order
+            side {str} -- side of the order (BID/ASK)
+
+        Returns:
+            float -- volume ahead of the order
+        """
+        tree = self._tree(side)
+        order = tree.get_order(order_id)
+        ahead = 0.0
+        prev = order._prev
+        while prev is not None:
+            ahead += prev.volume
+            prev = prev._prev
+
+        self.untrack(order_id)
+        if not self.orders:
+            # trades were not seen while nothing was tracked
+            self.traded = {"BID": 0.0, "ASK": 0.0}
+            start = self.book.last_datetime
+            self.first_ts = None if start is None else to_ns(start)
+            self.book.subscribe(self)
+
+        tracked = _Tracked(order, side, ahead)
+        self.orders[order_id] = tracked
+        self._levels.setdefault(order.price_level, []).append(tracked)
+        return ahead
+
+    def untrack(self, order_id):
+        tracked = self.orders.pop(order_id, None)
+        if tracked is None:
+            return
+        key = tracked.order.price_level
+        entries = self._levels[key]
+        entries.remove(tracked)
+        if not entries:
+            del self._levels[key]
+        if not self.orders and self in self.book.listeners:
+            self.book.unsubscribe(self)
+
+    def queue_ahead(self, order_id):
+        """Volume queued in front of a tracked order
+
+        Arguments:
+            order_id {str} -- id of a tracked order
+
+        Returns:
+            float -- volume that executes before the order does
+
+        Raises:
+            KeyError -- the order is not tracked
+        """
+        return max(self.orders[order_id].ahead, 0.0)
+
+    def trade_rate(self, side):
+        """Volume executed per second against resting orders of a side
+
+        Measured over the whole side, from the time tracking last
+        resumed after no order was tracked up to the book's last
+        event, as executions are only seen while orders are tracked.
+
+        Arguments:
+            side {str} -- side of the resting orders (BID/ASK)
+
+        Returns:
+            float -- executed volume per second, 0 before any time
+                     has passed
+        """
+        if self.first_ts is None or self.book.last_datetime is None:
+            return 0.0
+        elapsed = to_ns(self.book.last_datetime) - self.first_ts
+        if elapsed <= 0:
+            return 0.0
+        return self.traded[side] / (elapsed / float(NS_PER_SEC))
+
+    def fill_probability(self, order_id, horizon, rate=None):
+        """Probability that a tracked order fills within a horizon
+
+        Arguments:
+            order_id {str} -- id of a tracked order
+            horizon {float} -- seconds ahead
+
+        Keyword Arguments:
+            rate {float} -- volume expected to execute per second
+                            at the order's level, the trade_rate of
+                            its whole side if None (default: {None})
+
+        Returns:
+            float -- probability given by the fill model
+        """
+        tracked = self.orders[order_id]
+        if rate is None:
+            rate = self.trade_rate(tracked.side)
+        return self.fill_model(max(tracked.ahead, 0.0),
+                               tracked.order.volume, rate * horizon)
+
+    def _tree(self, side):
+        if side == "BID":
+            return self.book._bid_limits
+        elif side == "ASK":
+            return self.book._ask_limits
+        raise ValueError("Invalid orderbook side {}".format(side))
+
+    def on_trade(self, timestamp, side, maker, volume, taker_id):
+        side = "ASK" if side == "BID" else "BID"
+        if self.first_ts is None:
+            self.first_ts = to_ns(timestamp)
+        self.traded[side] += volume
+
+        entries = self._levels.get(maker.price_level)
+        if entries is None:
+            return
+        for tracked in list(entries):
+            order = tracked.order
+            if order is maker:
+                tracked.ahead = 0.0
+                if maker.volume == 0:
+                    self.untrack(maker.id)
+            elif maker._seq < order._seq:
+                tracked.ahead -= volume
+
+    def on_cancel(self, side, order):
+        entries = self._levels.get(order.price_level)
+        if entries is None:
+            return
+        for tracked in list(entries):
+            if tracked.order is order:
+                self.untrack(order.id)
+            elif order._seq < tracked.order._seq:
+                tracked.ahead -= order.volume
+
+    def on_amend(self, side, order, price, volume):
+        entries = self._levels.get(order.price_level)
+        if entries is None:
+            return
+        for tracked in list(entries):
+            if tracked.order is order:
+                if price != order.price:
+                    self.untrack(order.id)
+                elif volume > order.volume:
+                    # goes to the back, behind everything else
+                    tracked.ahead = order.price_level.total_vol - order.volume
+            elif order._seq < tracked.order._seq:
+                if price != order.price or volume > order.volume:
+                    tracked.ahead -= order.volume
+                else:
+                    tracked.ahead -= order.volume - volume
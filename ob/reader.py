@@ -0,0 +1,229 @@
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import threading
+from itertools import repeat
+from queue import Queue
+
+# openers of the compressed formats, keyed by file extension
+COMPRESSED = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+
+
+def open_binary(path):
+    """Opens a plain or compressed file as a binary stream
+
+    Offsets into compressed files are positions in the
+    inflated stream, and seeking inflates up to them
+
+    Arguments:
+        path {str} -- a file, optionally ending in .gz, .bz2 or .xz
+
+    Returns:
+        {file} -- binary file object
+    """
+    for ext, opener in COMPRESSED.items():
+        if path.endswith(ext):
+            return opener(path, "rb")
+    return open(path, "rb")
+
+
+def open_text(path, offset=0):
+    """Opens a plain or compressed text file for reading
+
+    Arguments:
+        path {str} -- a .csv file, optionally ending in .gz,
+                      .bz2 or .xz
+
+    Keyword Arguments:
+        offset {int} -- byte offset to start reading at, which must
+                        be the start of a line (default: {0})
+
+    Returns:
+        {file} -- text mode file object
+    """
+    raw = open_binary(path)
+    if offset:
+        raw.seek(offset)
+    return io.TextIOWrapper(raw, encoding="utf-8", newline="")
+
+
+def is_compressed(path):
+    return any(path.endswith(ext) for ext in COMPRESSED)
+
+
+def split_columns(lines, width):
+    """Splits csv lines into columns of string fields
+
+    All lines are joined and split in a single call, and every
+    column is a slice of the result, so no list is built per
+    line. Only plain lines are handled: quoted fields cannot be
+    split this way.
+
+    Arguments:
+        lines {array} -- lines without their line endings
+        width {int} -- fields per line
+
+    Returns:
+        array -- width lists of fields, None if a line is quoted
+                 or does not have width fields
+    """
+    if not lines:
+        return [[] for _ in range(width)]
+    text = ",".join(lines)
+    if '"' in text:
+        return None
+    fields = text.split(",")
+    if len(fields) != len(lines) * width:
+        return None
+    # the total alone would miss a short line next to a long one
+    if set(map(str.count, lines, repeat(",", len(lines)))) != {width - 1}:
+        return None
+    return [fields[inx::width] for inx in range(width)]
+
+
+class ChunkedCSVReader(object):
+    """
+    A csv reader that reads large buffers and decodes
+    all complete lines of a buffer in one call
+    """
+
+    def __init__(self, path, chunk_size=1 << 20, threaded=None, prefetch=8,
+                 offset=0):
+        """Opens a csv file for chunked reading
+
+        Rows never span buffers: the partial line at the end of
+        a buffer is carried over to the next one. Quoted fields
+        with embedded newlines are therefore not supported,
+        which exchange dumps do not use.
+
+        Compressed files are inflated on a producer thread that
+        also splits buffers into lines and hands them over
+        through a bounded queue, so decompression and disk reads
+        overlap with parsing and book updates.
+
+        Arguments:
+            path {str} -- csv file path to open, optionally
+                          compressed with gzip, bzip2 or xz
+
+        Keyword Arguments:
+            chunk_size {int} -- characters read per buffer
+                                (default: {1 << 20})
+            threaded {bool} -- read on a producer thread, by default
+                               only for compressed files
+                               (default: {None})
+            prefetch {int} -- buffers the producer may read ahead
+                              (default: {8})
+            offset {int} -- byte offset of the first line to read
+                            (default: {0})
+        """
+        super(ChunkedCSVReader, self).__init__()
+        self.path = path
+        self.chunk_size = chunk_size
+        self.file = open_text(path, offset)
+        self._tail = ""
+        self._rows = []
+        self._pos = 0
+
+        if threaded is None:
+            threaded = is_compressed(path)
+        self._queue = None
+        self._thread = None
+        if threaded:
+            self._stopped = False
+            self._queue = Queue(maxsize=prefetch)
+            self._thread = threading.Thread(target=self._produce)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def read_lines(self):
+        """Reads the next buffer and splits it into complete lines
+
+        Returns:
+            array -- lines of the buffer, None at the end of the file
+        """
+        while True:
+            data = self.file.read(self.chunk_size)
+            if not data:
+                tail, self._tail = self._tail, ""
+                return [tail] if tail else None
+
+            head, sep, tail = (self._tail + data).rpartition("\n")
+            self._tail = tail
+            if head:
+                return head.splitlines()
+
+    def _produce(self):
+        try:
+            while not self._stopped:
+                lines = self.read_lines()
+                self._queue.put(lines)
+                if lines is None:
+                    return
+        except Exception as e:
+            self._queue.put(e)
+
+    def next_lines(self):
+        """Complete lines of the next buffer, without decoding them
+
+        Returns:
+            array -- lines of the buffer
+
+        Raises:
+            StopIteration -- once the file is exhausted
+        """
+        if self.file.closed:
+            lines = None
+        elif self._queue is None:
+            lines = self.read_lines()
+        else:
+            lines = self._queue.get()
+            if isinstance(lines, Exception):
+                self.close()
+                raise lines
+
+        if lines is None:
+            self.close()
+            raise StopIteration
+        return lines
+
+    def read_batch(self):
+        """Decodes every complete line of the next buffer
+
+        Returns:
+            array -- rows, each a list of string fields
+
+        Raises:
+            StopIteration -- once the file is exhausted
+        """
+        return list(csv.reader(self.next_lines()))
+
+    def close(self):
+        if self._thread is not None:
+            # unblock the producer so it can see the stop flag
+            self._stopped = True
+            while self._thread.is_alive():
+                while not self._queue.empty():
+                    self._queue.get_nowait()
+                self._thread.join(0.01)
+            self._thread = None
+        if not self.file.closed:
+            self.file.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._pos == len(self._rows):
+            self._rows = self.read_batch()
+            self._pos = 0
+        row = self._rows[self._pos]
+        self._pos += 1
+        return row
+
+    next = __next__
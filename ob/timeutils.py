@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+EPOCH = datetime(1970, 1, 1)
+NS_PER_US = 1000
+
+
+def to_ns(ts):
+    """Converts a timestamp into integer epoch nanoseconds
+
+    Naive datetimes are taken to be UTC, as exchange data is
+
+    Arguments:
+        ts {datetime|int} -- timestamp, integers pass through
+
+    Returns:
+        int -- nanoseconds since the epoch, 0 for None
+    """
+    if ts is None:
+        return 0
+    if isinstance(ts, datetime):
+        return (ts - EPOCH) // timedelta(microseconds=1) * NS_PER_US
+    return int(ts)
+
+
+def from_ns(ns):
+    """Converts integer epoch nanoseconds into a naive UTC datetime
+
+    Arguments:
+        ns {int} -- nanoseconds since the epoch
+
+    Returns:
+        datetime -- timestamp with microsecond resolution
+    """
+    return EPOCH + timedelta(microseconds=ns // NS_PER_US)
+
+
+NS_PER_MS = 1000000
+NS_PER_SEC = 1000000000
+NS_PER_DAY = 86400 * NS_PER_SEC
+
+# epoch nanoseconds at midnight, per date string
+_midnights = {}
+
+
+def parse_ns(date, time, millis):
+    """Decodes exchange date, time and millis fields into epoch ns
+
+    A fast replacement for strptime on the fixed layout of
+    exchange data: date as YYYY-MM-DD, time as HH:MM:SS and
+    millis as an integer number of milliseconds. Midnight of
+    each date is computed once and cached.
+
+    Arguments:
+        date {str} -- event date, YYYY-MM-DD
+        time {str} -- event time of day, HH:MM:SS
+        millis {str} -- milliseconds past the second
+
+    Returns:
+        int -- nanoseconds since the epoch
+    """
+    midnight = _midnights.get(date)
+    if midnight is None:
+        midnight = _midnights[date] = (datetime(
+            int(date[0:4]), int(date[5:7]), int(date[8:10])) - EPOCH).days \
+            * NS_PER_DAY
+
+    return midnight + (int(time[0:2]) * 3600 + int(time[3:5]) * 60 +
+                       int(time[6:8])) * NS_PER_SEC + int(millis) * NS_PER_MS
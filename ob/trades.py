@@ -0,0 +1,119 @@
+import numpy as np
+from .listener import BookListener
+from .timeutils import to_ns
+
+# one execution, side is +1 for buy and -1 for sell aggressors
+TRADE_DTYPE = np.dtype([
+    ("ts", "i8"),
+    ("price", "f8"),
+    ("qty", "f8"),
+    ("side", "i1"),
+    ("maker_id", "i8"),
+    ("taker_id", "i8"),
+])
+
+
+class TradeLog(BookListener):
+    """
+    A fixed-dtype ring buffer of executions that can be
+    subscribed to an OrderBook, with an optional
+    append-only spill file for the full history
+    """
+
+    def __init__(self, capacity=65536, spill_path=None):
+        """Initializes an empty trade log
+
+        Keyword Arguments:
+            capacity {int} -- executions kept in memory (default: {65536})
+            spill_path {str} -- file that every execution is appended
+                                to before it is overwritten in the ring,
+                                read back with read_spill
+                                (default: {None})
+        """
+        super(TradeLog, self).__init__()
+        if capacity <= 0:
+            raise ValueError("Invalid capacity {}".format(capacity))
+
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=TRADE_DTYPE)
+        self.index = 0
+        self.count = 0
+        self.spill_path = spill_path
+        self._spill = open(spill_path, "ab") if spill_path else None
+        self._flushed = 0
+
+    def on_trade(self, timestamp, side, maker, volume, taker_id):
+        self.append(to_ns(timestamp), maker.price, volume,
+                    1 if side == "BID" else -1,
+                    _order_id(maker.id), _order_id(taker_id))
+
+    def append(self, ts, price, qty, side, maker_id, taker_id):
+        self.buffer[self.index] = (ts, price, qty, side, maker_id, taker_id)
+        self.index += 1
+        self.count += 1
+
+        if self.index == self.capacity:
+            if self._spill is not None:
+                self.buffer[self._flushed:].tofile(self._spill)
+                self._flushed = 0
+            self.index = 0
+
+    def segments(self):
+        """Zero-copy views of the buffered executions
+
+        Returns:
+            tuple<ndarray, ndarray> -- older and newer parts of the
+                                       ring, oldest execution first
+        """
+        if self.count < self.capacity:
+            return self.buffer[:0], self.buffer[:self.index]
+        return self.buffer[self.index:], self.buffer[:self.index]
+
+    def view(self):
+        """Buffered executions in chronological order
+
+        This is a view into the ring until it wraps around,
+        after which the two segments are copied together.
+
+        Returns:
+            ndarray -- array of TRADE_DTYPE records
+        """
+        older, newer = self.segments()
+        if len(older) == 0:
+            return newer
+        return np.concatenate((older, newer))
+
+    def flush(self):
+        if self._spill is None:
+            return
+        self.buffer[self._flushed:self.index].tofile(self._spill)
+        self._flushed = self.index
+        self._spill.flush()
+
+    def close(self):
+        if self._spill is not None:
+            self.flush()
+            self._spill.close()
+            self._spill = None
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+
+def read_spill(path):
+    """Memory maps an execution spill file
+
+    Arguments:
+        path {str} -- spill file written by a TradeLog
+
+    Returns:
+        ndarray -- read-only array of TRADE_DTYPE records
+    """
+    return np.memmap(path, dtype=TRADE_DTYPE, mode="r")
+
+
+def _order_id(id_num):
+    try:
+        return int(id_num)
+    except (TypeError, ValueError):
+        return -1
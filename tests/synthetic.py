@@ -0,0 +1,67 @@
+"""Synthetic Gemini raw order book day files for tests and benchmarks"""
+import csv
+import random
+
+HEADER = ["Event ID", "Event Date", "Event Time", "Event Millis",
+          "Order ID", "Execution Options", "Event Type", "Symbol",
+          "Order Type", "Side", "Limit Price (USD)",
+          "Original Quantity (ETH)", "Gross Notional Value (USD)",
+          "Fill Price (USD)", "Fill Quantity (ETH)",
+          "Total Exec Quantity (ETH)", "Remaining Quantity (ETH)",
+          "Avg Price (USD)"]
+
+
+def write_day(path, events, date="2017-12-01", initial=200, seed=7,
+              first_id=1000000):
+    """Writes a day file of random limit order activity
+
+    The day starts with a number of Initial resting orders,
+    followed by placements and cancels around a fixed mid, one
+    event every 10 milliseconds.
+
+    Arguments:
+        path {str} -- csv file to write
+        events {int} -- number of events after the Initial ones
+
+    Keyword Arguments:
+        date {str} -- event date, YYYY-MM-DD (default: {"2017-12-01"})
+        initial {int} -- resting orders at the start (default: {200})
+        seed {int} -- random seed (default: {7})
+        first_id {int} -- order id of the first event, days of a
+                          multi-day replay need disjoint ids
+                          (default: {1000000})
+    """
+    rng = random.Random(seed)
+    resting = []
+
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for i in range(initial + events):
+            millis = i * 10
+            clock = "{:02d}:{:02d}:{:02d}".format(
+                millis // 3600000 % 24, millis // 60000 % 60,
+                millis // 1000 % 60)
+            if i < initial:
+                event_type = "Initial"
+            elif rng.random() < 0.55 or len(resting) < 20:
+                event_type = "Place"
+            else:
+                event_type = "Cancel"
+
+            if event_type == "Cancel":
+                order_id, side, price, volume = resting.pop(
+                    rng.randrange(len(resting)))
+            else:
+                side = "buy" if rng.random() < 0.5 else "sell"
+                offset = rng.randint(1 if i < initial else -5, 50) * 0.01
+                price = 450.0 - offset if side == "buy" else 450.0 + offset
+                order_id = first_id + i
+                volume = rng.randint(1, 100) * 0.01
+                resting.append((order_id, side, price, volume))
+
+            writer.writerow([
+                i, date, clock, "{:03d}".format(millis % 1000), order_id,
+                "", event_type, "ETHUSD", "limit", side,
+                "{:.2f}".format(price), "{:.2f}".format(volume),
+                "", "", "", "", "", ""])
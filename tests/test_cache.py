@@ -0,0 +1,170 @@
+import csv
+import gzip
+import os
+import shutil
+import pytest
+from ob import cache
+from ob.processor import DataProcessor
+
+HEADER = ["Event ID", "Event Date", "Event Time", "Event Millis",
+          "Order ID", "Execution Options", "Event Type", "Symbol",
+          "Order Type", "Side", "Limit Price (USD)",
+          "Original Quantity (ETH)", "Gross Notional Value (USD)",
+          "Fill Price (USD)", "Fill Quantity (ETH)",
+          "Total Exec Quantity (ETH)", "Remaining Quantity (ETH)",
+          "Avg Price (USD)"]
+
+
+def write_day(path, rows):
+    with open(path, "w") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for event_id, time, millis, order_id, evt, side, price, vol in rows:
+            writer.writerow([
+                event_id, "2017-12-01", time, millis, order_id, "", evt,
+                "ETHUSD", "limit", side, price, vol, "", "", "", "", "", ""])
+
+
+ROWS = [
+    (1, "00:00:00", "000", 10, "Initial", "buy", "460.5", "1.5"),
+    (2, "00:00:00", "000", 11, "Initial", "sell", "461", "2"),
+    (3, "00:00:01", "250", 12, "Place", "buy", "460.75", "0.5"),
+    (4, "00:00:02", "100", 12, "Cancel", "buy", "460.75", "0.5"),
+    (5, "00:00:03", "000", 13, "Change", "sell", "", ""),
+    (6, "00:00:04", "999", 14, "Place", "sell", "460", "3"),
+]
+
+
+def read_all(dp, count):
+    return [dp.get_next_order() for _ in range(count)]
+
+
+def test_convert(tmp_path):
+    path = str(tmp_path / "ETHUSD_order_book_20171201.csv")
+    write_day(path, ROWS)
+    assert not cache.is_cached(path)
+    cache.convert(path)
+    assert cache.is_cached(path)
+
+    events, metadata = cache.load(path)
+    assert metadata["symbol"] == "ETHUSD"
+    assert len(events) == 5
+    assert events["order_id"].tolist() == [10, 11, 12, 12, 14]
+    assert events["price"].tolist() == [460.5, 461, 460.75, 460.75, 460]
+
+    types = metadata["categories"]["event_type"]
+    assert [types[c] for c in events["event_type"]] == \
+        ["Initial", "Initial", "Place", "Cancel", "Place"]
+
+
+def test_unencodable_ids(tmp_path):
+    encoder = cache.EventEncoder()
+    row = ["7", "", "", "", "12", "", "Place", "ETHUSD", "limit", "buy",
+           "460", "1", "", "", "", "0", "", ""]
+    assert encoder.row(row, 0)[2] == 12
+
+    # ids read back with str must match the csv ones
+    for order_id in ("007", "abc", ""):
+        with pytest.raises(ValueError):
+            encoder.row(row[:4] + [order_id] + row[5:], 0)
+
+    path = str(tmp_path / "ETHUSD_order_book_20171201.csv")
+    write_day(path, ROWS[:2] + [(3, "00:00:01", "250", "012", "Place",
+                                 "buy", "460.75", "0.5")])
+    with pytest.raises(ValueError):
+        cache.convert(path)
+
+
+def test_encode_lines():
+    from ob.timeutils import parse_ns
+    lines = [",".join([str(event_id), "2017-12-01", time, millis,
+                       str(order_id), "", evt, "ETHUSD", "limit", side,
+                       price, vol, "", "", "", "", "", ""])
+             for event_id, time, millis, order_id, evt, side, price, vol
+             in ROWS]
+    rows = list(csv.reader(lines))
+    expected = [cache.EventEncoder().row(data, parse_ns(*data[1:4]))
+                for data in rows if data[10] or data[11]]
+
+    # split into columns, and through csv.reader once a field is quoted
+    for block in (lines, lines[:-1] + ['"6"' + lines[-1][1:]]):
+        encoder = cache.EventEncoder()
+        records, kept = encoder.lines(block, len(HEADER))
+        assert kept.tolist() == [0, 1, 2, 3, 5]
+        assert records.tolist() == expected
+
+    # new categories get codes in order of appearance
+    encoder = cache.EventEncoder()
+    encoder.lines([lines[0].replace("Initial", "Zeta"),
+                   lines[2].replace("Place", "Alpha")], len(HEADER))
+    assert encoder.categories["event_type"][-2:] == ["Zeta", "Alpha"]
+
+    with pytest.raises(ValueError):
+        encoder.lines([lines[0].replace(",10,", ",010,")], len(HEADER))
+
+
+def test_stale_cache(tmp_path):
+    path = str(tmp_path / "ETHUSD_order_book_20171201.csv")
+    write_day(path, ROWS)
+    cache.convert(path)
+
+    # a changed day file is converted again
+    write_day(path, ROWS[:2])
+    os.utime(path, ns=(0, 0))
+    assert not cache.is_cached(path)
+    dp = DataProcessor(path, "GEMINI", cache=True)
+    assert len(dp.events) == 2
+    assert cache.is_cached(path)
+
+    # so is a compressed copy sharing the cache paths
+    with open(path, "rb") as src, gzip.open(path + ".gz", "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    assert not cache.is_cached(path + ".gz")
+
+
+def test_cached_processor(tmp_path):
+    path = str(tmp_path / "ETHUSD_order_book_20171201.csv")
+    write_day(path, ROWS)
+
+    text = read_all(DataProcessor(path, "GEMINI"), 5)
+    cached = read_all(DataProcessor(path, "GEMINI", cache=True), 5)
+    assert os.path.exists(cache.cache_paths(path)[0])
+
+    fields = ["event_id", "order_id", "exec_opt", "event_type", "symbol",
+              "order_type", "side", "price", "volume", "timestamp"]
+    for (a, ts_a), (b, ts_b) in zip(text, cached):
+        assert ts_a == ts_b
+        for field in fields:
+            assert getattr(a, field) == getattr(b, field)
+
+    dp = DataProcessor(path, "GEMINI", cache=True)
+    read_all(dp, 5)
+    with pytest.raises(StopIteration):
+        dp.get_next_order()
+
+
+def test_time_buckets(tmp_path):
+    path = str(tmp_path / "ETHUSD_order_book_20171201.csv")
+    write_day(path, ROWS)
+
+    for use_cache in [False, True]:
+        dp = DataProcessor(path, "GEMINI", cache=use_cache)
+        buckets = [[int(o.event_id) for o in dp.next(1.25)]
+                   for _ in range(3)]
+        assert buckets == [[1, 2, 3], [4], [6]]
+
+
+def test_compressed_day(tmp_path):
+    import gzip
+    import shutil
+
+    path = str(tmp_path / "ETHUSD_order_book_20171201.csv")
+    write_day(path, ROWS)
+    with open(path, "rb") as src, gzip.open(path + ".gz", "wb") as dst:
+        shutil.copyfileobj(src, dst)
+
+    plain = read_all(DataProcessor(path, "GEMINI"), 5)
+    packed = read_all(DataProcessor(path + ".gz", "GEMINI"), 5)
+    assert [ts for _, ts in plain] == [ts for _, ts in packed]
+    assert [o.order_id for o, _ in packed] == ["10", "11", "12", "12", "14"]
+    assert cache.cache_paths(path + ".gz") == cache.cache_paths(path)
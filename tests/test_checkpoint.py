@@ -0,0 +1,77 @@
+import numpy as np
+from .synthetic import write_day
+from envs.simulator import Simulator
+from ob import checkpoint
+from ob.orderbook import OrderBook
+
+
+def test_round_trip(tmp_path):
+    book = OrderBook("ETHUSD")
+    book.limit("BID", 100, 1, 5, order_id="a")
+    book.limit("BID", 100, 2, 6, order_id="b")
+    book.limit("BID", 99, 3, 7)
+    book.limit("ASK", 101, 4, 8, order_id="c")
+    book.market("ASK", 0.5, 9)
+
+    path = str(tmp_path / "book.npz")
+    checkpoint.save(book, path, ts=9, count=1)
+
+    restored = OrderBook("ETHUSD")
+    assert checkpoint.restore(restored, path) == {"ts": 9, "count": 1}
+    restored._bid_limits.check()
+    assert np.array_equal(restored.depth(5), book.depth(5))
+    assert [o.id for o in restored._bid_limits.get_price(100).store] == \
+        ["a", "b"]
+    assert restored._bid_limits.get_order("a").filled_volume == 0.5
+    assert restored._bid_limits.order_exists(2)
+    assert restored.order_count == book.order_count
+    assert restored.last_datetime == 9
+
+
+def simulator_options(tmp_path, **options):
+    for day in (1, 2):
+        path = tmp_path / "ETHUSD_order_book_2017120{}.csv".format(day)
+        if not path.exists():
+            write_day(str(path), 3000, date="2017-12-0{}".format(day),
+                      seed=day, first_id=day * 1000000)
+    defaults = {
+        "exchange": "GEMINI",
+        "symbol": "ETHUSD",
+        "data_dir": str(tmp_path),
+        "data_format": "raw",
+        "dates": [20171201, 20171202],
+        "delta": 0,
+        "grid_step_length": 100}
+    defaults.update(options)
+    return defaults
+
+
+def make_simulator(tmp_path, **options):
+    return Simulator(simulator_options(tmp_path, **options))
+
+
+def test_reset(tmp_path):
+    ckpt_dir = tmp_path / "checkpoints"
+    ckpt_dir.mkdir()
+    sim = make_simulator(tmp_path, checkpoint_interval=5,
+                         checkpoint_dir=str(ckpt_dir))
+    states = {}
+    while not sim.is_finished():
+        if sim.next(0.75) is not None:
+            states[sim.last_ts] = sim.orderbook.depth(10)
+    assert len(sim.checkpoints) > 4
+
+    resumed = make_simulator(tmp_path, checkpoint_dir=str(ckpt_dir))
+    assert resumed.checkpoints == sim.checkpoints
+    for at in sorted(states)[5::7]:
+        resumed.reset(at)
+        resumed.orderbook._bid_limits.check()
+        assert np.array_equal(resumed.orderbook.depth(10), states[at])
+
+    # without checkpoints the day is replayed from the start
+    replay = make_simulator(tmp_path)
+    at = sorted(states)[40]
+    replay.reset(at)
+    assert np.array_equal(replay.orderbook.depth(10), states[at])
+    resumed.reset(at)
+    assert resumed.next(0.75) is not None
@@ -0,0 +1,48 @@
+import numpy as np
+from ob.depth import DepthRing
+from ob.orderbook import OrderBook
+
+
+def make_book(**kwargs):
+    ob = OrderBook("ETHUSD", **kwargs)
+    for i in range(3):
+        ob.limit("BID", 10 - i, 1 + i)
+    ob.limit("ASK", 11, 2)
+    return ob
+
+
+def test_depth():
+    for kwargs in [{}, {"tick_size": 1}, {"validate": False}]:
+        ob = make_book(**kwargs)
+        out = np.full((4, 4), -1.0)
+        ob.depth(4, out=out)
+
+        assert out.tolist() == [
+            [11, 2, 10, 1],
+            [0, 0, 9, 2],
+            [0, 0, 8, 3],
+            [0, 0, 0, 0]]
+
+
+def test_to_vec_shallow_book():
+    ob = make_book()
+    assert ob.to_vec(2) == [11, 2, 10, 1, 0, 0, 9, 2]
+    assert OrderBook("ETHUSD").to_vec(1) == [0, 0, 0, 0]
+
+
+def test_depth_ring():
+    ob = make_book()
+    ring = DepthRing(levels=1, capacity=3)
+    out = np.empty((3, 1, 4))
+
+    ring.record(ob)
+    assert len(ring) == 1
+    assert ring.window(out)[:, 0, 2].tolist() == [0, 0, 10]
+
+    for price in [10.5, 10.6, 10.7]:
+        ob.limit("BID", price, 1)
+        ring.record(ob)
+
+    assert len(ring) == 3
+    assert ring.latest()[0, 2] == 10.7
+    assert ring.window(out)[:, 0, 2].tolist() == [10.5, 10.6, 10.7]
@@ -0,0 +1,60 @@
+import math
+from ob.features import FeatureEngine
+from ob.orderbook import OrderBook
+
+
+def test_touch_features():
+    ob = OrderBook("ETHUSD")
+    ob.limit("BID", 10, 1)
+    fe = FeatureEngine(ob, levels=2, horizons=(1,))
+    ob.limit("ASK", 11, 3)
+
+    assert fe["bid"] == 10
+    assert fe["ask"] == 11
+    assert fe["mid"] == 10.5
+    assert fe["spread"] == 1
+    assert fe["microprice"] == (10 * 3 + 11 * 1) / 4.0
+    assert fe["imbalance"] == -0.5
+
+    ob.limit("BID", 10.5, 1)
+    assert fe["mid"] == 10.75
+    assert fe["ret_1"] == math.log(10.75 / 10.5)
+
+
+def test_depth_imbalance():
+    ob = OrderBook("ETHUSD")
+    fe = FeatureEngine(ob, levels=2)
+    ob.limit("BID", 10, 1)
+    ob.limit("BID", 9, 1)
+    ob.limit("BID", 8, 5)
+    ob.limit("ASK", 11, 2)
+
+    # the bid at 8 is outside the two level band
+    assert fe["depth_imbalance"] == 0
+
+    ob.limit("BID", 9, 2)
+    assert fe["depth_imbalance"] == (4 - 2) / 6.0
+
+    ob.cancel("BID", ob._bid_limits.get_price(10).store.head.id)
+    assert fe["depth_imbalance"] == (8 - 2) / 10.0
+
+
+def test_flow_features():
+    ob = OrderBook("ETHUSD")
+    ob.limit("BID", 10, 2, order_id=0)
+    ob.limit("BID", 9, 1, order_id=2)
+    ob.limit("ASK", 11, 2, order_id=1)
+    fe = FeatureEngine(ob)
+
+    # ask queue shrinks: positive order flow imbalance
+    ob.market("BID", 1)
+    assert fe["ofi"] == 1
+    assert fe["trade_flow"] == 1
+
+    # best bid cancelled: negative contribution of its queue
+    ob.cancel("BID", 0)
+    assert fe["cancel_flow"] == 2
+    assert fe["ofi"] == -1
+
+    fe.reset_flow()
+    assert fe["ofi"] == fe["trade_flow"] == fe["cancel_flow"] == 0
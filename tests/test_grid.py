@@ -0,0 +1,52 @@
+import numpy as np
+from envs.grid import GridSampler
+from ob.timeutils import NS_PER_MS
+from .test_checkpoint import make_simulator
+
+
+def test_fixed_clock(tmp_path):
+    sim = make_simulator(tmp_path)
+    grid = GridSampler(sim, levels=5, step_length=5)
+    assert grid.clock % (5 * NS_PER_MS) == 0 and grid.clock > sim.last_ts
+
+    # synthetic events are 10 ms apart, so some steps are empty
+    seen = []
+    for ts, depth, changed in grid:
+        assert sim.last_ts <= ts
+        seen.append(changed)
+        if len(seen) == 50:
+            break
+    assert any(seen) and not all(seen)
+
+
+def test_sample(tmp_path):
+    for cache in (False, True):
+        times, depth = GridSampler(make_simulator(tmp_path, cache=cache),
+                                   levels=3).sample()
+        assert (np.diff(times) == 100 * NS_PER_MS).all()
+        assert depth.shape == (len(times), 3, 4)
+
+        # matches replaying to each grid time from scratch
+        reference = make_simulator(tmp_path, cache=cache)
+        for inx in (0, 7, len(times) // 2, len(times) - 1):
+            reference.next_until(int(times[inx]))
+            assert np.array_equal(reference.orderbook.depth(3), depth[inx])
+        reference.close()
+
+    # streamed to disk in blocks smaller than the range
+    path = str(tmp_path / "grid")
+    sim = make_simulator(tmp_path)
+    part, part_depth = GridSampler(sim, levels=3).sample(
+        end=times[9], path=path, size=4)
+    assert part.tolist() == times[:10].tolist()
+    assert np.array_equal(part_depth, depth[:10])
+    assert np.load(path + "/depth.npy").shape == (10, 3, 4)
+
+
+def test_chunks(tmp_path):
+    times, depth = GridSampler(make_simulator(tmp_path), levels=3).sample()
+    blocks = list(GridSampler(make_simulator(tmp_path),
+                              levels=3).chunks(size=1000))
+    assert all(len(ts) == 1000 for ts, _ in blocks[:-1])
+    assert np.array_equal(np.concatenate([ts for ts, _ in blocks]), times)
+    assert np.array_equal(np.concatenate([d for _, d in blocks]), depth)
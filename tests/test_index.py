@@ -0,0 +1,85 @@
+import gzip
+import os
+import shutil
+import numpy as np
+from ob import index
+from ob.processor import DataProcessor
+from ob.timeutils import parse_ns
+from .test_cache import write_day, ROWS
+
+
+def day_file(tmp_path, rows=ROWS):
+    path = str(tmp_path / "ETHUSD_order_book_20171201.csv")
+    write_day(path, rows)
+    return path
+
+
+def test_build_index(tmp_path):
+    path = day_file(tmp_path)
+    entries = index.build_index(path, every=2)
+    assert entries["row"].tolist() == [0, 2, 4]
+    assert entries["ts"][1] == parse_ns("2017-12-01", "00:00:01", "250")
+
+    with open(path, "rb") as f:
+        for offset, row in zip(entries["offset"], entries["row"]):
+            f.seek(offset)
+            assert f.readline().split(b",")[0] == str(ROWS[row][0]).encode()
+
+    loaded = index.load_index(path)
+    assert np.array_equal(loaded, entries)
+
+
+def test_stale_index(tmp_path):
+    path = day_file(tmp_path)
+    index.build_index(path, every=2)
+
+    # an edited day file gets a new index
+    write_day(path, ROWS[:2])
+    os.utime(path, ns=(0, 0))
+    assert index.load_index(path, every=2)["row"].tolist() == [0]
+
+    # a compressed copy does not share the plain file's offsets
+    with open(path, "rb") as src, gzip.open(path + ".gz", "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    entries = index.load_index(path + ".gz", every=2)
+    assert entries["row"].tolist() == [0]
+    assert index.load_index(path, every=1)["row"].tolist() == [0, 1]
+
+
+def test_find(tmp_path):
+    entries = index.build_index(day_file(tmp_path), every=2)
+    assert index.find(entries, entries["ts"][0]) is None
+    # an entry at the target time may have earlier rows sharing it
+    assert index.find(entries, entries["ts"][1])[1] == 0
+    assert index.find(entries, entries["ts"][2] + 1)[1] == 4
+
+
+def test_seek(tmp_path):
+    path = day_file(tmp_path)
+    index.build_index(path, every=2)
+    dp = DataProcessor(path, "GEMINI")
+
+    dp.seek(parse_ns("2017-12-01", "00:00:02", "000"))
+    assert [o.event_id for o in dp.next(10)] == ["4", "6"]
+
+    # seeking backwards restarts from the start of the file
+    dp.seek(parse_ns("2017-12-01", "00:00:00", "000"), skip=1)
+    assert dp.next()[0].event_id == "2"
+    assert dp.line == 3
+
+
+def test_seek_compressed(tmp_path):
+    path = day_file(tmp_path)
+    with open(path, "rb") as src, gzip.open(path + ".gz", "wb") as dst:
+        shutil.copyfileobj(src, dst)
+
+    dp = DataProcessor(path + ".gz", "GEMINI")
+    dp.seek(parse_ns("2017-12-01", "00:00:04", "999"))
+    assert dp.next()[0].event_id == "6"
+
+
+def test_seek_cached(tmp_path):
+    path = day_file(tmp_path)
+    dp = DataProcessor(path, "GEMINI", cache=True)
+    dp.seek(parse_ns("2017-12-01", "00:00:01", "000"))
+    assert [o.event_id for o in dp.next(10)] == ["3", "4", "6"]
@@ -0,0 +1,106 @@
+from ob.ladder import TickLadder
+from ob.order_utils import PriceLevel
+from ob.ordertree import Tree
+
+
+def test_ladder_insert():
+    l = TickLadder(0.01)
+    for price in [10.0, 10.05, 9.97]:
+        l.insert(price, PriceLevel(price))
+
+    assert len(l) == 3
+    assert l.min_key() == 9.97
+    assert l.max_key() == 10.05
+    assert [p for p, _ in l.items()] == [9.97, 10.0, 10.05]
+    assert [p for p, _ in l.items(reverse=True)] == [10.05, 10.0, 9.97]
+
+
+def test_ladder_float_keys():
+    l = TickLadder(0.01)
+    level = PriceLevel(0.3)
+    l.insert(0.3, level)
+
+    # 0.1 + 0.2 != 0.3 as a float, but they share a tick
+    assert 0.1 + 0.2 in l
+    assert l[0.1 + 0.2] is level
+    assert 0.31 not in l
+
+
+def test_ladder_removal():
+    l = TickLadder(0.5, width=8)
+    for price in [1.0, 2.0, 50.0, 100.0]:
+        l.insert(price, PriceLevel(price))
+
+    l.remove(100.0)
+    assert l.max_key() == 50.0
+    l.remove(1.0)
+    assert l.min_key() == 2.0
+    l.remove(2.0)
+    l.remove(50.0)
+    assert len(l) == 0
+    assert l.items() == []
+
+
+def test_ladder_recentre():
+    l = TickLadder(1, width=4)
+    l.insert(100, PriceLevel(100))
+    l.insert(10, PriceLevel(10))
+    l.insert(1000, PriceLevel(1000))
+
+    assert l.min_key() == 10
+    assert l.max_key() == 1000
+    assert l.keys() == [10, 100, 1000]
+    assert l.keys(reverse=True) == [1000, 100, 10]
+
+
+def test_ladder_stink_orders():
+    l = TickLadder(0.01, width=64)
+    for price in [0.01, 100.0, 100000.0]:
+        l.insert(price, PriceLevel(price))
+
+    # far away levels do not widen the window
+    assert len(l._levels) == 64
+    assert l.keys() == [0.01, 100.0, 100000.0]
+    assert l.max_key() == 100000.0
+    l.remove(100000.0)
+    assert l.max_key() == 100.0
+    assert l.min_key() == 0.01
+    assert len(l._levels) == 64
+
+
+def test_ladder_follows_touch():
+    l = TickLadder(1, width=16, patience=4)
+    l.insert(1, PriceLevel(1))
+    for price in range(100, 200):
+        l.insert(price, PriceLevel(price))
+
+    # the window moved to where the orders arrive
+    assert l._base > 100
+    assert l.min_key() == 1
+    assert l.max_key() == 199
+    assert l.keys() == [1] + list(range(100, 200))
+
+    # emptying the window re-centres it on the next level
+    for price in range(199, 99, -1):
+        l.remove(price)
+        assert l.max_key() == (price - 1 if price > 100 else 1)
+    assert l.keys() == [1]
+    assert l._bits != 0
+
+
+def test_ladder_tree():
+    t = Tree(tick_size=0.01)
+    t.insert_order(0, 10.01, 1)
+    t.insert_order(1, 10.03, 2)
+    t.insert_order(2, 10.01, 1)
+
+    assert t.max() == 10.03
+    assert t.min() == 10.01
+    assert t.price_exists(10.01)
+    assert t.get_price(10.01).total_vol == 2
+
+    volume, fills = t.fill(10.02, 3, "BUY")
+    assert volume == 1
+    assert len(fills) == 2
+    assert not t.price_exists(10.01)
+    assert t.min() == t.max() == 10.03
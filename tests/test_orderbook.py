@@ -1,5 +1,8 @@
 import time
 from datetime import datetime as dt
+import numpy as np
+import pytest
+from ob.cache import EVENT_DTYPE
 from ob.order_utils import Order, PriceLevel
 from ob.orderbook import OrderBook
 
@@ -51,3 +54,179 @@ def test_limit_market_execution():
     assert ob.bid_vol == 1
     assert ob.ask == 5
     assert ob.ask_vol == 1
+
+
+def test_tick_ladder_book():
+    ob = OrderBook("ETHUSD", tick_size=0.01)
+    ob.limit("BID", 10.01, 1)
+    ob.limit("BID", 10.02, 1)
+    ob.limit("ASK", 10.05, 2)
+
+    assert ob.bid == 10.02
+    assert ob.ask == 10.05
+    assert ob.ask_vol == 2
+
+    ob.limit("ASK", 10.01, 1.5)
+    assert ob.bid == 10.01
+    assert ob.bid_vol == 0.5
+
+
+def test_unchecked_book():
+    books = [OrderBook("ETHUSD"), OrderBook("ETHUSD", validate=False)]
+    for ob in books:
+        for i in range(5):
+            ob.limit("BID", 10 - i, 1 + i)
+            ob.limit("ASK", 11 + i, 1 + i)
+        ob.market("BID", 2.5)
+        ob.limit("ASK", 8.5, 4)
+        ob.check_consistency()
+
+    assert books[0].state() == books[1].state()
+    assert books[1].ask == 8.5
+    assert books[1].ask_vol == 1
+
+
+def test_consistency_check():
+    ob = OrderBook("ETHUSD", validate=False)
+    ob.limit("BID", 10, 1)
+    ob.limit("BID", 10, 2)
+    ob.check_consistency()
+
+    ob._bid_limits.get_price(10)._total_vol = 5
+    with pytest.raises(ValueError):
+        ob.check_consistency()
+
+
+def test_lazy_refresh():
+    ob = OrderBook("ETHUSD")
+    ob.limit("BID", 10, 1)
+    assert ob._bid_limits.max_dirty
+    assert ob.bid == 10
+    assert not ob._bid_limits.max_dirty
+
+    # levels behind the touch leave the book clean
+    ob.limit("BID", 9, 1)
+    assert not ob._bid_limits.max_dirty
+
+    ob.limit("BID", 10, 2)
+    assert ob._bid_limits.max_dirty
+    assert ob.bid_vol == 3
+
+
+def test_apply_batch():
+    from ob.processor import OrderEntry
+
+    def event(evt_type, order_id, side, price, volume):
+        return OrderEntry({
+            "evt_type": evt_type, "order_id": order_id, "side": side,
+            "type": "limit", "price": price, "volume": volume,
+            "timestamp": dt(2017, 12, 1)})
+
+    ob = OrderBook("ETHUSD")
+    ob.apply_batch([
+        event("Initial", "1", "buy", 10, 1),
+        event("Initial", "2", "sell", 11, 1),
+        event("Place", "3", "buy", 10.5, 2),
+        event("Cancel", "1", "buy", 10, 1),
+        event("Cancel", "4", "buy", 10, 1),
+        event("Fill", "2", "sell", 11, 1),
+    ])
+
+    assert ob.state() == {
+        "bid": 10.5, "ask": 11, "bid_vol": 2, "ask_vol": 1,
+        "spread": 0.5, "midquote": 10.75}
+    assert not ob._bid_limits.order_exists("1")
+    assert ob.last_datetime == dt(2017, 12, 1)
+
+
+def test_cost_to_fill():
+    ob = OrderBook("ETHUSD")
+    ob.limit("ASK", 11, 1)
+    ob.limit("ASK", 12, 2)
+    ob.limit("BID", 10, 1)
+    ob.limit("BID", 9, 3)
+
+    impact = ob.simulate_market("BID", 2)
+    assert impact.vwap == 11.5
+    assert impact.worst_price == 12
+    assert impact.filled == 2
+    assert impact.unfilled == 0
+    assert impact.cost == 23
+
+    impact = ob.cost_to_fill("ASK", 5)
+    assert impact.filled == 4
+    assert impact.unfilled == 1
+    assert impact.worst_price == 9
+    assert impact.cost == 37
+
+    impact = ob.cost_to_fill("BID", 5, limit_price=11.5)
+    assert impact.filled == 1
+    assert impact.unfilled == 4
+    assert impact.worst_price == 11
+
+    impact = ob.cost_to_fill("BID", 1, limit_price=10)
+    assert impact.vwap is None
+    assert impact.unfilled == 1
+
+    # the book itself is untouched
+    assert ob.ask_vol == 1
+    assert len(ob._ask_limits) == 2
+
+
+def test_cost_to_fill_empty():
+    ob = OrderBook("ETHUSD")
+    ob.limit("ASK", 11, 1)
+    with pytest.raises(ValueError):
+        ob.cost_to_fill("BID", 0)
+    with pytest.raises(ValueError):
+        ob.cost_to_fill("BID", -1)
+
+    # a crossing order leaves a float residual resting at the touch
+    ob = OrderBook("ETHUSD")
+    ob.limit("BID", 10, 0.2999999999999999)
+    ob.limit("ASK", 10, 0.30000000000000004)
+    assert len(ob._ask_limits) == 1 and ob.ask_vol == 0
+    assert ob.cost_to_fill("BID", 1) == (None, None, 0, 1, 0)
+
+    ob.limit("ASK", 11, 1)
+    impact = ob.cost_to_fill("BID", 1)
+    assert impact.filled == 1
+    assert abs(impact.cost - 11) < 1e-9
+
+
+def test_cost_to_fill_cache():
+    ob = OrderBook("ETHUSD")
+    ob.limit("ASK", 11, 1)
+    assert ob.simulate_market("BID", 2).filled == 1
+
+    prefix = ob._ask_limits.prefix
+    version = prefix.version
+    ob.limit("BID", 9, 1)
+    assert ob.simulate_market("BID", 1).cost == 11
+    assert prefix.version == version
+
+    ob.limit("ASK", 10, 1)
+    assert ob.simulate_market("BID", 2).cost == 21
+    assert prefix.version != version
+
+
+def test_apply_events_categories():
+    # codes index the categories of the records, whatever their order
+    categories = {
+        "exec_opt": [""],
+        "event_type": ["Cancel", "Place"],
+        "order_type": ["market", "limit"],
+        "side": ["sell", "buy"],
+    }
+    events = np.array([
+        (1, 1, 7, 0, 1, 1, 1, 10.0, 2.0, 0.0),
+        (2, 2, 8, 0, 1, 1, 0, 11.0, 1.0, 0.0),
+        (3, 3, 9, 0, 1, 0, 0, 0.0, 0.5, 0.0),
+        (4, 4, 8, 0, 0, 1, 0, 11.0, 0.0, 0.0),
+    ], dtype=EVENT_DTYPE)
+
+    ob = OrderBook("ETHUSD")
+    ob.apply_events(events, categories)
+    assert ob.bid == 10.0
+    assert ob.bid_vol == 1.5
+    assert ob.ask == ob.error_ask
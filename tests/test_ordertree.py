@@ -83,3 +83,19 @@ def test_tree_order_update():
     assert o.volume == 1
     assert o.price == price + 1
     assert o.id == id_num
+
+
+def test_tree_touch_removal():
+    t = Tree()
+    for i, price in enumerate([5.0, 6.0, 7.0, 8.0]):
+        t.insert_order(i, price, 1)
+
+    t.remove_order_by_id(3)
+    assert t.max() == 7.0
+    t.remove_order_by_id(0)
+    assert t.min() == 6.0
+    t.remove_order_by_id(1)
+    assert t.min() == t.max() == 7.0
+    t.remove_order_by_id(2)
+    assert t.min() is None
+    assert t.max() is None
@@ -56,3 +56,36 @@ def test_many_changes():
         assert not p.contains(orders[i])
 
     assert p.total_vol == 0
+
+
+def test_queue_fifo():
+    p = PriceLevel(5.0)
+    orders = [Order(i, 5.0, 1, dt.now(), p) for i in range(4)]
+
+    p.remove(orders[2])
+    assert [o.id for o in p.store] == [0, 1, 3]
+    assert len(p) == 3
+
+    volume, fills, leftover = p.get(1.5)
+    assert volume == 0
+    assert [o.id for o in fills] == [0, 1]
+    assert p.store.head is orders[1]
+    assert orders[1].volume == 0.5
+    assert leftover == 1.5
+
+
+def test_queue_update():
+    p = PriceLevel(5.0)
+    o1 = Order(0, 5.0, 2, dt.now(), p)
+    o2 = Order(1, 5.0, 2, dt.now(), p)
+
+    # reducing size keeps time priority
+    p.update(o1, 1)
+    assert p.store.head is o1
+    assert p.total_vol == 3
+
+    # increasing size loses it
+    p.update(o1, 3)
+    assert p.store.head is o2
+    assert p.store.tail is o1
+    assert p.total_vol == 5
@@ -1,3 +1,4 @@
+import pytest
 from ob.processor import DataProcessor
 from datetime import datetime
 
@@ -20,3 +21,77 @@ def test_step():
     ts = datetime.strptime("{},{},{}".format(
         order.date, order.time, order.millis), "%Y-%m-%d,%H:%M:%S,%f")
     assert dp.time == ts
+
+
+def test_read_ahead(tmp_path):
+    from .test_cache import write_day, ROWS
+    path = str(tmp_path / "ETHUSD_order_book_20171201.csv")
+    write_day(path, ROWS)
+
+    dp = DataProcessor(path, "GEMINI")
+    assert dp.next()[0].event_id == "1"
+    dp.read_ahead(3)
+    assert dp.line == 5
+    dp.read_ahead(10)
+    assert [o.event_id for o in dp.next(10)] == ["2", "3", "4", "6"]
+
+
+def test_next_batch(tmp_path):
+    from .test_cache import write_day, ROWS
+    path = str(tmp_path / "ETHUSD_order_book_20171201.csv")
+    write_day(path, ROWS)
+
+    for cache in (False, True):
+        dp = DataProcessor(path, "GEMINI", cache=cache)
+        first = dp.next_batch()
+        assert first["event_id"].tolist() == [1]
+        assert dp.next()[0].event_id == "2"
+        batch = dp.next_batch(1.5)
+        assert batch["event_id"].tolist() == [3, 4]
+        assert [dp.categories["event_type"][c]
+                for c in batch["event_type"]] == ["Place", "Cancel"]
+        assert dp.next()[0].event_id == "6"
+        with pytest.raises(StopIteration):
+            dp.next_batch()
+
+
+def test_batches_across_buffers(tmp_path):
+    from .synthetic import write_day
+    from ob.reader import ChunkedCSVReader
+    path = str(tmp_path / "ETHUSD_order_book_20171201.csv")
+    write_day(path, 3000)
+
+    cached = DataProcessor(path, "GEMINI", cache=True)
+    dp = DataProcessor(path, "GEMINI")
+    # buffers of a few lines, so buckets span several of them
+    dp.f.close()
+    dp.f = ChunkedCSVReader(path, chunk_size=500, offset=len(
+        ",".join(dp.fields)) + 2)
+    dp.set_buffer([])
+
+    assert dp.peek_time() == cached.peek_time()
+    for step in range(60):
+        if step % 3 == 0:
+            assert dp.next()[0].event_id == str(cached.next()[0].event_id)
+        batch = dp.next_batch(0.37)
+        assert batch.tolist() == cached.next_batch(0.37).tolist()
+        assert dp.peek_time() == cached.peek_time()
+        assert dp.line == cached.line
+
+
+def test_order_entry_from_gemini():
+    from ob.processor import OrderEntry
+    row = ["7", "2017-12-01", "00:00:01", "250", "12", "", "Place",
+           "ETHUSD", "limit", "buy", "460.75", "0.5", "", "", "", "",
+           "", ""]
+    dp = DataProcessor.__new__(DataProcessor)
+    dp.data_format = "raw"
+    entry = OrderEntry.from_gemini(row)
+    expected = OrderEntry(dp.parse_gemini(row))
+    assert not hasattr(entry, "__dict__")
+    for name in OrderEntry.__slots__:
+        assert getattr(entry, name) == getattr(expected, name)
+    assert entry.price == 460.75 and entry.avg_price == 0
+
+    row[10] = row[11] = ""
+    assert OrderEntry.from_gemini(row) is None
@@ -0,0 +1,111 @@
+from ob.orderbook import OrderBook
+from ob.queue_tracker import QueueTracker, exponential_fill
+
+
+def test_queue_ahead():
+    book = OrderBook("ETHUSD")
+    for order_id, volume in (("a", 1), ("b", 2), ("agent", 1), ("c", 3)):
+        book.limit("BID", 100, volume, order_id=order_id)
+    book.limit("BID", 99, 5, order_id="d")
+
+    tracker = QueueTracker(book)
+    assert tracker.track("agent", "BID") == 3
+    assert tracker in book.listeners
+
+    # orders behind and at other prices do not move the queue
+    book.cancel("BID", "c")
+    book.cancel("BID", "d")
+    book.limit("BID", 100, 4, order_id="e")
+    assert tracker.queue_ahead("agent") == 3
+
+    book.cancel("BID", "a")
+    assert tracker.queue_ahead("agent") == 2
+    book.market("ASK", 0.5, 0)
+    assert tracker.queue_ahead("agent") == 1.5
+
+    # a reduction keeps b in front, an increase sends it to the back
+    book._bid_limits.update_order("b", 100, 1)
+    assert tracker.queue_ahead("agent") == 1
+    book._bid_limits.update_order("b", 100, 2)
+    assert tracker.queue_ahead("agent") == 0
+
+    book.market("ASK", 0.25, 0)
+    assert tracker.queue_ahead("agent") == 0
+    book.market("ASK", 0.75, 0)
+    assert "agent" not in tracker.orders
+    assert tracker not in book.listeners
+
+
+def test_tick_ladder():
+    # float prices that differ by noise share a tick and a level
+    book = OrderBook("ETHUSD", tick_size=0.01)
+    book.limit("BID", 0.3, 1, order_id="a")
+    book.limit("BID", 0.1 + 0.2, 2, order_id="b")
+    book.limit("BID", 0.3, 1, order_id="agent")
+    book.limit("BID", 0.30000000000000004, 1, order_id="c")
+    assert len(book._bid_limits.price_tree) == 1
+
+    tracker = QueueTracker(book)
+    assert tracker.track("agent", "BID") == 3
+    book.cancel("BID", "c")
+    book.cancel("BID", "b")
+    assert tracker.queue_ahead("agent") == 1
+    book.market("ASK", 0.5, 0)
+    assert tracker.queue_ahead("agent") == 0.5
+    book._bid_limits.update_order("a", 0.3, 0.25)
+    assert tracker.queue_ahead("agent") == 0.25
+
+
+def test_amend_tracked():
+    book = OrderBook("ETHUSD")
+    for order_id in ("a", "agent", "b"):
+        book.limit("ASK", 10, 1, order_id=order_id)
+
+    tracker = QueueTracker(book)
+    tracker.track("agent", "ASK")
+    book._ask_limits.update_order("agent", 10, 2)
+    assert tracker.queue_ahead("agent") == 2
+    book._ask_limits.update_order("agent", 11, 2)
+    assert tracker.orders == {}
+    assert book.listeners == []
+
+
+def test_fill_probability():
+    book = OrderBook("ETHUSD")
+    book.limit("ASK", 10, 2, 0, order_id="a")
+    book.limit("ASK", 10, 1, 0, order_id="agent")
+
+    tracker = QueueTracker(book)
+    tracker.track("agent", "ASK")
+    assert tracker.fill_probability("agent", 1.0) == 0.0
+    assert tracker.fill_probability("agent", 1.0, rate=2.0) == \
+        exponential_fill(2, 1, 2.0)
+
+    book.market("BID", 0.5, 10 ** 9)
+    book.market("BID", 0.5, 2 * 10 ** 9)
+    assert tracker.trade_rate("ASK") == 0.5
+    assert tracker.trade_rate("BID") == 0
+    assert tracker.queue_ahead("agent") == 1
+
+    custom = QueueTracker(book, lambda ahead, volume, expected: ahead)
+    custom.track("agent", "ASK")
+    assert custom.fill_probability("agent", 1.0) == 1
+
+
+def test_trade_rate_window():
+    book = OrderBook("ETHUSD")
+    book.limit("ASK", 10, 5, 0, order_id="a")
+    book.limit("ASK", 11, 1, 0, order_id="b")
+    tracker = QueueTracker(book)
+    tracker.track("b", "ASK")
+    book.market("BID", 1, 10 ** 9)
+    assert tracker.trade_rate("ASK") == 1
+    tracker.untrack("b")
+
+    # trades while nothing is tracked are unseen, so the window
+    # restarts with the next tracked order
+    book.market("BID", 1, 5 * 10 ** 9)
+    tracker.track("b", "ASK")
+    assert tracker.trade_rate("ASK") == 0
+    book.market("BID", 1, 7 * 10 ** 9)
+    assert tracker.trade_rate("ASK") == 0.5
@@ -0,0 +1,71 @@
+from ob.reader import ChunkedCSVReader, split_columns
+
+
+def test_chunk_boundaries(tmp_path):
+    path = str(tmp_path / "rows.csv")
+    rows = [[str(i), "x" * (i % 7), '"q,{}"'.format(i)] for i in range(200)]
+    with open(path, "w") as f:
+        for row in rows:
+            f.write(",".join(row) + "\r\n")
+        f.write("last,row")  # no trailing newline
+
+    for chunk_size in [1, 5, 64, 1 << 20]:
+        reader = ChunkedCSVReader(path, chunk_size=chunk_size)
+        decoded = list(reader)
+        assert len(decoded) == 201
+        assert decoded[3] == ["3", "xxx", "q,3"]
+        assert decoded[-1] == ["last", "row"]
+        assert reader.file.closed
+
+
+def test_read_batch(tmp_path):
+    path = str(tmp_path / "rows.csv")
+    with open(path, "w") as f:
+        f.write("a,b\n" * 1000)
+
+    reader = ChunkedCSVReader(path, chunk_size=1000)
+    batch = reader.read_batch()
+    assert len(batch) == 250
+    assert batch[0] == ["a", "b"]
+
+
+def test_compressed(tmp_path):
+    import bz2
+    import gzip
+    import lzma
+
+    text = "".join("{},{}\n".format(i, i * 2) for i in range(5000))
+    for ext, opener in [(".gz", gzip.open), (".bz2", bz2.open),
+                        (".xz", lzma.open)]:
+        path = str(tmp_path / ("rows.csv" + ext))
+        with opener(path, "wt") as f:
+            f.write(text)
+
+        reader = ChunkedCSVReader(path, chunk_size=4096)
+        assert reader._thread is not None
+        rows = list(reader)
+        assert len(rows) == 5000
+        assert rows[-1] == ["4999", "9998"]
+
+
+def test_close_early(tmp_path):
+    import gzip
+
+    path = str(tmp_path / "rows.csv.gz")
+    with gzip.open(path, "wt") as f:
+        f.write("a,b\n" * 100000)
+
+    reader = ChunkedCSVReader(path, chunk_size=64, prefetch=2)
+    assert reader.read_batch()[0] == ["a", "b"]
+    reader.close()
+    assert reader.file.closed
+    assert reader._thread is None
+
+
+def test_split_columns():
+    assert split_columns(["1,a,", "2,b,x"], 3) == \
+        [["1", "2"], ["a", "b"], ["", "x"]]
+    assert split_columns([], 3) == [[], [], []]
+    assert split_columns(['1,"a,b",c'], 3) is None
+    # the right total, but not per line
+    assert split_columns(["1,2", "3,4,5,6"], 3) is None
@@ -0,0 +1,128 @@
+from envs.scheduler import Scheduler, ConstantLatency, EmpiricalLatency, \
+    TypeLatency
+from ob.timeutils import NS_PER_MS
+from .test_checkpoint import make_simulator
+
+
+def test_latency_models():
+    empirical = EmpiricalLatency([1, 2, 3], seed=0)
+    assert set(empirical.sample("limit") for _ in range(50)) == {1, 2, 3}
+    typed = TypeLatency({"cancel": ConstantLatency(7)}, ConstantLatency(3))
+    assert typed.sample("cancel") == 7
+    assert typed.sample("market") == 3
+
+
+def test_idle(tmp_path):
+    sim = make_simulator(tmp_path)
+    reference = make_simulator(tmp_path)
+    sched = Scheduler(sim, ConstantLatency(5 * NS_PER_MS))
+
+    end = sim.last_ts + 2000 * NS_PER_MS
+    assert sched.run_until(end) == []
+    reference.next_until(end)
+    assert sim.last_ts == reference.last_ts
+    assert sim.orderbook.listeners == []
+
+
+def test_orders(tmp_path):
+    sim = make_simulator(tmp_path)
+    sched = Scheduler(sim, ConstantLatency(5 * NS_PER_MS),
+                      ConstantLatency(NS_PER_MS))
+    start = sched.now
+    book = sim.orderbook
+
+    buy = sched.submit("market", "BID", volume=0.5)
+    assert sched.run_until(start + 5 * NS_PER_MS) == []
+    reports = sched.run_until(start + 6 * NS_PER_MS)
+    assert [r.kind for r in reports][0] == "ack"
+    fills = [r for r in reports if r.kind == "fill"]
+    assert all(r.order_id == buy for r in fills)
+    assert abs(sum(r.volume for r in fills) - 0.5) < 1e-9
+    assert all(r.ts == start + 6 * NS_PER_MS for r in reports)
+
+    # a passive order rests until cancelled, with a listener attached
+    price = book.bid - 1
+    passive = sched.submit("limit", "BID", price, 1)
+    now = sched.now
+    assert [r.kind for r in sched.run_until(now + 10 * NS_PER_MS)] == ["ack"]
+    assert passive in sched.resting and sched in book.listeners
+    assert book._bid_limits.get_order(passive).price == price
+
+    sched.submit("cancel", order_id=passive)
+    reports = sched.run_until(sched.now + 10 * NS_PER_MS)
+    assert [(r.kind, r.order_id, r.volume) for r in reports] == \
+        [("cancel", passive, 1)]
+    assert not book._bid_limits.order_exists(passive)
+    assert book.listeners == []
+
+    # a cancel arriving after the order is gone is rejected
+    sched.submit("cancel", order_id=passive)
+    reports = sched.run_until(sched.now + 10 * NS_PER_MS)
+    assert [r.kind for r in reports] == ["reject"]
+    assert sched.pending() == 0
+
+
+def test_fills(tmp_path):
+    sim = make_simulator(tmp_path)
+    sched = Scheduler(sim)
+    book = sim.orderbook
+
+    # crosses the best bid, the rest stays at the touch
+    order_id = sched.submit("limit", "ASK", book.bid, 50)
+    reports = sched.run_until(sched.now)
+    assert [r.kind for r in reports][0] == "ack"
+
+    filled = sum(r.volume for r in reports if r.kind == "fill")
+    for _ in range(50):
+        reports = sched.run_until(sched.now + 500 * NS_PER_MS)
+        filled += sum(r.volume for r in reports if r.kind == "fill")
+
+    assert filled > 0
+    tree = book._ask_limits
+    left = tree.get_order(order_id).volume \
+        if tree.order_exists(order_id) else 0
+    assert abs(filled + left - 50) < 1e-6
+    assert (order_id in sched.resting) == (left > 0)
+
+
+def test_named_orders(tmp_path):
+    sim = make_simulator(tmp_path)
+    sched = Scheduler(sim)
+    book = sim.orderbook
+
+    # caller supplied ids get taker fills like generated ones
+    sched.submit("market", "ASK", volume=0.5, order_id="mine")
+    reports = sched.run_until(sched.now)
+    fills = [r for r in reports if r.kind == "fill"]
+    assert fills and all(r.order_id == "mine" for r in fills)
+    assert abs(sum(r.volume for r in fills) - 0.5) < 1e-9
+
+    sched.submit("limit", "BID", book.ask, 0.25, order_id="cross")
+    reports = sched.run_until(sched.now)
+    assert [r.order_id for r in reports if r.kind == "fill"][0] == "cross"
+
+
+def test_queue_ahead(tmp_path):
+    sim = make_simulator(tmp_path)
+    sched = Scheduler(sim)
+    book = sim.orderbook
+
+    order_id = sched.submit("limit", "BID", book.bid, 1)
+    sched.run_until(sched.now)
+    tree = book._bid_limits
+    level = tree.get_price(book.bid)
+    assert sched.queue_ahead(order_id) == level.total_vol - 1
+
+    for _ in range(40):
+        sched.run_until(sched.now + 100 * NS_PER_MS)
+        if order_id not in sched.resting:
+            break
+        # matches a walk of the queue in front of the order
+        order = tree.get_order(order_id)
+        ahead = 0
+        prev = order._prev
+        while prev is not None:
+            ahead += prev.volume
+            prev = prev._prev
+        assert abs(sched.queue_ahead(order_id) - ahead) < 1e-6
+        assert 0 <= sched.fill_probability(order_id, 1.0) <= 1
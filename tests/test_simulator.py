@@ -27,3 +27,47 @@ def test_simulator():
     }
 
     Simulator(options)
+
+
+def test_prefetch(tmp_path):
+    from .test_checkpoint import make_simulator
+
+    def replay(sim):
+        states = []
+        while not sim.is_finished():
+            if sim.next(2) is not None:
+                states.append((sim.last_ts, sim.orderbook.depth(5)))
+        sim.close()
+        return states
+
+    eager = replay(make_simulator(tmp_path, prefetch=False))
+    prefetched = replay(make_simulator(tmp_path, lookahead=500))
+    assert len(eager) == len(prefetched)
+    for (ts, depth), (other_ts, other_depth) in zip(eager, prefetched):
+        assert ts == other_ts
+        assert (depth == other_depth).all()
+
+
+def test_date_range():
+    from envs.simulator import next_date, date_range
+    assert next_date(20171231) == 20180101
+    assert date_range(20180227, 20180302) == \
+        [20180227, 20180228, 20180301, 20180302]
+    assert date_range(20171201, 20171201) == [20171201]
+
+
+def test_next_batch(tmp_path):
+    from .test_checkpoint import make_simulator
+    for cache in (False, True):
+        entries = make_simulator(tmp_path, cache=cache)
+        columns = make_simulator(tmp_path, cache=cache)
+        while not entries.is_finished():
+            entries.next(0.5)
+            columns.next_batch(0.5)
+            assert entries.last_ts == columns.last_ts
+            assert (entries.orderbook.depth(10) ==
+                    columns.orderbook.depth(10)).all()
+        assert columns.next_batch(0.5) is None
+        assert columns.is_finished()
+        entries.close()
+        columns.close()
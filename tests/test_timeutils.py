@@ -0,0 +1,17 @@
+from datetime import datetime
+from ob.timeutils import parse_ns, to_ns, from_ns
+
+
+def test_parse_ns():
+    for date, time, millis in [("2017-12-01", "00:00:00", "000"),
+                               ("2017-12-31", "23:59:59", "999"),
+                               ("2018-02-28", "12:30:05", "042")]:
+        expected = datetime.strptime("{},{},{}".format(date, time, millis),
+                                     "%Y-%m-%d,%H:%M:%S,%f")
+        assert parse_ns(date, time, millis) == to_ns(expected)
+
+
+def test_ns_roundtrip():
+    ts = datetime(2017, 12, 1, 14, 0, 0, 123000)
+    assert from_ns(to_ns(ts)) == ts
+    assert to_ns(5) == 5
@@ -0,0 +1,42 @@
+import numpy as np
+from datetime import datetime as dt
+from ob.orderbook import OrderBook
+from ob.timeutils import to_ns
+from ob.trades import TradeLog, read_spill
+
+
+def test_trade_log():
+    ob = OrderBook("ETHUSD")
+    log = TradeLog(capacity=8)
+    ob.subscribe(log)
+
+    ts = dt(2017, 12, 1, 0, 0, 1)
+    ob.limit("ASK", 11, 1, order_id="1")
+    ob.limit("ASK", 12, 2, order_id="2")
+    ob.market("BID", 2, timestamp=ts, order_id="3")
+    ob.limit("BID", 12, 2, timestamp=ts, order_id="4")
+
+    trades = log.view()
+    assert len(log) == 3
+    assert trades["price"].tolist() == [11, 12, 12]
+    assert trades["qty"].tolist() == [1, 1, 1]
+    assert trades["side"].tolist() == [1, 1, 1]
+    assert trades["maker_id"].tolist() == [1, 2, 2]
+    assert trades["taker_id"].tolist() == [3, 3, 4]
+    assert trades["ts"][0] == to_ns(ts)
+    assert np.shares_memory(trades, log.buffer)
+
+
+def test_trade_log_wrap(tmp_path):
+    path = str(tmp_path / "fills.bin")
+    log = TradeLog(capacity=4, spill_path=path)
+    for i in range(10):
+        log.append(i, 10.0 + i, 1.0, -1, i, i + 100)
+
+    older, newer = log.segments()
+    assert older["ts"].tolist() == [6, 7]
+    assert newer["ts"].tolist() == [8, 9]
+    assert log.view()["ts"].tolist() == [6, 7, 8, 9]
+
+    log.close()
+    assert read_spill(path)["ts"].tolist() == list(range(10))
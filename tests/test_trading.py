@@ -0,0 +1,71 @@
+import numpy as np
+from envs.trading import TradingEnv
+from envs.vec_env import SubprocVecEnv
+from ob.timeutils import NS_PER_MS, NS_PER_SEC
+from .test_checkpoint import simulator_options
+
+
+def test_episode(tmp_path):
+    env = TradingEnv(simulator_options(tmp_path, grid_step_length=500),
+                     episode_length=20, order_size=0.5, trading_fee=0.001)
+    obs, _ = env.reset(seed=1)
+    assert obs.shape == env.observation_space.shape
+    ask, bid = obs[0], obs[2]
+    assert 0 < bid < ask
+
+    obs, reward, terminated, truncated, _ = env.step(env.actions["BUY"])
+    assert obs[-2] == 0.5
+    # bought at the ask or worse, marked at the mid, less fees
+    assert reward < 0
+
+    total = reward
+    for step in range(19):
+        buffer, reward, terminated, truncated, _ = env.step(
+            env.actions["SELL"] if step == 0 else env.actions["WAIT"])
+        assert buffer is obs
+        total += reward
+    assert truncated and not terminated
+    assert obs[-2] == 0
+    assert np.isclose(total, obs[-1])
+
+    # restarting at a time replays the book up to it
+    start = env.sim.first_ts
+    obs, _ = env.reset(options={"at": start})
+    assert obs[-2] == 0 and env.sim.last_ts == start
+    env.close()
+
+
+def test_fixed_clock(tmp_path):
+    # hour long steps cross the gap between the two synthetic days
+    env = TradingEnv(simulator_options(tmp_path, grid_step_length=3600000),
+                     episode_length=100)
+    env.reset()
+    start = env.clock
+    for step in range(1, 31):
+        env.step(env.actions["WAIT"])
+        assert env.clock == start + step * 3600000 * NS_PER_MS
+        assert env.sim.last_ts <= env.clock
+        if step == 1:
+            # the rest of the day is replayed, the next day is not
+            first_day = env.sim.last_ts
+            assert first_day < start + 60 * NS_PER_SEC
+        else:
+            assert (env.sim.last_ts == first_day) == (step < 24)
+    env.close()
+
+
+def test_vectorised(tmp_path):
+    options = simulator_options(tmp_path, grid_step_length=1000)
+    env = SubprocVecEnv([lambda: TradingEnv(options, episode_length=5)
+                         for _ in range(3)])
+    try:
+        obs = env.reset()
+        assert obs.shape == (3, 22)
+        for _ in range(5):
+            obs, rewards, dones, infos = env.step([0, 1, 2])
+        assert dones.all()
+        assert [info["terminal_observation"][-2] for info in infos] == \
+            [5, -5, 0]
+        assert (obs[:, -2] == 0).all()
+    finally:
+        env.close()
@@ -0,0 +1,50 @@
+import numpy as np
+from gym import Env, spaces
+from envs.vec_env import SubprocVecEnv
+
+
+class CountingEnv(Env):
+
+    def __init__(self, offset):
+        self.offset = offset
+        self.observation_space = spaces.Box(-np.inf, np.inf, shape=(3,))
+        self.action_space = spaces.Discrete(3)
+        self.count = 0
+
+    def reset(self, seed=None, options=None):
+        self.count = 0
+        return self.obs(), {}
+
+    def step(self, action):
+        self.count += 1
+        return self.obs(action), float(action), self.count == 3, False, {}
+
+    def obs(self, action=0):
+        return np.array([self.offset, self.count, action], dtype=np.float32)
+
+
+def make(offset):
+    return lambda: CountingEnv(offset)
+
+
+def test_step(tmp_path):
+    env = SubprocVecEnv([make(i) for i in range(4)])
+    try:
+        obs = env.reset()
+        assert obs.shape == (4, 3)
+        assert obs[:, 0].tolist() == [0, 1, 2, 3]
+
+        for step in range(1, 3):
+            obs, rewards, dones, infos = env.step([0, 1, 2, 1])
+            assert obs[:, 1].tolist() == [step] * 4
+            assert obs[:, 2].tolist() == [0, 1, 2, 1]
+            assert rewards.tolist() == [0, 1, 2, 1]
+            assert not dones.any()
+
+        # episodes end together and are reset in the workers
+        obs, rewards, dones, infos = env.step([2, 2, 2, 2])
+        assert dones.all()
+        assert obs[:, 1].tolist() == [0] * 4
+        assert infos[1]["terminal_observation"].tolist() == [1, 3, 2]
+    finally:
+        env.close()